@@ -50,10 +50,11 @@ def _parse_prop_file(path: Path) -> dict[str, str]:
     with open(path, "r", encoding="utf-8", errors="ignore") as handle:
         for raw in handle:
             line = raw.strip()
-            if not line or line.startswith("#") or "=" not in line:
+            if not line or line[0] == "#":
                 continue
-            key, value = line.split("=", 1)
-            props[key.strip()] = value.strip()
+            key, sep, value = line.partition("=")
+            if sep:
+                props[key.strip()] = value.strip()
     return props
 
 
@@ -15,7 +15,7 @@ from src.core.workspace import (
     install_partition,
     prepare_target_directories,
 )
-from src.utils.shell import ShellRunner
+from src.utils.shell import ShellRunner, default_runner
 from src.utils.sync_engine import ROMSyncEngine
 
 if TYPE_CHECKING:
@@ -45,7 +45,7 @@ class PortingContext:
         self.logger: logging.Logger = logging.getLogger("Context")
         self._init_tools()
         self.syncer: ROMSyncEngine = ROMSyncEngine(self, logging.getLogger("SyncEngine"))
-        self.shell: ShellRunner = ShellRunner()
+        self.shell: ShellRunner = default_runner()
         self.enable_ksu: bool = False
         self.enable_custom_avb_chain: bool = False
         self.avb_key_path: Optional[Path] = None
@@ -1,15 +1,18 @@
 """Firmware-level modifications (vbmeta patching, KernelSU)."""
 
 import json
+import os
 import re
 import shutil
 import tempfile
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
 from src.core.modifiers.base_modifier import BaseModifier
-from src.utils.shell import ShellRunner
+from src.utils.fastio import fast_copy, fast_move
+from src.utils.shell import default_runner
 
 
 class FirmwareModifier(BaseModifier):
@@ -17,7 +20,7 @@ class FirmwareModifier(BaseModifier):
 
     def __init__(self, context):
         super().__init__(context, "FirmwareModifier")
-        self.shell = ShellRunner()
+        self.shell = default_runner()
         self.bin_dir = Path("bin").resolve()
 
         if not self.ctx.tools.magiskboot.exists():
@@ -84,15 +87,21 @@ class FirmwareModifier(BaseModifier):
         return self._analyze_kmi(analysis_target)
 
     def _patch_vbmeta(self):
-        """Patch vbmeta.img to disable AVB."""
-        self.logger.info("Patching vbmeta.img (Disabling AVB)...")
+        """Patch vbmeta*.img to disable AVB."""
+        self.logger.info("Patching vbmeta images (Disabling AVB)...")
 
-        vbmeta_img = self.ctx.target_dir / "repack_images" / "vbmeta.img"
+        vbmeta_images = sorted((self.ctx.target_dir / "repack_images").glob("vbmeta*.img"))
 
-        if not vbmeta_img.exists():
-            self.logger.warning("vbmeta.img not found in repack_images directory.")
+        if not vbmeta_images:
+            self.logger.warning("No vbmeta*.img found in repack_images directory.")
             return
 
+        # Each image is a tiny independent read/write, so overlap them
+        with ThreadPoolExecutor(max_workers=min(8, len(vbmeta_images))) as pool:
+            list(pool.map(self._patch_single_vbmeta, vbmeta_images))
+
+    def _patch_single_vbmeta(self, vbmeta_img: Path):
+        """Set the AVB flags of a single vbmeta image."""
         AVB_MAGIC = b"AVB0"
         FLAGS_OFFSET = 123
         # Use AVB flag 0x01 to avoid fastboot bootloop issues on Android 16 base builds.
@@ -152,7 +161,7 @@ class FirmwareModifier(BaseModifier):
         """Analyze kernel image to extract KMI version."""
         with tempfile.TemporaryDirectory(prefix="ksu_kmi_") as tmp:
             tmp_path = Path(tmp)
-            shutil.copy(boot_img, tmp_path / "boot.img")
+            fast_copy(boot_img, tmp_path / "boot.img")
 
             try:
                 self.shell.run([str(self.ctx.tools.magiskboot), "unpack", "boot.img"], cwd=tmp_path)
@@ -160,13 +169,8 @@ class FirmwareModifier(BaseModifier):
                 self.logger.debug(f"Magiskboot unpack failed: {e}")
                 return None
 
-            kernel_file = tmp_path / "kernel"
-            if not kernel_file.exists():
-                self.logger.debug("Kernel file not found after unpack.")
-                return None
-
             try:
-                with open(kernel_file, "rb") as f:
+                with open(tmp_path / "kernel", "rb") as f:
                     content = f.read()
 
                 strings = []
@@ -185,6 +189,9 @@ class FirmwareModifier(BaseModifier):
                         match = pattern.search(s)
                         if match:
                             return f"{match.group(2)}-{match.group(1)}"
+            except FileNotFoundError:
+                self.logger.debug("Kernel file not found after unpack.")
+                return None
             except Exception as e:
                 self.logger.error(f"Error parsing kernel file: {e}")
 
@@ -264,55 +271,43 @@ class FirmwareModifier(BaseModifier):
 
         ko_file = self.assets_dir / ko_filename
         init_file = self.assets_dir / init_filename
+        magiskboot = str(self.ctx.tools.magiskboot)
 
         with tempfile.TemporaryDirectory(prefix="ksu_patch_") as tmp:
             tmp_path = Path(tmp)
-            shutil.copy(target_img, tmp_path / "boot.img")
+            fast_copy(target_img, tmp_path / "boot.img")
 
-            self.shell.run([str(self.ctx.tools.magiskboot), "unpack", "boot.img"], cwd=tmp_path)
+            self.shell.run([magiskboot, "unpack", "boot.img"], cwd=tmp_path)
 
-            ramdisk = tmp_path / "ramdisk.cpio"
-            if not ramdisk.exists():
+            # One directory listing covers everything unpack produced
+            with os.scandir(tmp_path) as it:
+                unpacked = {entry.name for entry in it}
+            if "ramdisk.cpio" not in unpacked:
                 self.logger.error("ramdisk.cpio not found")
                 return
 
-            self.shell.run(
-                [
-                    str(self.ctx.tools.magiskboot),
-                    "cpio",
-                    "ramdisk.cpio",
-                    "mv init init.real",
-                ],
-                cwd=tmp_path,
-            )
+            fast_copy(init_file, tmp_path / "init")
+            fast_copy(ko_file, tmp_path / "kernelsu.ko")
 
-            shutil.copy(init_file, tmp_path / "init")
+            # magiskboot applies every trailing cpio command in order against a
+            # single load/save of the ramdisk
             self.shell.run(
                 [
-                    str(self.ctx.tools.magiskboot),
+                    magiskboot,
                     "cpio",
                     "ramdisk.cpio",
+                    "mv init init.real",
                     "add 0755 init init",
-                ],
-                cwd=tmp_path,
-            )
-
-            shutil.copy(ko_file, tmp_path / "kernelsu.ko")
-            self.shell.run(
-                [
-                    str(self.ctx.tools.magiskboot),
-                    "cpio",
-                    "ramdisk.cpio",
                     "add 0755 kernelsu.ko kernelsu.ko",
                 ],
                 cwd=tmp_path,
             )
 
-            self.shell.run([str(self.ctx.tools.magiskboot), "repack", "boot.img"], cwd=tmp_path)
+            self.shell.run([magiskboot, "repack", "boot.img"], cwd=tmp_path)
 
             new_img = tmp_path / "new-boot.img"
             if new_img.exists():
-                shutil.move(new_img, target_img)
+                fast_move(new_img, target_img)
                 self.logger.info(f"KernelSU injected successfully into {target_img.name}.")
             else:
                 self.logger.error(f"Failed to repack {target_img.name}")
@@ -2,21 +2,26 @@
 
 from __future__ import annotations
 
+import itertools
 import json
+import os
 import re
 import shutil
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
 from src.core.modifiers.base_modifier import BaseModifier
 from src.core.modifiers.smali_args import SmaliArgs
-from src.utils.shell import ShellRunner
+from src.utils.shell import default_runner
 from src.utils.smalikit import SmaliKit
 
 if TYPE_CHECKING:
     from src.core.context import PortingContext
 
+_REGISTER_RE = re.compile(r"[vp]\d+")
+
 
 class FrameworkModifierBase(BaseModifier):
     """Base class for framework-level modifications with utility methods."""
@@ -26,7 +31,7 @@ class FrameworkModifierBase(BaseModifier):
 
     def __init__(self, context: PortingContext) -> None:
         super().__init__(context, "FrameworkModifier")
-        self.shell = ShellRunner()
+        self.shell = default_runner()
         self.bin_dir = Path("bin").resolve()
 
         self.apktool_path = self.bin_dir / "apktool" / "apktool"
@@ -35,6 +40,17 @@ class FrameworkModifierBase(BaseModifier):
 
         self.temp_dir = self.ctx.target_dir.parent / "temp_modifier"
 
+        # In-memory smali edit buffer: every mutation of a file lands here and is
+        # written back once per file by _flush_pending() before the JAR is rebuilt.
+        self._pending: dict[Path, str] = {}
+        self._dirty: set[Path] = set()
+        self._pending_lock = threading.Lock()
+
+        # Memoized {filename: path} indexes of decoded work dirs, see _find_cached()
+        self._file_index: dict[Path, dict[str, Path]] = {}
+        # Memoized smali file lists of decoded work dirs, see _smali_files()
+        self._smali_index: dict[Path, list[Path]] = {}
+
     def _get_jar_cache_key(self, jar_name: str) -> Optional[str]:
         """Generate cache key for JAR modification.
 
@@ -124,13 +140,64 @@ class FrameworkModifierBase(BaseModifier):
             self.logger.warning(f"Failed to cache JAR {jar_name}: {e}")
             return False
 
+    def _read_smali(self, file_path: Path) -> str:
+        """Read a smali file, serving it from the pending edit buffer when present."""
+        file_path = Path(file_path)
+        with self._pending_lock:
+            content = self._pending.get(file_path)
+        if content is None:
+            content = file_path.read_text(encoding="utf-8", errors="ignore")
+            with self._pending_lock:
+                content = self._pending.setdefault(file_path, content)
+        return content
+
+    def _write_smali(self, file_path: Path, content: str) -> None:
+        """Stage new smali content; it reaches disk on the next _flush_pending()."""
+        file_path = Path(file_path)
+        with self._pending_lock:
+            self._pending[file_path] = content
+            self._dirty.add(file_path)
+
+    def _flush_pending(self, root: Path | None = None) -> None:
+        """Write buffered smali edits (optionally only those under root) to disk."""
+        with self._pending_lock:
+            paths = [p for p in self._pending if root is None or p.is_relative_to(root)]
+            to_write = [(p, self._pending.pop(p)) for p in paths if p in self._dirty]
+            for p in paths:
+                self._pending.pop(p, None)
+            self._dirty.difference_update(paths)
+
+        for file_path, content in to_write:
+            file_path.write_text(content, encoding="utf-8")
+        if to_write:
+            self.logger.debug(f"Flushed {len(to_write)} buffered smali file(s)")
+
     def _run_smalikit(self, **kwargs) -> None:
-        """Run SmaliKit with given arguments."""
+        """Run SmaliKit with given arguments against the in-memory edit buffer."""
         args = SmaliArgs(**kwargs)
         patcher = SmaliKit(args, logger=self.logger)
         target = args.file_path if args.file_path else args.path
-        if target:
-            patcher.walk_and_patch(target)
+        if not target:
+            return
+
+        if args.file_path:
+            smali_files = list(patcher.iter_smali_files(target))
+        else:
+            # path= + iname= calls are served from the per-root smali listing
+            smali_files = [
+                p for p in self._smali_files(Path(target)) if not args.iname or args.iname in p.name
+            ]
+
+        for smali_file in smali_files:
+            try:
+                content = self._read_smali(Path(smali_file))
+                new_content, patched = patcher.patch_content(content, smali_file)
+                if patched:
+                    self._write_smali(Path(smali_file), new_content)
+                    self.logger.info(f"  -> [SUCCESS] Patched: {smali_file}")
+            except Exception as e:
+                # One broken file must not abort the remaining patches, as in patch_file()
+                self.logger.error(f"[ERROR] processing {smali_file}: {e}")
 
     def _apkeditor_decode(self, jar_path: Path, out_dir: Path) -> None:
         """Decode JAR/APK using APKEditor."""
@@ -140,6 +207,7 @@ class FrameworkModifierBase(BaseModifier):
 
     def _apkeditor_build(self, src_dir: Path, out_jar: Path) -> None:
         """Build JAR/APK using APKEditor."""
+        self._flush_pending(src_dir)
         self.shell.run_java_jar(
             self.apkeditor_path, ["b", "-f", "-i", str(src_dir), "-o", str(out_jar)]
         )
@@ -155,14 +223,48 @@ class FrameworkModifierBase(BaseModifier):
         """Alias for _find_file for backward compatibility."""
         return self._find_file(root, name_pattern)
 
+    def _find_cached(self, root: Path, filename: str) -> Path | None:
+        """Find file by exact name, walking root only once per index lifetime."""
+        root = Path(root)
+        index = self._file_index.get(root)
+        if index is None:
+            index = {}
+            for dirpath, _, files in os.walk(root):
+                for name in files:
+                    index.setdefault(name, Path(dirpath) / name)
+            self._file_index[root] = index
+        return index.get(filename)
+
+    def _smali_files(self, root: Path) -> list[Path]:
+        """All .smali files under root, walking it only once per index lifetime."""
+        files = self._smali_index.get(root)
+        if files is None:
+            if not root.is_dir():
+                self.logger.error(f"[ERROR] Path not found: {root}")
+                return []
+            files = [
+                Path(dirpath) / name
+                for dirpath, _, names in os.walk(root)
+                for name in names
+                if name.endswith(".smali")
+            ]
+            self._smali_index[root] = files
+        return files
+
+    def _invalidate_find_cache(self, root: Path) -> None:
+        """Drop the memoized indexes of root after files were added beneath it."""
+        root = Path(root)
+        self._file_index.pop(root, None)
+        for indexed in [p for p in self._smali_index if p.is_relative_to(root)]:
+            self._smali_index.pop(indexed, None)
+
     def _replace_text_in_file(self, file_path: Path | None, old: str, new: str) -> None:
         """Replace text in file if it exists."""
         if not file_path or not file_path.exists():
             return
-        content = file_path.read_text(encoding="utf-8", errors="ignore")
+        content = self._read_smali(file_path)
         if old in content:
-            new_content = content.replace(old, new)
-            file_path.write_text(new_content, encoding="utf-8")
+            self._write_smali(file_path, content.replace(old, new))
             self.logger.info(f"Patched {file_path.name}: {old[:20]}... -> {new[:20]}...")
 
     def _copy_to_next_classes(self, work_dir: Path, source_dir: Path) -> None:
@@ -182,6 +284,7 @@ class FrameworkModifierBase(BaseModifier):
 
         target = work_dir / "smali" / f"classes{max_num + 1}"
         shutil.copytree(source_dir, target, dirs_exist_ok=True)
+        self._invalidate_find_cache(work_dir)
         self.logger.info(f"Copied classes to {target.name}")
 
     def _extract_register_from_invoke(
@@ -207,14 +310,19 @@ class FrameworkModifierBase(BaseModifier):
             return None
 
         matched_regs_str = invoke_match.group(1)
-        reg_list = [r.strip() for r in matched_regs_str.split(",") if r.strip()]
+        target = None
+        if ".." not in matched_regs_str:
+            regs = _REGISTER_RE.finditer(matched_regs_str)
+            target = next(itertools.islice(regs, arg_index, arg_index + 1), None)
 
-        if arg_index < len(reg_list):
-            extracted_reg = reg_list[arg_index]
+        if target:
+            extracted_reg = target.group()
             self.logger.debug(f"Extracted register {extracted_reg} from {method_signature}")
             return extracted_reg
         else:
-            self.logger.warning(f"arg_index {arg_index} out of bounds for registers: {reg_list}")
+            self.logger.warning(
+                f"arg_index {arg_index} out of bounds for registers: {{{matched_regs_str}}}"
+            )
             return None
 
     def _extract_register_from_local(
@@ -46,3 +46,35 @@ MY_PLATFORM_KEY = (
     "298351c276ab266869d6494b838bd6cc175185f705b8806eb1950becec57fb4f9b50240bb92d1d30bbb5764d311d"
     "18446588e5fd2b9785c635f2bb690df1e4fb595305371350c6d306d3f6cae3bc4974e9d8609c"
 )
+
+# ExtraPackageManager caches the custom platform Signature in a static field so the
+# hex blob above is parsed once per process instead of on every trust check.
+PLATFORM_SIG_REF = (
+    "Lmiui/content/pm/ExtraPackageManager;->sPlatformSig:Landroid/content/pm/Signature;"
+)
+PLATFORM_SIG_FIELD = ".field private static final sPlatformSig:Landroid/content/pm/Signature;"
+PLATFORM_SIG_INIT = f"""new-instance v0, Landroid/content/pm/Signature;
+    const-string v1, "{MY_PLATFORM_KEY}"
+    invoke-direct {{v0, v1}}, Landroid/content/pm/Signature;-><init>(Ljava/lang/String;)V
+    sput-object v0, {PLATFORM_SIG_REF}"""
+PLATFORM_SIG_CLINIT = f""".method static constructor <clinit>()V
+    .locals 2
+
+    {PLATFORM_SIG_INIT}
+
+    return-void
+.end method"""
+PLATFORM_KEY_CHECK = f"""
+    # [Start] Custom Platform Key Check
+    const/4 v2, 0x1
+    new-array v2, v2, [Landroid/content/pm/Signature;
+    sget-object v3, {PLATFORM_SIG_REF}
+    const/4 v4, 0x0
+    aput-object v3, v2, v4
+    invoke-static {{p0, v2}}, Lmiui/content/pm/ExtraPackageManager;->compareSignatures([Landroid/content/pm/Signature;[Landroid/content/pm/Signature;)I
+    move-result v2
+    if-eqz v2, :cond_custom_skip
+    const/4 v2, 0x1
+    return v2
+    :cond_custom_skip
+    # [End]"""
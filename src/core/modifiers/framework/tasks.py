@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 import shutil
 import zipfile
 from pathlib import Path
@@ -10,7 +11,10 @@ from typing import TYPE_CHECKING
 from src.core.modifiers.framework.base import FrameworkModifierBase
 from src.core.modifiers.framework.patches import (
     INVOKE_TRUE,
-    MY_PLATFORM_KEY,
+    PLATFORM_KEY_CHECK,
+    PLATFORM_SIG_CLINIT,
+    PLATFORM_SIG_FIELD,
+    PLATFORM_SIG_INIT,
     RETRUN_FALSE,
     RETRUN_TRUE,
 )
@@ -98,7 +102,7 @@ class FrameworkTasks(FrameworkModifierBase):
         ]
 
         for rel_path, rules in patches:
-            target_smali = self._find_file(work_dir, Path(rel_path).name)
+            target_smali = self._find_cached(work_dir, Path(rel_path).name)
             if target_smali:
                 for old_str, new_str in rules:
                     self._replace_text_in_file(target_smali, old_str, new_str)
@@ -300,7 +304,7 @@ class FrameworkTasks(FrameworkModifierBase):
             self.logger.warning("pif_patch_v2.zip not found, skipping PIF injection.")
 
         # Hook PendingIntent for AutoCopy
-        target_file = self._find_file(wd, "PendingIntent.smali")
+        target_file = self._find_cached(wd, "PendingIntent.smali")
         if target_file:
             hook_code = "\n    # [AutoCopy Hook]\n    invoke-static {p0, p2}, Lcom/android/internal/util/HookHelper;->onPendingIntentGetActivity(Landroid/content/Context;Landroid/content/Intent;)V"
             self._run_smalikit(
@@ -319,19 +323,19 @@ class FrameworkTasks(FrameworkModifierBase):
 
         # Fix Voice Trigger for A16
         if int(self.ctx.port_android_version) >= 16:
-            st_config = self._find_file(wd, "SoundTrigger$RecognitionConfig.smali")
+            st_config = self._find_cached(wd, "SoundTrigger$RecognitionConfig.smali")
             if st_config:
                 self.logger.info(
                     f"Applying VoiceTrigger compatibility patch to {st_config.name}..."
                 )
-                content = st_config.read_text(encoding="utf-8", errors="ignore")
+                content = self._read_smali(st_config)
 
                 field_def = ".field public captureRequested:Z"
                 if field_def not in content:
                     target_field = ".field private final blacklist mCaptureRequested:Z"
                     if target_field in content:
                         content = content.replace(target_field, f"{target_field}\n{field_def}")
-                        st_config.write_text(content, encoding="utf-8")
+                        self._write_smali(st_config, content)
                         self.logger.info("  -> Added field captureRequested")
 
                 constructor_sig = "<init>(ZZ[Landroid/hardware/soundtrigger/SoundTrigger$KeyphraseRecognitionExtra;[BI)V"
@@ -351,7 +355,7 @@ class FrameworkTasks(FrameworkModifierBase):
     def _inject_hook_helper_methods(self, work_dir: Path) -> None:
         """Inject HookHelper additional methods (AutoCopy)."""
 
-        hook_helper = self._find_file(work_dir, "HookHelper.smali")
+        hook_helper = self._find_cached(work_dir, "HookHelper.smali")
         if not hook_helper:
             self.logger.warning("HookHelper.smali not found, creating new one...")
             return
@@ -427,10 +431,9 @@ class FrameworkTasks(FrameworkModifierBase):
     return-void
 .end method
 """
-        content = hook_helper.read_text(encoding="utf-8")
+        content = self._read_smali(hook_helper)
         if "onPendingIntentGetActivity" not in content:
-            with open(hook_helper, "a", encoding="utf-8") as f:
-                f.write(smali_code)
+            self._write_smali(hook_helper, content + smali_code)
             self.logger.info("Added onPendingIntentGetActivity to HookHelper.")
         else:
             self.logger.info("onPendingIntentGetActivity already exists.")
@@ -442,35 +445,49 @@ class FrameworkTasks(FrameworkModifierBase):
         self.logger.info("Applying PIF Patch (Instrumentation, KeyStoreSpi, AppPM)...")
 
         temp_pif = self.temp_dir / "pif_classes"
-        with zipfile.ZipFile(pif_zip, "r") as z:
-            z.extractall(temp_pif)
-        self._copy_to_next_classes(work_dir, temp_pif / "classes")
-
-        self.logger.info(f"Merging files from {temp_pif} to {self.ctx.target_dir}...")
-
-        for item in temp_pif.iterdir():
-            if item.name == "classes":
-                continue
+        target_root = self.ctx.target_dir
 
-            target_path = self.ctx.target_dir / item.name
-            self.logger.info(f"  Merging: {item.name} -> {target_path}")
+        self.logger.info(f"Merging files from {pif_zip.name} to {target_root}...")
 
-            if item.is_dir():
-                shutil.copytree(item, target_path, symlinks=True, dirs_exist_ok=True)
-            else:
-                if target_path.exists() or Path(target_path).is_symlink():
-                    if target_path.is_dir():
+        # Only classes/ needs a staging copy (for _copy_to_next_classes); everything
+        # else is streamed straight from the archive into the target tree.
+        with zipfile.ZipFile(pif_zip, "r") as z:
+            merged_tops: set[str] = set()
+            for info in z.infolist():
+                rel = info.filename
+                if rel.startswith("classes/"):
+                    z.extract(info, temp_pif)
+                    continue
+
+                parts = Path(rel).parts
+                if not parts or Path(rel).is_absolute() or ".." in parts:
+                    self.logger.warning(f"  Skipping unsafe archive entry: {rel}")
+                    continue
+
+                target_path = target_root.joinpath(*parts)
+                if parts[0] not in merged_tops:
+                    merged_tops.add(parts[0])
+                    self.logger.info(f"  Merging: {parts[0]} -> {target_root / parts[0]}")
+
+                if info.is_dir():
+                    target_path.mkdir(parents=True, exist_ok=True)
+                    continue
+
+                if target_path.is_symlink() or target_path.is_dir():
+                    if target_path.is_dir() and not target_path.is_symlink():
                         shutil.rmtree(target_path)
                     else:
-                        import os
-
                         os.unlink(target_path)
-                shutil.copy2(item, target_path, follow_symlinks=False)
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                with z.open(info) as src, open(target_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+
+        self._copy_to_next_classes(work_dir, temp_pif / "classes")
 
         # Hook Instrumentation
-        inst_smali = self._find_file(work_dir, "Instrumentation.smali")
+        inst_smali = self._find_cached(work_dir, "Instrumentation.smali")
         if inst_smali:
-            content = inst_smali.read_text(encoding="utf-8", errors="ignore")
+            content = self._read_smali(inst_smali)
 
             method1 = "newApplication(Ljava/lang/ClassLoader;Ljava/lang/String;Landroid/content/Context;)Landroid/app/Application;"
             if method1 in content:
@@ -505,7 +522,7 @@ class FrameworkTasks(FrameworkModifierBase):
                     )
 
         # Hook AndroidKeyStoreSpi
-        keystore_smali = self._find_file(work_dir, "AndroidKeyStoreSpi.smali")
+        keystore_smali = self._find_cached(work_dir, "AndroidKeyStoreSpi.smali")
         if keystore_smali:
             self.logger.info("Hooking AndroidKeyStoreSpi...")
             self._run_smalikit(
@@ -518,10 +535,10 @@ class FrameworkTasks(FrameworkModifierBase):
             )
 
         # Hook KeyStore2
-        keystore2_smali = self._find_file(work_dir, "KeyStore2.smali")
+        keystore2_smali = self._find_cached(work_dir, "KeyStore2.smali")
         if keystore2_smali:
             self.logger.info("Hooking KeyStore2...")
-            content = keystore2_smali.read_text(encoding="utf-8")
+            content = self._read_smali(keystore2_smali)
 
             delete_key_name = "deleteKey"
             reg = (
@@ -553,10 +570,10 @@ class FrameworkTasks(FrameworkModifierBase):
             )
 
         # Hook KeyStoreSecurityLevel
-        keystore_lvl_smali = self._find_file(work_dir, "KeyStoreSecurityLevel.smali")
+        keystore_lvl_smali = self._find_cached(work_dir, "KeyStoreSecurityLevel.smali")
         if keystore_lvl_smali:
             self.logger.info("Hooking KeyStoreSecurityLevel...")
-            content = keystore_lvl_smali.read_text(encoding="utf-8")
+            content = self._read_smali(keystore_lvl_smali)
             gen_key_name = "generateKey"
 
             method_pattern = re.compile(
@@ -596,7 +613,7 @@ class FrameworkTasks(FrameworkModifierBase):
             )
 
         # Hook ApplicationPackageManager
-        app_pm_smali = self._find_file(work_dir, "ApplicationPackageManager.smali")
+        app_pm_smali = self._find_cached(work_dir, "ApplicationPackageManager.smali")
         if app_pm_smali:
             self.logger.info("Hooking ApplicationPackageManager...")
             method_sig = "hasSystemFeature(Ljava/lang/String;I)Z"
@@ -631,28 +648,34 @@ class FrameworkTasks(FrameworkModifierBase):
 
     def _integrate_custom_platform_key(self, work_dir: Path) -> None:
         """Inject custom platform key check into ExtraPackageManager."""
-        epm_smali = self._find_file(work_dir, "ExtraPackageManager.smali")
+        epm_smali = self._find_cached(work_dir, "ExtraPackageManager.smali")
         if not epm_smali:
             return
 
         self.logger.info("Injecting Custom Platform Key Check...")
 
-        hook_code = f"""
-    # [Start] Custom Platform Key Check
-    const/4 v2, 0x1
-    new-array v2, v2, [Landroid/content/pm/Signature;
-    new-instance v3, Landroid/content/pm/Signature;
-    const-string v4, "{MY_PLATFORM_KEY}"
-    invoke-direct {{v3, v4}}, Landroid/content/pm/Signature;-><init>(Ljava/lang/String;)V
-    const/4 v4, 0x0
-    aput-object v3, v2, v4
-    invoke-static {{p0, v2}}, Lmiui/content/pm/ExtraPackageManager;->compareSignatures([Landroid/content/pm/Signature;[Landroid/content/pm/Signature;)I
-    move-result v2
-    if-eqz v2, :cond_custom_skip
-    const/4 v2, 0x1
-    return v2
-    :cond_custom_skip
-    # [End]"""
+        # Build the Signature once in <clinit> and keep it in a static field
+        content = self._read_smali(epm_smali)
+        if PLATFORM_SIG_FIELD not in content:
+            content = content.replace("\n.method ", f"\n{PLATFORM_SIG_FIELD}\n\n.method ", 1)
+            self._write_smali(epm_smali, content)
+
+        if "constructor <clinit>()V" in content:
+            self._run_smalikit(
+                file_path=str(epm_smali),
+                method="<clinit>()V",
+                regex_replace=(r"\.locals\s+[01](?=\s)", ".locals 2"),
+            )
+            self._run_smalikit(
+                file_path=str(epm_smali),
+                method="<clinit>()V",
+                insert_line=["2", PLATFORM_SIG_INIT],
+            )
+        else:
+            self._run_smalikit(
+                file_path=str(epm_smali),
+                append_method=("<clinit>()V", PLATFORM_SIG_CLINIT),
+            )
 
         self._run_smalikit(
             file_path=str(epm_smali),
@@ -662,7 +685,7 @@ class FrameworkTasks(FrameworkModifierBase):
         self._run_smalikit(
             file_path=str(epm_smali),
             method="isTrustedPlatformSignature([Landroid/content/pm/Signature;)Z",
-            insert_line=["2", hook_code],
+            insert_line=["2", PLATFORM_KEY_CHECK],
         )
 
     def _inject_xeu_toolbox(self) -> None:
@@ -2,10 +2,17 @@
 
 Fixes AOD and under-display fingerprint issues for older Android versions.
 """
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from src.core.modifiers.plugins.apk.base import ApkModifierPlugin, ApkModifierRegistry
+from src.utils.fastio import iter_files
+
+_DOZE_KEY = b"config_dozeComponent"
+_DOZE_PATTERN = re.compile(r'(<string\s+name="config_dozeComponent">)[^<]*')
+_DOZE_REPLACEMENT = r"\1com.android.systemui/com.android.keyguard.doze.MiuiDozeService"
 
 
 @ApkModifierRegistry.register
@@ -40,25 +47,27 @@ class DevicesOverlayModifier(ApkModifierPlugin):
         """Apply AOD and fingerprint fixes."""
         self.logger.info("Processing DevicesAndroidOverlay.apk...")
         self.logger.info("Fixing AOD and under-display fingerprint issues...")
-        
-        # Pattern to match and replace
-        pattern = re.compile(r'(<string\s+name="config_dozeComponent">)[^<]*')
-        replacement = r'\1com.android.systemui/com.android.keyguard.doze.MiuiDozeService'
-        
-        modified_count = 0
-        
-        for xml_file in work_dir.rglob("*.xml"):
-            try:
-                content = xml_file.read_text(encoding='utf-8', errors='ignore')
-                
-                if pattern.search(content):
-                    new_content = pattern.sub(replacement, content)
-                    
-                    if new_content != content:
-                        xml_file.write_text(new_content, encoding='utf-8')
-                        self.logger.debug(f"Patched {xml_file.name}")
-                        modified_count += 1
-            except Exception as e:
-                self.logger.warning(f"Failed to patch {xml_file}: {e}")
-        
+
+        xml_files = [Path(p) for p in iter_files(work_dir, lambda name: name.endswith(".xml"))]
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+            modified_count = sum(pool.map(self._patch_xml, xml_files))
+
         self.logger.info(f"Modified {modified_count} XML file(s)")
+
+    def _patch_xml(self, xml_file: Path) -> bool:
+        """Point config_dozeComponent at MiuiDozeService; returns True if the file changed."""
+        try:
+            data = xml_file.read_bytes()
+            # Nearly every resource file lacks the key; skip those before decoding
+            if _DOZE_KEY not in data:
+                return False
+
+            content = data.decode("utf-8", errors="ignore")
+            new_content = _DOZE_PATTERN.sub(_DOZE_REPLACEMENT, content)
+            if new_content != content:
+                xml_file.write_text(new_content, encoding="utf-8")
+                self.logger.debug(f"Patched {xml_file.name}")
+                return True
+        except Exception as e:
+            self.logger.warning(f"Failed to patch {xml_file}: {e}")
+        return False
@@ -24,12 +24,12 @@ class FileReplacementPlugin(ModifierPlugin):
         super().__init__(context, **kwargs)
         from src.core.conditions import ConditionEvaluator
         from src.core.config_merger import ConfigMerger
-        from src.utils.shell import ShellRunner
+        from src.utils.shell import default_runner
 
         self.merger = ConfigMerger(self.logger)
         self.evaluator = ConditionEvaluator()
         self.downloader = AssetDownloader()
-        self.shell = ShellRunner()
+        self.shell = default_runner()
 
     def modify(self) -> bool:
         """Execute file replacements."""
@@ -169,14 +169,16 @@ class FileReplacementPlugin(ModifierPlugin):
             self.logger.warning(f"HexPatch target not found: {target_val}")
             return
 
+        patches = [
+            (bytes.fromhex(patch["old"]), bytes.fromhex(patch["new"]))
+            for patch in rule.get("patches", [])
+        ]
+
         for target_file in target_files:
             content = target_file.read_bytes()
             modified = False
 
-            for patch in rule.get("patches", []):
-                old_bytes = bytes.fromhex(patch["old"])
-                new_bytes = bytes.fromhex(patch["new"])
-
+            for old_bytes, new_bytes in patches:
                 if old_bytes in content:
                     content = content.replace(old_bytes, new_bytes)
                     modified = True
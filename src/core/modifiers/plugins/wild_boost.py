@@ -6,12 +6,33 @@ This plugin installs and configures wild_boost performance modules.
 import re
 import shutil
 import tempfile
-import zipfile
 from pathlib import Path
 from typing import List
 
 from src.core.modifiers.plugin_system import ModifierPlugin, ModifierRegistry
 from src.utils.download import AssetDownloader
+from src.utils.fastio import extract_zip, fast_copy
+from src.utils.shell import default_runner
+
+# Bundled wild_boost_<kmi>.zip packages
+_WILD_BOOST_DIR = Path("devices/common")
+
+# KMI string in kernel banners, e.g. "5.10.101-android12-9", "5.15.78-android14-11"
+_KMI_RE = re.compile(r"(?:^|\s)(\d+\.\d+)\S*(android\d+)")
+
+# libmigui.so property-name spoofs, decoded once at import
+_LIBMIGUI_PATCHES = tuple(
+    (bytes.fromhex(old), bytes.fromhex(new))
+    for old, new in (
+        # ro.product.product.name -> ro.product.spoofed.name
+        (
+            "726F2E70726F647563742E70726F647563742E6E616D65",
+            "726F2E70726F647563742E73706F6F6665642E6E616D65",
+        ),
+        # ro.product.device -> ro.spoofed.device
+        ("726F2E70726F647563742E646576696365", "726F2E73706F6F6665642E646576696365"),
+    )
+)
 
 
 @ModifierRegistry.register
@@ -33,9 +54,7 @@ class WildBoostPlugin(ModifierPlugin):
 
     def modify(self) -> bool:
         """Execute wild_boost installation."""
-        from src.utils.shell import ShellRunner
-
-        self.shell = ShellRunner()
+        self.shell = default_runner()
 
         self.logger.info("Wild Boost is enabled...")
 
@@ -71,15 +90,13 @@ class WildBoostPlugin(ModifierPlugin):
 
     def _analyze_kmi(self, boot_img: Path) -> str:
         """Analyze kernel image to extract KMI version (e.g., android14-5.15)."""
-        from src.utils.shell import ShellRunner
-
         # Ensure shell is initialized
         if self.shell is None:
-            self.shell = ShellRunner()
+            self.shell = default_runner()
 
         with tempfile.TemporaryDirectory(prefix="ksu_kmi_") as tmp:
             tmp_path = Path(tmp)
-            shutil.copy(boot_img, tmp_path / "boot.img")
+            fast_copy(boot_img, tmp_path / "boot.img")
 
             try:
                 self.shell.run([str(self.ctx.tools.magiskboot), "unpack", "boot.img"], cwd=tmp_path)
@@ -105,12 +122,9 @@ class WildBoostPlugin(ModifierPlugin):
                             strings.append("".join(current))
                         current = []
 
-                # Pattern for KMI detection
-                # Examples: "5.10.101-android12-9", "5.15.78-android14-11"
-                pattern = re.compile(r"(?:^|\s)(\d+\.\d+)\S*(android\d+)")
                 for s in strings:
                     if "Linux version" in s or "android" in s:
-                        match = pattern.search(s)
+                        match = _KMI_RE.search(s)
                         if match:
                             # Return in standard KMI format: android14-5.15
                             return f"{match.group(2)}-{match.group(1)}"
@@ -132,7 +146,7 @@ class WildBoostPlugin(ModifierPlugin):
             main_version = version_match.group(1)
 
         # Determine search paths
-        zip_dir = custom_source.parent if custom_source else Path("devices/common")
+        zip_dir = custom_source.parent if custom_source else _WILD_BOOST_DIR
         base_name = custom_source.stem if custom_source else "wild_boost"
 
         # Multi-level matching strategy
@@ -159,8 +173,7 @@ class WildBoostPlugin(ModifierPlugin):
         with tempfile.TemporaryDirectory(prefix="wild_boost_") as tmp_dir:
             tmp_path = Path(tmp_dir)
             try:
-                with zipfile.ZipFile(matching_zip, "r") as z:
-                    z.extractall(tmp_path)
+                extract_zip(matching_zip, tmp_path)
             except Exception as e:
                 self.logger.error(f"Failed to extract wild_boost zip: {e}")
                 return False
@@ -192,24 +205,24 @@ class WildBoostPlugin(ModifierPlugin):
             self.logger.error("vendor_boot.img not found.")
             return False
 
+        magiskboot = str(self.ctx.tools.magiskboot)
+
         # Create temp directory for unpacking
         work_dir = self.ctx.target_dir.parent / "temp" / "vendor_boot_work"
         if work_dir.exists():
             shutil.rmtree(work_dir)
         work_dir.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(vendor_boot_img, work_dir / "vendor_boot.img")
+        fast_copy(vendor_boot_img, work_dir / "vendor_boot.img")
 
         try:
             # Unpack
-            self.shell.run(
-                [str(self.ctx.tools.magiskboot), "unpack", "vendor_boot.img"], cwd=work_dir
-            )
+            self.shell.run([magiskboot, "unpack", "vendor_boot.img"], cwd=work_dir)
             ramdisk_cpio = work_dir / "ramdisk.cpio"
 
             # Decompress
             self.shell.run(
                 [
-                    str(self.ctx.tools.magiskboot),
+                    magiskboot,
                     "decompress",
                     "ramdisk.cpio",
                     "ramdisk.cpio.decomp",
@@ -221,9 +234,7 @@ class WildBoostPlugin(ModifierPlugin):
                 (work_dir / "ramdisk.cpio.decomp").rename(ramdisk_cpio)
 
             # Extract to find paths
-            self.shell.run(
-                [str(self.ctx.tools.magiskboot), "cpio", "ramdisk.cpio", "extract"], cwd=work_dir
-            )
+            self.shell.run([magiskboot, "cpio", "ramdisk.cpio", "extract"], cwd=work_dir)
 
             # Find modules directory
             modules_load_files = list(work_dir.rglob("modules.load*"))
@@ -234,19 +245,14 @@ class WildBoostPlugin(ModifierPlugin):
 
             self.logger.info(f"Modules directory in ramdisk: {modules_dir_rel}")
 
+            # cpio edits are queued and applied in one magiskboot run before repack
+            cpio_cmds: List[str] = []
+
             # 1. Add/Replace modules in CPIO
             for ko_file in ko_files:
                 dest_path = modules_dir_rel / ko_file.name
                 self.logger.info(f"  Adding/Replacing: {dest_path}")
-                self.shell.run(
-                    [
-                        str(self.ctx.tools.magiskboot),
-                        "cpio",
-                        "ramdisk.cpio",
-                        f"add 0644 {dest_path} {ko_file}",
-                    ],
-                    cwd=work_dir,
-                )
+                cpio_cmds.append(f"add 0644 {dest_path} {ko_file}")
 
             # 2. Update modules.load*
             for load_file in modules_load_files:
@@ -264,15 +270,7 @@ class WildBoostPlugin(ModifierPlugin):
                 if modified:
                     self.logger.info(f"  Updating load file: {load_rel}")
                     load_file.write_text("\n".join(lines) + "\n")
-                    self.shell.run(
-                        [
-                            str(self.ctx.tools.magiskboot),
-                            "cpio",
-                            "ramdisk.cpio",
-                            f"add 0644 {load_rel} {load_file}",
-                        ],
-                        cwd=work_dir,
-                    )
+                    cpio_cmds.append(f"add 0644 {load_rel} {load_file}")
 
             # 3. Update modules.dep
             dep_file = work_dir / modules_dir_rel / "modules.dep"
@@ -348,25 +346,21 @@ class WildBoostPlugin(ModifierPlugin):
                     new_lines.append(perfmgr_dep_line)
 
                 dep_file.write_text("\n".join(new_lines) + "\n")
+                cpio_cmds.append(f"add 0644 {dep_file.relative_to(work_dir)} {dep_file}")
+
+            if cpio_cmds:
                 self.shell.run(
-                    [
-                        str(self.ctx.tools.magiskboot),
-                        "cpio",
-                        "ramdisk.cpio",
-                        f"add 0644 {dep_file.relative_to(work_dir)} {dep_file}",
-                    ],
+                    [magiskboot, "cpio", "ramdisk.cpio", *cpio_cmds],
                     cwd=work_dir,
                 )
 
             # 4. Repack
             self.logger.info("Repacking vendor_boot.img...")
-            self.shell.run(
-                [str(self.ctx.tools.magiskboot), "repack", "vendor_boot.img"], cwd=work_dir
-            )
+            self.shell.run([magiskboot, "repack", "vendor_boot.img"], cwd=work_dir)
 
             new_img = work_dir / "new-boot.img"
             if new_img.exists():
-                shutil.copy2(new_img, vendor_boot_img)
+                fast_copy(new_img, vendor_boot_img)
                 self.logger.info("vendor_boot.img updated successfully.")
             else:
                 self.logger.error("Failed to repack vendor_boot.img - no output file found.")
@@ -396,26 +390,24 @@ class WildBoostPlugin(ModifierPlugin):
 
             # 2. Update modules.load
             modules_load = target_dir / "modules.load"
-            if modules_load.exists():
-                content = modules_load.read_text(encoding="utf-8", errors="ignore")
-                lines = content.splitlines()
-                modified = False
-                for ko_file in ko_files:
-                    if ko_file.name not in content:
-                        lines.append(ko_file.name)
-                        modified = True
-                if modified:
-                    modules_load.write_text("\n".join(lines) + "\n", encoding="utf-8")
-            else:
-                modules_load.write_text(
-                    "\n".join([f.name for f in ko_files]) + "\n", encoding="utf-8"
-                )
+            # a+ creates the file if needed and appends only the missing entries
+            with open(modules_load, "a+", encoding="utf-8", errors="ignore") as f:
+                f.seek(0)
+                content = f.read()
+                missing = [ko.name for ko in ko_files if ko.name not in content]
+                if missing:
+                    lead = "\n" if content and not content.endswith("\n") else ""
+                    f.write(lead + "\n".join(missing) + "\n")
 
             # 3. Update modules.dep
             modules_dep = target_dir / "modules.dep"
             dep_prefix = "/vendor/lib/modules/"
-            if modules_dep.exists():
+            try:
                 content = modules_dep.read_text(encoding="utf-8", errors="ignore")
+            except FileNotFoundError:
+                content = None
+
+            if content is not None:
                 lines = content.splitlines()
 
                 perfmgr_dep = f"{dep_prefix}perfmgr.ko: {dep_prefix}qcom-dcvs.ko {dep_prefix}dcvs_fp.ko {dep_prefix}qcom_rpmh.ko {dep_prefix}cmd-db.ko {dep_prefix}qcom_ipc_logging.ko {dep_prefix}minidump.ko {dep_prefix}smem.ko {dep_prefix}sched-walt.ko {dep_prefix}qcom-cpufreq-hw.ko {dep_prefix}metis.ko {dep_prefix}mi_schedule.ko"
@@ -454,26 +446,15 @@ class WildBoostPlugin(ModifierPlugin):
             self.logger.debug("libmigui.so not found, HexPatch skipped.")
             return False
 
-        patches = [
-            {
-                "old": bytes.fromhex("726F2E70726F647563742E70726F647563742E6E616D65"),
-                "new": bytes.fromhex("726F2E70726F647563742E73706F6F6665642E6E616D65"),
-            },
-            {
-                "old": bytes.fromhex("726F2E70726F647563742E646576696365"),
-                "new": bytes.fromhex("726F2E73706F6F6665642E646576696365"),
-            },
-        ]
-
         patched_count = 0
         for libmigui in libmigui_files:
             try:
                 content = libmigui.read_bytes()
                 modified = False
 
-                for patch in patches:
-                    if patch["old"] in content:
-                        content = content.replace(patch["old"], patch["new"])
+                for old, new in _LIBMIGUI_PATCHES:
+                    if old in content:
+                        content = content.replace(old, new)
                         modified = True
 
                 if modified:
@@ -490,16 +471,13 @@ class WildBoostPlugin(ModifierPlugin):
         prop_file = self.ctx.target_dir / "mi_ext" / "etc" / "build.prop"
         prop_file.parent.mkdir(parents=True, exist_ok=True)
 
-        content = ""
-        lines = []
-        if prop_file.exists():
-            content = prop_file.read_text(encoding="utf-8", errors="ignore")
-            lines = content.splitlines()
-
-        if "persist.sys.feas.enable=true" in content:
-            self.logger.info("persist.sys.feas.enable=true already exists.")
-            return
+        with open(prop_file, "a+", encoding="utf-8", errors="ignore") as f:
+            f.seek(0)
+            content = f.read()
+            if "persist.sys.feas.enable=true" in content:
+                self.logger.info("persist.sys.feas.enable=true already exists.")
+                return
 
-        lines.append("persist.sys.feas.enable=true")
-        prop_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            lead = "\n" if content and not content.endswith("\n") else ""
+            f.write(f"{lead}persist.sys.feas.enable=true\n")
         self.logger.info("Added persist.sys.feas.enable=true to mi_ext/build.prop")
@@ -1,9 +1,42 @@
 """ROM-level modifications coordinating all modification phases."""
 
+from functools import lru_cache
 from pathlib import Path
 
 from src.core.modifiers.base_modifier import BaseModifier
 
+# Port OS version names that take the common OS3 overrides
+_OS3_PREFIXES = ("OS3",)
+_COMMON_OS3_OVERRIDE_DIR = Path("devices/common/override/os3")
+
+# Exact (case-insensitive) names removed by _clean_bloatware; the syncer
+# resolves each through its name index, so no substring scan is involved
+_DEBLOAT_RULES = tuple(
+    {"mode": "delete", "target": item}
+    for item in (
+        "MSA",
+        "AnalyticsCore",
+        "MiuiDaemon",
+        "MiuiBugReport",
+        "MiBrowserGlobal",
+        "MiDrop",
+        "XiaomiVip",
+        "libbugreport.so",
+    )
+)
+
+
+@lru_cache(maxsize=1024)
+def _dir_exists(path: str) -> bool:
+    """Memoized is_dir for override sources, which are read-only during a run."""
+    return Path(path).is_dir()
+
+
+@lru_cache(maxsize=256)
+def _override_dir(code: str, name: str) -> Path:
+    """Per-device override directory, e.g. devices/<code>/override/<name>."""
+    return Path("devices") / code / "override" / name
+
 
 class RomModifier(BaseModifier):
     """Handles overall ROM modification coordination."""
@@ -18,27 +51,18 @@ class RomModifier(BaseModifier):
         """Execute all ROM modification phases."""
         self.logger.info("=== Starting ROM Modification Phase ===")
 
-        self._sync_and_patch_components()
-        self._apply_overrides()
+        try:
+            self._sync_and_patch_components()
+            self._apply_overrides()
+        finally:
+            _dir_exists.cache_clear()
 
         self.logger.info("=== Modification Phase Completed ===")
 
     def _clean_bloatware(self):
         """Remove bloatware from target ROM."""
         self.logger.info("Step 1: Cleaning Bloatware...")
-        debloat_list = [
-            "MSA",
-            "AnalyticsCore",
-            "MiuiDaemon",
-            "MiuiBugReport",
-            "MiBrowserGlobal",
-            "MiDrop",
-            "XiaomiVip",
-            "libbugreport.so",
-        ]
-        clean_rules = [{"mode": "delete", "target": item} for item in debloat_list]
-
-        self.ctx.syncer.execute_rules(None, self.target_rom_img, clean_rules)
+        self.ctx.syncer.execute_rules(None, self.target_rom_img, list(_DEBLOAT_RULES))
 
     def _sync_and_patch_components(self):
         """Sync stock components and apply patches."""
@@ -52,22 +76,22 @@ class RomModifier(BaseModifier):
         self._apply_common_overrides()
 
         # Apply device-specific general overrides first (if exists)
-        general_override_dir = Path(f"devices/{self.ctx.stock_rom_code}/override/general")
-        if general_override_dir.exists():
+        general_override_dir = _override_dir(self.ctx.stock_rom_code, "general")
+        if _dir_exists(str(general_override_dir)):
             self.logger.info(f"Applying general overrides from {general_override_dir}...")
             self.ctx.syncer.apply_override(general_override_dir, self.target_rom_img)
 
         # Apply EU-specific overrides for EU ROMs (if exists)
         is_eu_rom = getattr(self.ctx, "is_port_eu_rom", False)
         if is_eu_rom:
-            eu_override_dir = Path(f"devices/{self.ctx.stock_rom_code}/override/eu")
-            if eu_override_dir.exists():
+            eu_override_dir = _override_dir(self.ctx.stock_rom_code, "eu")
+            if _dir_exists(str(eu_override_dir)):
                 self.logger.info(f"Applying EU-specific overrides from {eu_override_dir}...")
                 self.ctx.syncer.apply_override(eu_override_dir, self.target_rom_img)
 
         # Apply version-specific overrides (higher priority)
-        version_override_dir = Path(
-            f"devices/{self.ctx.stock_rom_code}/override/{self.ctx.port_android_version}"
+        version_override_dir = _override_dir(
+            self.ctx.stock_rom_code, str(self.ctx.port_android_version)
         )
         self.ctx.syncer.apply_override(version_override_dir, self.target_rom_img)
 
@@ -86,10 +110,10 @@ class RomModifier(BaseModifier):
         os_version_name = self.ctx.port.get_prop("ro.mi.os.version.name", "")
         self.logger.info(f"Checking for common overrides. Port OS Version: {os_version_name}")
 
-        if os_version_name.startswith("OS3"):
+        if os_version_name.startswith(_OS3_PREFIXES):
             self.logger.info("Detected HyperOS 3.0+, applying common OS3 fixes...")
-            common_os3_dir = Path("devices/common/override/os3")
-            if common_os3_dir.exists():
+            common_os3_dir = _COMMON_OS3_OVERRIDE_DIR
+            if _dir_exists(str(common_os3_dir)):
                 self.ctx.syncer.apply_override(common_os3_dir, self.target_rom_img)
             else:
                 self.logger.warning(f"Common OS3 override directory not found at {common_os3_dir}")
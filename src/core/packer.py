@@ -5,17 +5,55 @@ import logging
 import os
 import re
 import shutil
+import struct
 import subprocess
+import threading
 import zipfile
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, cast
 
 from src.utils.contextpatch import ContextPatcher
+from src.utils.fastio import fast_move, parallel_copy
 from src.utils.fspatch import patch_fs_config
-from src.utils.shell import ShellRunner
+from src.utils.procpool import logging_process_pool
+from src.utils.shell import ShellRunner, default_runner
+
+try:
+    import zstandard
+except ImportError:  # optional: fall back to the zstd CLI
+    zstandard = None
 
 AVB_DEFAULT_ALGORITHM = "SHA256_RSA4096"
+# Built-in super partition sizes by device codename
+DEVICE_SUPER_SIZES: Dict[str, int] = {
+    device: size
+    for size, devices in (
+        (9663676416, ("FUXI", "NUWA", "ISHTAR", "MARBLE", "SOCRATES", "BABYLON")),
+        (9122611200, ("SUNSTONE",)),
+        (11811160064, ("YUDI",)),
+        (13411287040, ("PANDORA", "POPSICLE", "PUDDING", "NEZHA")),
+    )
+    for device in devices
+}
+DEFAULT_SUPER_SIZE = 9126805504
+# mkfs.erofs -z algorithm; lz4hc decompresses on every supported kernel
+DEFAULT_EROFS_COMPRESSION = "lz4hc,9"
+
+# Firmware images whose partition name differs from the file stem
+FIRMWARE_PARTITION_MAP: Dict[str, str] = {
+    "uefi_sec.mbn": "uefisecapp",
+    "qupv3fw.elf": "qupfw",
+    "NON-HLOS.bin": "modem",
+    "km4.mbn": "keymaster",
+    "BTFM.bin": "bluetooth",
+    "dspso.bin": "dsp",
+}
+
+# "_a"/"_b" slot suffixes stripped from flash scripts on A-only devices
+_AB_SLOT_RE = re.compile(r"_[ab]")
+# Free blocks tolerated after resize2fs -M before an ext4 image is regenerated
+EXT4_MAX_SLACK_BLOCKS = 256
 AOSP_AVB_PARTITIONS = {
     "boot",
     "init_boot",
@@ -40,6 +78,18 @@ def _append_unique(items: List[str], value: str) -> None:
         items.append(value)
 
 
+def _file_md5(path: Path) -> str:
+    """MD5 hex digest of a file, streamed so multi-GB zips are never held in memory."""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            hexdigest: str = hashlib.file_digest(f, "md5").hexdigest()
+            return hexdigest
+        digest = hashlib.md5()
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
 def parse_avbtool_info_output(output: str) -> Dict[str, Any]:
     """Parse `avbtool info_image` output into a structured dictionary."""
     result: Dict[str, Any] = {
@@ -160,6 +210,34 @@ def build_rom_filename_device_tag(ctx: Any) -> str:
     return device
 
 
+def run_patch_tools(
+    src_dir: Path,
+    fs_config: Path,
+    file_contexts: Path,
+    selinux_patcher: Optional[ContextPatcher] = None,
+) -> None:
+    """Run fspatch and contextpatch over one partition tree.
+
+    Module-level so Repacker.pack_all can run it in a worker process.
+    """
+    logger = logging.getLogger("Packer")
+    if fs_config.exists():
+        try:
+            patch_fs_config(src_dir, fs_config)
+        except OSError as e:
+            logger.error(f"Error patching fs_config: {e}")
+    else:
+        logger.warning(f"fs_config not found for {src_dir.name}, skipping fspatch.")
+
+    if file_contexts.exists():
+        try:
+            (selinux_patcher or ContextPatcher()).patch(src_dir, file_contexts)
+        except OSError as e:
+            logger.error(f"Error patching file_contexts: {e}")
+    else:
+        logger.warning(f"file_contexts not found for {src_dir.name}, skipping contextpatch.")
+
+
 class Repacker:
     def __init__(self, context: Any):
         """
@@ -167,7 +245,7 @@ class Repacker:
         """
         self.ctx = context
         self.logger: logging.Logger = logging.getLogger("Packer")
-        self.shell: ShellRunner = ShellRunner()
+        self.shell: ShellRunner = default_runner()
 
         self.bin_dir: Path = Path("bin").resolve()
         self.selinux_patcher: ContextPatcher = ContextPatcher()
@@ -179,6 +257,12 @@ class Repacker:
         self.ota_tools_dir: Path = Path("otatools").resolve()
         self._avb_partition_size: Dict[str, int] = {}
         self._build_prop_cache: Dict[str, Dict[str, str]] = {}
+        self._ext4_size_cache: Optional[Dict[str, Dict[str, int]]] = None
+        self._ext4_size_lock = threading.Lock()
+        self._super_size: Optional[int] = None
+        self._erofs_workers_opt: Optional[bool] = None
+        self._erofs_probe_lock = threading.Lock()
+        self._repack_images_cache: Optional[List[Path]] = None
 
     def _avb_env(self) -> Dict[str, str]:
         env = os.environ.copy()
@@ -219,10 +303,11 @@ class Repacker:
         try:
             for raw in path.read_text(encoding="utf-8", errors="ignore").splitlines():
                 line = raw.strip()
-                if not line or line.startswith("#") or "=" not in line:
+                if not line or line[0] == "#":
                     continue
-                k, v = line.split("=", 1)
-                props[k.strip()] = v.strip()
+                k, sep, v = line.partition("=")
+                if sep:
+                    props[k.strip()] = v.strip()
         except OSError:
             return {}
         return props
@@ -331,11 +416,22 @@ class Repacker:
             args.extend(["--prop", f"{prop_prefix}.security_patch:{security_patch}"])
         return args
 
-    def pack_all(self, pack_type: str = "EROFS", is_rw: bool = False) -> None:
+    def pack_all(
+        self,
+        pack_type: str = "EROFS",
+        is_rw: bool = False,
+        compression: str = DEFAULT_EROFS_COMPRESSION,
+    ) -> None:
         """
         Pack all partitions under target directory (parallel optimization)
+
+        fs_config/file_contexts patching is pure Python and runs in a spawned
+        process pool sized to the CPU count; each partition's mkfs/e2fsdroid step is
+        handed to a separate thread pool as soon as its patch finishes, with
+        the cores split between concurrent mkfs.erofs compressors.
         :param pack_type: "EXT" (ext4) or "EROFS"
         :param is_rw: Read-write mode (only valid for EXT4)
+        :param compression: mkfs.erofs -z algorithm, e.g. "zstd,19" (EROFS only)
         """
         self.logger.info(f"Starting repack with format: {pack_type}")
 
@@ -344,13 +440,42 @@ class Repacker:
             if item.is_dir() and item.name not in ["config", "repack_images"]:
                 partitions.append(item.name)
 
-        max_workers: int = 4
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = []
+        if not partitions:
+            return
+
+        patch_workers: int = min(os.cpu_count() or 1, len(partitions))
+        pack_workers: int = min(16, len(partitions))
+        erofs_workers: int = max(1, (os.cpu_count() or 1) // pack_workers)
+        with (
+            logging_process_pool(patch_workers) as cpu_pool,
+            concurrent.futures.ThreadPoolExecutor(max_workers=pack_workers) as io_pool,
+        ):
+            patch_futures = {}
             for part_name in partitions:
-                futures.append(executor.submit(self._pack_partition, part_name, pack_type, is_rw))
+                self.logger.info(f"Packing [{part_name}] as {pack_type}...")
+                src_dir, _, fs_config, file_contexts = self._partition_paths(part_name)
+                future = cpu_pool.submit(run_patch_tools, src_dir, fs_config, file_contexts)
+                patch_futures[future] = part_name
 
-            for future in concurrent.futures.as_completed(futures):
+            pack_futures = []
+            for future in concurrent.futures.as_completed(patch_futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"Partition patching failed for {patch_futures[future]}: {e}")
+                    raise
+                pack_futures.append(
+                    io_pool.submit(
+                        self._build_image,
+                        patch_futures[future],
+                        pack_type,
+                        is_rw,
+                        compression=compression,
+                        workers=erofs_workers,
+                    )
+                )
+
+            for future in concurrent.futures.as_completed(pack_futures):
                 try:
                     future.result()
                 except (concurrent.futures.CancelledError, concurrent.futures.TimeoutError) as e:
@@ -360,47 +485,63 @@ class Repacker:
                     self.logger.error(f"Partition packing failed: {e}")
                     raise
 
+    def _partition_paths(self, part_name: str) -> Tuple[Path, Path, Path, Path]:
+        """Return (src_dir, img_output, fs_config, file_contexts) for a partition."""
+        return (
+            self.ctx.target_dir / part_name,
+            self.ctx.target_dir / f"{part_name}.img",
+            self.ctx.target_config_dir / f"{part_name}_fs_config",
+            self.ctx.target_config_dir / f"{part_name}_file_contexts",
+        )
+
     def _pack_partition(self, part_name: str, pack_type: str, is_rw: bool) -> None:
-        src_dir: Path = self.ctx.target_dir / part_name
-        img_output: Path = self.ctx.target_dir / f"{part_name}.img"
-        fs_config: Path = self.ctx.target_config_dir / f"{part_name}_fs_config"
-        file_contexts: Path = self.ctx.target_config_dir / f"{part_name}_file_contexts"
+        src_dir, _, fs_config, file_contexts = self._partition_paths(part_name)
 
         self.logger.info(f"Packing [{part_name}] as {pack_type}...")
         self._run_patch_tools(src_dir, fs_config, file_contexts)
+        self._build_image(part_name, pack_type, is_rw)
+
+    def _build_image(
+        self,
+        part_name: str,
+        pack_type: str,
+        is_rw: bool,
+        compression: str = DEFAULT_EROFS_COMPRESSION,
+        workers: Optional[int] = None,
+    ) -> None:
+        """Build the filesystem image for an already patched partition tree."""
+        src_dir, img_output, fs_config, file_contexts = self._partition_paths(part_name)
 
         if pack_type == "EXT":
             self._pack_ext4(part_name, src_dir, img_output, fs_config, file_contexts, is_rw)
         else:
-            self._pack_erofs(part_name, src_dir, img_output, fs_config, file_contexts)
+            self._pack_erofs(
+                part_name, src_dir, img_output, fs_config, file_contexts, compression, workers
+            )
 
     def _run_patch_tools(self, src_dir: Path, fs_config: Path, file_contexts: Path) -> None:
         """Call patching tools from utils"""
-        if fs_config.exists():
-            try:
-                patch_fs_config(src_dir, fs_config)
-            except OSError as e:
-                self.logger.error(f"Error patching fs_config: {e}")
-        else:
-            self.logger.warning(f"fs_config not found for {src_dir.name}, skipping fspatch.")
-
-        if file_contexts.exists():
-            try:
-                self.selinux_patcher.patch(src_dir, file_contexts)
-            except OSError as e:
-                self.logger.error(f"Error patching file_contexts: {e}")
-        else:
-            self.logger.warning(
-                f"file_contexts not found for {src_dir.name}, skipping contextpatch."
-            )
+        run_patch_tools(src_dir, fs_config, file_contexts, self.selinux_patcher)
 
     def _pack_erofs(
-        self, part_name: str, src_dir: Path, img_output: Path, fs_config: Path, file_contexts: Path
+        self,
+        part_name: str,
+        src_dir: Path,
+        img_output: Path,
+        fs_config: Path,
+        file_contexts: Path,
+        compression: str = DEFAULT_EROFS_COMPRESSION,
+        workers: Optional[int] = None,
     ) -> None:
-        """Pack EROFS image"""
-        cmd: List[str] = [
-            "mkfs.erofs",
-            "-zlz4hc,9",
+        """Pack EROFS image
+
+        workers is passed as --workers (multi-threaded compression) when the
+        installed mkfs.erofs supports it; defaults to every core.
+        """
+        cmd: List[str] = ["mkfs.erofs", f"-z{compression}"]
+        if self._erofs_supports_workers():
+            cmd.append(f"--workers={workers or os.cpu_count() or 1}")
+        cmd += [
             "-T",
             self.fix_timestamp,
             "--mount-point",
@@ -418,6 +559,19 @@ class Repacker:
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Failed to pack {part_name}: {e}")
 
+    def _erofs_supports_workers(self) -> bool:
+        """Whether mkfs.erofs accepts --workers (erofs-utils 1.8+); probed once."""
+        with self._erofs_probe_lock:
+            if self._erofs_workers_opt is None:
+                try:
+                    usage = self.shell.run(
+                        ["mkfs.erofs", "--help"], check=False, capture_output=True
+                    )
+                    self._erofs_workers_opt = "--workers" in f"{usage.stdout}{usage.stderr}"
+                except OSError:
+                    self._erofs_workers_opt = False
+            return self._erofs_workers_opt
+
     def _pack_ext4(
         self,
         part_name: str,
@@ -427,19 +581,13 @@ class Repacker:
         file_contexts: Path,
         is_rw: bool,
     ) -> None:
-        """Pack EXT4 image with size calculation and regeneration"""
-        size_orig: int = self._get_dir_size(src_dir)
+        """Pack EXT4 image with size calculation and regeneration
 
-        if size_orig < 1048576:  # 1MB
-            size: int = 1048576
-        elif size_orig < 104857600:  # 100MB
-            size = int(size_orig * 1.15)
-        elif size_orig < 1073741824:  # 1GB
-            size = int(size_orig * 1.08)
-        else:
-            size = int(size_orig * 1.03)
-
-        size = (size // 4096) * 4096
+        The first image is sized from the image/tree ratio recorded on the
+        previous build when available, which usually makes the regeneration
+        pass unnecessary; otherwise a fixed headroom heuristic is used.
+        """
+        size_orig: int = self._get_dir_size(src_dir)
 
         lost_found: Path = src_dir / "lost+found"
         lost_found.mkdir(exist_ok=True)
@@ -451,16 +599,49 @@ class Repacker:
         except OSError:
             pass
 
-        self._make_ext4_image(
-            part_name, src_dir, img_output, size, inode_count, fs_config, file_contexts, is_rw
-        )
-        self.shell.run(["resize2fs", "-f", "-M", str(img_output)])
+        built = False
+        max_slack_blocks = 0
+        predicted: Optional[int] = self._predict_ext4_size(part_name, size_orig)
+        if predicted:
+            self.logger.info(f"Building {part_name}.img with learned size: {predicted}")
+            built = self._make_ext4_image(
+                part_name,
+                src_dir,
+                img_output,
+                predicted,
+                inode_count,
+                fs_config,
+                file_contexts,
+                is_rw,
+                check=False,
+            )
+            if built:
+                max_slack_blocks = EXT4_MAX_SLACK_BLOCKS
+            else:
+                self.logger.info(f"Learned size too small for {part_name}, using estimate.")
+                img_output.unlink(missing_ok=True)
+
+        if not built:
+            if size_orig < 1048576:  # 1MB
+                size: int = 1048576
+            elif size_orig < 104857600:  # 100MB
+                size = int(size_orig * 1.15)
+            elif size_orig < 1073741824:  # 1GB
+                size = int(size_orig * 1.08)
+            else:
+                size = int(size_orig * 1.03)
+
+            size = (size // 4096) * 4096
+            self._make_ext4_image(
+                part_name, src_dir, img_output, size, inode_count, fs_config, file_contexts, is_rw
+            )
+        self._shrink_ext4(img_output)
 
         if part_name == "mi_ext":
             return
 
         free_blocks: int = self._get_free_blocks(img_output)
-        if free_blocks > 0:
+        if free_blocks > max_slack_blocks:
             free_size: int = free_blocks * 4096
             current_img_size: int = img_output.stat().st_size
             new_size: int = (current_img_size - free_size) // 4096 * 4096
@@ -477,7 +658,58 @@ class Repacker:
                 file_contexts,
                 is_rw,
             )
-            self.shell.run(["resize2fs", "-f", "-M", str(img_output)])
+            self._shrink_ext4(img_output)
+
+        self._record_ext4_size(part_name, size_orig, img_output.stat().st_size)
+
+    def _shrink_ext4(self, img_path: Path) -> None:
+        """resize2fs -M the image, unless its superblock shows no free blocks left.
+
+        A full image is already at its minimum size, so the resize2fs run
+        (which rereads every group descriptor and bitmap) would be a no-op.
+        """
+        if self._read_free_blocks(img_path) == 0:
+            self.logger.debug(f"{img_path.name} has no free blocks, skipping resize2fs")
+            return
+        self.shell.run(["resize2fs", "-f", "-M", str(img_path)])
+
+    def _ext4_size_cache_path(self) -> Path:
+        return self.out_dir / ".ext4_size_cache.json"
+
+    def _load_ext4_size_cache(self) -> Dict[str, Dict[str, int]]:
+        """Load per-partition (tree size, image size) pairs from earlier builds."""
+        if self._ext4_size_cache is None:
+            try:
+                with open(self._ext4_size_cache_path(), "r", encoding="utf-8") as f:
+                    self._ext4_size_cache = json.load(f)
+            except (OSError, ValueError):
+                self._ext4_size_cache = {}
+        return self._ext4_size_cache
+
+    def _predict_ext4_size(self, part_name: str, size_orig: int) -> Optional[int]:
+        """Scale size_orig by the image/tree ratio of the last build, plus one block."""
+        with self._ext4_size_lock:
+            entry = self._load_ext4_size_cache().get(f"{self.ctx.stock_rom_code}/{part_name}")
+        if not entry or entry.get("size_orig", 0) <= 0:
+            return None
+
+        ratio = entry["image_size"] / entry["size_orig"]
+        return -(-int(size_orig * ratio) // 4096) * 4096 + 4096
+
+    def _record_ext4_size(self, part_name: str, size_orig: int, image_size: int) -> None:
+        with self._ext4_size_lock:
+            cache = self._load_ext4_size_cache()
+            cache[f"{self.ctx.stock_rom_code}/{part_name}"] = {
+                "size_orig": size_orig,
+                "image_size": image_size,
+            }
+            try:
+                cache_path = self._ext4_size_cache_path()
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(cache_path, "w", encoding="utf-8") as f:
+                    json.dump(cache, f, indent=2, sort_keys=True)
+            except OSError as e:
+                self.logger.debug(f"Could not save ext4 size cache: {e}")
 
     def _make_ext4_image(
         self,
@@ -489,8 +721,12 @@ class Repacker:
         fs_config: Path,
         file_contexts: Path,
         is_rw: bool,
-    ) -> None:
-        """Execute mke2fs and e2fsdroid"""
+        check: bool = True,
+    ) -> bool:
+        """Execute mke2fs and e2fsdroid
+
+        With check=False a failing tool returns False instead of raising.
+        """
         mkfs_cmd: List[str] = [
             "mke2fs",
             "-O",
@@ -512,7 +748,8 @@ class Repacker:
             str(img_path),
             str(size // 4096),
         ]
-        self.shell.run(mkfs_cmd)
+        if self.shell.run(mkfs_cmd, check=check, capture_output=not check).returncode != 0:
+            return False
 
         e2fs_cmd: List[str] = [
             "e2fsdroid",
@@ -531,31 +768,66 @@ class Repacker:
         ]
         if not is_rw:
             e2fs_cmd.insert(-1, "-s")
-        self.shell.run(e2fs_cmd)
+        rc: int = self.shell.run(e2fs_cmd, check=check, capture_output=not check).returncode
+        return rc == 0
 
     def _get_dir_size(self, path: Path) -> int:
-        """Calculate directory size using du -sb"""
+        """Calculate the apparent size of a directory tree (same total as du -sb).
+
+        Walks with os.scandir so each entry costs one lstat, and counts
+        hard-linked files once.
+        """
+        total: int = 0
+        seen_inodes: set = set()
+        pending: List[str] = [os.fspath(path)]
         try:
-            output: str = subprocess.check_output(["du", "-sb", str(path)], text=True)
-            return int(output.split()[0])
-        except (subprocess.SubprocessError, ValueError, FileNotFoundError) as e:
-            self.logger.warning(f"du command failed, falling back to python: {e}")
-            total: int = 0
-            for p in path.rglob("*"):
-                if p.is_file() and not p.is_symlink():
-                    total += p.stat().st_size
-            return total if total > 0 else 4096
+            total += os.lstat(path).st_size
+        except OSError as e:
+            self.logger.warning(f"Cannot stat {path}: {e}")
+            return 4096
+
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        st = entry.stat(follow_symlinks=False)
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if st.st_nlink > 1 and not is_dir:
+                            inode = (st.st_dev, st.st_ino)
+                            if inode in seen_inodes:
+                                continue
+                            seen_inodes.add(inode)
+                        total += st.st_size
+                        if is_dir:
+                            pending.append(entry.path)
+            except OSError as e:
+                self.logger.warning(f"Error scanning {path} for size: {e}")
+
+        return total if total > 0 else 4096
 
     def _get_free_blocks(self, img_path: Path) -> int:
-        """Parse tune2fs -l output to get Free blocks"""
+        """Read the free block count straight from the ext4 superblock."""
+        return self._read_free_blocks(img_path) or 0
+
+    def _read_free_blocks(self, img_path: Path) -> Optional[int]:
+        """Free block count from the superblock, or None if img_path is not ext4."""
         try:
-            output: str = subprocess.check_output(["tune2fs", "-l", str(img_path)], text=True)
-            for line in output.splitlines():
-                if "Free blocks:" in line:
-                    return int(line.split(":")[1].strip())
-        except (subprocess.SubprocessError, ValueError, FileNotFoundError):
-            return 0
-        return 0
+            with open(img_path, "rb") as f:
+                sb: bytes = os.pread(f.fileno(), 1024, 1024)
+        except OSError:
+            return None
+        if len(sb) < 1024 or struct.unpack_from("<H", sb, 0x38)[0] != 0xEF53:
+            return None
+
+        free_lo: int
+        incompat: int
+        (free_lo,) = struct.unpack_from("<I", sb, 0x0C)
+        (incompat,) = struct.unpack_from("<I", sb, 0x60)
+        if incompat & 0x80:  # INCOMPAT_64BIT
+            free_hi: int
+            (free_hi,) = struct.unpack_from("<I", sb, 0x158)
+            return (free_hi << 32) | free_lo
+        return free_lo
 
     def pack_super_image(self) -> None:
         """Pack super.img for non-payload.bin ROMs"""
@@ -663,13 +935,45 @@ class Repacker:
         self.logger.info("Compressing super.img to super.zst...")
         zst_path: Path = self.ctx.target_dir / "super.zst"
         try:
-            self.shell.run(["zstd", "--rm", str(super_img), "-o", str(zst_path)])
+            self._compress_super(super_img, zst_path)
             self.logger.info("Compressed super.zst generated.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, OSError) as e:
             self.logger.warning(f"zstd compression failed: {e}.")
 
         self._generate_flash_script(zst_path if zst_path.exists() else super_img)
 
+    def _compress_super(self, super_img: Path, zst_path: Path) -> None:
+        """Compress super_img into zst_path on every core and remove the source.
+
+        Uses python-zstandard in-process when it is installed, otherwise the
+        zstd CLI. Both run at zstd's default level.
+        """
+        if zstandard is None:
+            self.shell.run(["zstd", "-T0", "--rm", str(super_img), "-o", str(zst_path)])
+            return
+
+        cctx = zstandard.ZstdCompressor(threads=-1)
+        try:
+            with open(super_img, "rb") as fin, open(zst_path, "wb") as fout:
+                cctx.copy_stream(fin, fout, read_size=4 << 20, write_size=4 << 20)
+        except zstandard.ZstdError as e:
+            # Surface as OSError so callers handle it like a failed zstd CLI run
+            zst_path.unlink(missing_ok=True)
+            raise OSError(f"zstandard compression failed: {e}") from e
+        except BaseException:
+            zst_path.unlink(missing_ok=True)
+            raise
+        super_img.unlink()
+
+    def _repack_images(self) -> List[Path]:
+        """*.img files in repack_images, listed once per Repacker."""
+        if self._repack_images_cache is None:
+            repack_dir: Path = self.ctx.repack_images_dir
+            self._repack_images_cache = (
+                sorted(repack_dir.glob("*.img")) if repack_dir.exists() else []
+            )
+        return self._repack_images_cache
+
     def _generate_flash_script(self, super_image_path: Path) -> None:
         """Generate hybrid flashing scripts (Fastboot + Recovery)"""
         self.logger.info("Generating hybrid flashing scripts...")
@@ -687,15 +991,17 @@ class Repacker:
         meta_inf: Path = out_path / "META-INF/com/google/android"
         meta_inf.mkdir(parents=True, exist_ok=True)
 
-        self.logger.info(f"Copying {super_image_path.name}...")
-        shutil.copy2(super_image_path, out_path / "super.zst")
-
-        if self.ctx.repack_images_dir.exists():
-            for fw in self.ctx.repack_images_dir.glob("*.img"):
-                if fw.name == "boot.img":
-                    shutil.copy2(fw, out_path / "boot.img")
-                else:
-                    shutil.copy2(fw, firmware_update)
+        # The packed super image is not read again after this, so move it
+        # rather than duplicating several GB
+        self.logger.info(f"Moving {super_image_path.name}...")
+        fast_move(super_image_path, out_path / "super.zst")
+        copies: List[Tuple[Path, Path]] = []
+        for fw in self._repack_images():
+            if fw.name == "boot.img":
+                copies.append((fw, out_path / "boot.img"))
+            else:
+                copies.append((fw, firmware_update / fw.name))
+        parallel_copy(copies, drop_cache=True)
 
         flash_template: Path = Path("bin/flash")
         if flash_template.exists():
@@ -713,6 +1019,7 @@ class Repacker:
                 "update-binary": meta_inf / "update-binary",
             }
             (meta_inf / "updater-script").write_text("# dummy\n", encoding="utf-8")
+            fw_parts = self._firmware_partitions(firmware_update)
 
             for src_name, dest_path in files_to_process.items():
                 src_file = flash_template / src_name
@@ -722,11 +1029,11 @@ class Repacker:
                     if "flash_script" in src_name:
                         if not self.ctx.is_ab_device:
                             self._patch_script_for_a_only(dest_path)
-                        self._patch_script_for_firmware(dest_path, firmware_update)
+                        self._patch_script_for_firmware(dest_path, firmware_update, fw_parts)
                     if src_name == "update-binary":
                         if not self.ctx.is_ab_device:
                             self._patch_update_binary_for_a_only(dest_path)
-                        self._patch_update_binary_firmware(dest_path, firmware_update)
+                        self._patch_update_binary_firmware(dest_path, firmware_update, fw_parts)
 
         self.logger.info("Zipping hybrid package...")
         timestamp: str = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -745,7 +1052,7 @@ class Repacker:
                     else:
                         zf.write(file_path, arcname)
 
-        md5: str = hashlib.md5(open(final_zip_path, "rb").read()).hexdigest()[:10]
+        md5: str = _file_md5(final_zip_path)[:10]
         prefix = build_rom_filename_prefix(self.ctx)
         device_tag = build_rom_filename_device_tag(self.ctx)
         renamed_zip_name: str = f"{prefix}{device_tag}_Hybrid_{self.ctx.target_rom_version}_{self.ctx.security_patch}_{md5}_{timestamp}.zip"
@@ -769,7 +1076,7 @@ class Repacker:
     def _patch_script_for_a_only(self, script_path: Path) -> None:
         """Remove _a/_b references for A-only devices (Fastboot)"""
         content: str = script_path.read_text(encoding="utf-8", errors="ignore")
-        content = content.replace("_a", "").replace("_b", "")
+        content = _AB_SLOT_RE.sub("", content)
         new_lines: List[str] = [line for line in content.splitlines() if "_b" not in line]
         script_path.write_text("\n".join(new_lines), encoding="utf-8")
 
@@ -788,32 +1095,36 @@ class Repacker:
         ]
         script_path.write_text("\n".join(new_lines), encoding="utf-8")
 
-    def _patch_update_binary_firmware(self, script_path: Path, firmware_dir: Path) -> None:
-        """Inject firmware flashing commands into update-binary"""
+    def _firmware_partitions(self, firmware_dir: Path) -> Optional[List[Tuple[str, str]]]:
+        """Map firmware-update files to the partitions they are flashed to.
+
+        Returns None when firmware_dir is empty, otherwise (file, partition)
+        pairs with dtbo/cust/boot images left out.
+        """
         fw_files: List[str] = [f.name for f in firmware_dir.glob("*")]
         if not fw_files:
+            return None
+        return [
+            (fw, FIRMWARE_PARTITION_MAP.get(fw) or fw.split(".")[0])
+            for fw in fw_files
+            if not ("dtbo" in fw or "cust" in fw or fw == "boot.img")
+        ]
+
+    def _patch_update_binary_firmware(
+        self,
+        script_path: Path,
+        firmware_dir: Path,
+        fw_parts: Optional[List[Tuple[str, str]]] = None,
+    ) -> None:
+        """Inject firmware flashing commands into update-binary"""
+        if fw_parts is None:
+            fw_parts = self._firmware_partitions(firmware_dir)
+        if fw_parts is None:
             return
 
         content: str = script_path.read_text(encoding="utf-8", errors="ignore")
         insertion: List[str] = []
-        for fw in fw_files:
-            part: str = fw.split(".")[0]
-            if fw == "uefi_sec.mbn":
-                part = "uefisecapp"
-            elif fw == "qupv3fw.elf":
-                part = "qupfw"
-            elif fw == "NON-HLOS.bin":
-                part = "modem"
-            elif fw == "km4.mbn":
-                part = "keymaster"
-            elif fw == "BTFM.bin":
-                part = "bluetooth"
-            elif fw == "dspso.bin":
-                part = "dsp"
-
-            if "dtbo" in fw or "cust" in fw or fw == "boot.img":
-                continue
-
+        for fw, part in fw_parts:
             if self.ctx.is_ab_device:
                 insertion.append(
                     f'package_extract_file "firmware-update/{fw}" "/dev/block/bootdevice/by-name/{part}_a"'
@@ -834,33 +1145,23 @@ class Repacker:
         else:
             self.logger.warning(f"Marker '{marker}' not found in update-binary.")
 
-    def _patch_script_for_firmware(self, script_path: Path, firmware_dir: Path) -> None:
+    def _patch_script_for_firmware(
+        self,
+        script_path: Path,
+        firmware_dir: Path,
+        fw_parts: Optional[List[Tuple[str, str]]] = None,
+    ) -> None:
         """Inject firmware flash commands"""
-        fw_files: List[str] = [f.name for f in firmware_dir.glob("*")]
-        if not fw_files:
+        if fw_parts is None:
+            fw_parts = self._firmware_partitions(firmware_dir)
+        if fw_parts is None:
             return
 
         content: str = script_path.read_text(encoding="utf-8", errors="ignore")
         is_windows: bool = script_path.suffix == ".bat"
         insertion: List[str] = []
 
-        for fw in fw_files:
-            part: str = fw.split(".")[0]
-            if fw == "uefi_sec.mbn":
-                part = "uefisecapp"
-            elif fw == "qupv3fw.elf":
-                part = "qupfw"
-            elif fw == "NON-HLOS.bin":
-                part = "modem"
-            elif fw == "km4.mbn":
-                part = "keymaster"
-            elif fw == "BTFM.bin":
-                part = "bluetooth"
-            elif fw == "dspso.bin":
-                part = "dsp"
-            if "dtbo" in fw or "cust" in fw or fw == "boot.img":
-                continue
-
+        for fw, part in fw_parts:
             if self.ctx.is_ab_device:
                 if is_windows:
                     insertion.append(
@@ -930,7 +1231,12 @@ class Repacker:
         return default_partitions
 
     def _get_super_size(self) -> int:
-        """Get Super partition size."""
+        """Get Super partition size (resolved once per Repacker)."""
+        if self._super_size is None:
+            self._super_size = self._resolve_super_size()
+        return self._super_size
+
+    def _resolve_super_size(self) -> int:
         # 1. Check from device config first
         if hasattr(self.ctx, "device_config"):
             super_size = self.ctx.device_config.get("pack", {}).get("super_size")
@@ -942,8 +1248,6 @@ class Repacker:
         partition_info_path = Path(f"devices/{self.ctx.stock_rom_code}/partition_info.json")
         if partition_info_path.exists():
             try:
-                import json
-
                 with open(partition_info_path, "r") as f:
                     info = json.load(f)
                 super_size = info.get("super_size")
@@ -955,19 +1259,14 @@ class Repacker:
 
         # 3. Fallback to hardcoded map
         device_code: str = self.ctx.stock_rom_code.upper()
-        size_map: Dict[int, List[str]] = {
-            9663676416: ["FUXI", "NUWA", "ISHTAR", "MARBLE", "SOCRATES", "BABYLON"],
-            9122611200: ["SUNSTONE"],
-            11811160064: ["YUDI"],
-            13411287040: ["PANDORA", "POPSICLE", "PUDDING", "NEZHA"],
-        }
-        for size, devices in size_map.items():
-            if device_code in devices:
-                self.logger.info(f"Using super_size from built-in map for {device_code}: {size}")
-                return size
-        default_size = 9126805504
-        self.logger.info(f"Using default super_size fallback for {device_code}: {default_size}")
-        return default_size
+        size = DEVICE_SUPER_SIZES.get(device_code)
+        if size is not None:
+            self.logger.info(f"Using super_size from built-in map for {device_code}: {size}")
+            return size
+        self.logger.info(
+            f"Using default super_size fallback for {device_code}: {DEFAULT_SUPER_SIZE}"
+        )
+        return DEFAULT_SUPER_SIZE
 
     def pack_ota_payload(self) -> None:
         """Pack AOSP OTA payload"""
@@ -984,12 +1283,13 @@ class Repacker:
         for part in pack_partitions:
             (self.product_out / part.upper()).mkdir(exist_ok=True)
 
-        # Copy all partition images
+        # Copy all partition images (repack_images wins over a same-named target image)
+        image_copies: Dict[Path, Path] = {}
         for img in self.ctx.target_dir.glob("*.img"):
-            shutil.copy2(img, self.images_out)
-        if self.ctx.repack_images_dir.exists():
-            for img in self.ctx.repack_images_dir.glob("*.img"):
-                shutil.copy2(img, self.images_out)
+            image_copies[self.images_out / img.name] = img
+        for img in self._repack_images():
+            image_copies[self.images_out / img.name] = img
+        parallel_copy(((src, dst) for dst, src in image_copies.items()), drop_cache=True)
 
         device_custom_dir: Path = Path(f"devices/{self.ctx.stock_rom_code}")
         if device_custom_dir.exists():
@@ -1008,17 +1308,20 @@ class Repacker:
                 shutil.copy2(init_boot, self.images_out / "init_boot.img")
 
         # Keep custom partition AVB footer behavior aligned with stock vbmeta.
-        current_partitions = [
+        image_stems: List[str] = [
             img.stem for img in self.images_out.glob("*.img") if img.stem != "cust"
         ]
+        current_partitions: Optional[List[str]] = image_stems
         if getattr(self.ctx, "enable_custom_avb_chain", False):
             profile = self._collect_stock_avb_profile()
             self._sync_partition_info_from_stock_avb(profile)
-            self._apply_avb_to_custom_images(current_partitions)
-            self._rebuild_vbmeta_images(current_partitions)
+            self._apply_avb_to_custom_images(image_stems)
+            self._rebuild_vbmeta_images(image_stems)
             self._generate_care_map()
+            # The vbmeta rebuild may have added images, so let META rescan
+            current_partitions = None
 
-        self._generate_meta_info()
+        self._generate_meta_info(current_partitions)
         self._copy_build_props()
         if getattr(self.ctx, "enable_custom_avb_chain", False):
             self._verify_avb_images()
@@ -1726,16 +2029,19 @@ class Repacker:
 
         return lines
 
-    def _generate_meta_info(self) -> None:
-        """Generate ab_partitions.txt, dynamic_partitions_info.txt, misc_info.txt"""
+    def _generate_meta_info(self, partition_list: Optional[List[str]] = None) -> None:
+        """Generate ab_partitions.txt, dynamic_partitions_info.txt, misc_info.txt
+
+        :param partition_list: Image stems already in IMAGES; scanned when omitted
+        """
         self.logger.info("Generating META info...")
         self.meta_out.mkdir(parents=True, exist_ok=True)
-        partition_list: List[str] = [
-            img.stem for img in self.images_out.glob("*.img") if img.stem != "cust"
-        ]
+        if partition_list is None:
+            partition_list = [
+                img.stem for img in self.images_out.glob("*.img") if img.stem != "cust"
+            ]
         with open(self.meta_out / "ab_partitions.txt", "w") as f:
-            for p in sorted(partition_list):
-                f.write(f"{p}\n")
+            f.write("".join(f"{p}\n" for p in sorted(partition_list)))
 
         super_size: int = self._get_super_size()
         self.logger.info(
@@ -1864,7 +2170,7 @@ class Repacker:
                 ],
                 env=env,
             )
-            md5: str = hashlib.md5(open(output_zip, "rb").read()).hexdigest()[:10]
+            md5: str = _file_md5(output_zip)[:10]
             prefix = build_rom_filename_prefix(self.ctx)
             device_tag = build_rom_filename_device_tag(self.ctx)
             final_path: Path = (
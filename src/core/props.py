@@ -75,11 +75,11 @@ class PropertyModifier(ModifierPlugin):
         content = file_path.read_text(encoding="utf-8", errors="ignore")
         for raw_line in content.splitlines():
             line = raw_line.strip()
-            if not line or line.startswith("#") or "=" not in line:
+            if not line or line[0] == "#":
                 continue
-            key, value = line.split("=", 1)
+            key, sep, value = line.partition("=")
             key = key.strip()
-            if not key:
+            if not sep or not key:
                 continue
             props[key] = value.strip()
         return props
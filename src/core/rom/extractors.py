@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import functools
 import os
-import shutil
 import sys
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional, Protocol, Tuple, Union
 
+from src.utils.fastio import extract_members, extract_zip
 from src.utils.payload_dumper import PayloadDumperOutput, PayloadDumperRunner
+from src.utils.procpool import logging_process_pool
+from src.utils.sdat2img import run_sdat2img
+from src.utils.shell import default_runner
+
+try:
+    import brotli
+except ImportError:  # optional: fall back to the brotli CLI
+    brotli = None
 
 if TYPE_CHECKING:
     from .package import RomPackage
@@ -37,26 +47,143 @@ def extract_payload(
         package.logger.info(f"[{package.label}] Extracting ALL images (Firmware + Logical) ...")
 
     cmd.append(str(package.path))
-    package.shell.run(cmd)
-
-    # Extract metadata if requested
-    if extract_metadata:
-        package.logger.info(f"[{package.label}] Extracting payload metadata...")
-        try:
-            runner = PayloadDumperRunner(package.path)
-            payload_info = runner.get_full_info()
-            package.logger.info(
-                f"[{package.label}] Detected device: {payload_info.device_code}, "
-                f"Partitions: {len(payload_info.partition_names)}"
-            )
-            return payload_info
-        except Exception as e:
-            package.logger.warning(f"[{package.label}] Failed to extract metadata: {e}")
-            return None
 
+    if not extract_metadata:
+        package.shell.run(cmd)
+        return None
+
+    # --json/--metadata only read the manifest, so query them while the images are dumped
+    package.logger.info(f"[{package.label}] Extracting payload metadata...")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        info_future = pool.submit(PayloadDumperRunner(package.path).get_full_info)
+        package.shell.run(cmd)
+
+    try:
+        payload_info = info_future.result()
+        package.logger.info(
+            f"[{package.label}] Detected device: {payload_info.device_code}, "
+            f"Partitions: {len(payload_info.partition_names)}"
+        )
+        return payload_info
+    except Exception as e:
+        package.logger.warning(f"[{package.label}] Failed to extract metadata: {e}")
+        return None
+
+
+# Compressed bytes fed to the brotli decompressor per call
+_BROTLI_CHUNK = 1024 * 1024
+# Smaller steps when streaming, to bound the decompressed bytes held in memory
+_BROTLI_STREAM_CHUNK = 64 * 1024
+
+
+def _brotli_decompress(br_file: Path, new_dat: Path) -> None:
+    """Decompress br_file into new_dat, in-process when the brotli module is available."""
+    if brotli is None:
+        default_runner().run(["brotli", "-d", "-f", str(br_file), "-o", str(new_dat)])
+        return
+
+    decompressor = brotli.Decompressor()
+    with open(br_file, "rb") as fin, open(new_dat, "wb") as fout:
+        while chunk := fin.read(_BROTLI_CHUNK):
+            fout.write(decompressor.process(chunk))
+    if not decompressor.is_finished():
+        raise ValueError(f"{br_file.name} is truncated")
+
+
+def _decompress_and_convert(
+    br_file: Path, transfer_list: Path, new_dat: Path, output_img: Path
+) -> Tuple[str, Optional[str]]:
+    """Turn one partition's .new.dat.br + .transfer.list into a raw image.
+
+    Module-level so extract_brotli can run it in a worker process. Returns
+    (prefix, error), where error is None on success; the inputs are removed
+    once the image has been written.
+    """
+    prefix = br_file.name.replace(".new.dat.br", "")
+    try:
+        _brotli_decompress(br_file, new_dat)
+    except Exception as e:
+        return prefix, f"Brotli decompression failed for {prefix}: {e}"
+
+    error = _convert_new_dat(prefix, transfer_list, new_dat, output_img)
+    if error:
+        return prefix, error
+
+    for path in (new_dat, br_file, transfer_list):
+        if path.exists():
+            os.remove(path)
+    return prefix, None
+
+
+class _Readable(Protocol):
+    """Anything sdat2img can pull .new.dat bytes from sequentially."""
+
+    def read(self, size: int, /) -> bytes: ...
+
+
+def _convert_new_dat(
+    prefix: str, transfer_list: Path, new_dat: Union[Path, _Readable], output_img: Path
+) -> Optional[str]:
+    """Run sdat2img; returns an error message or None."""
+    try:
+        source = str(new_dat) if isinstance(new_dat, Path) else new_dat
+        if not run_sdat2img(str(transfer_list), source, str(output_img)):
+            return f"sdat2img failed for {prefix}"
+    except Exception as e:
+        return f"sdat2img execution failed: {e}"
     return None
 
 
+class _BrotliReader:
+    """Sequential reader over a brotli stream, decompressing on demand.
+
+    read(n) returns exactly n bytes until the stream ends, which is what
+    sdat2img expects from a .new.dat file.
+    """
+
+    def __init__(self, src: _Readable) -> None:
+        self._src = src
+        self._decompressor = brotli.Decompressor()
+        self._buf = bytearray()
+        self._eof = False
+
+    def read(self, size: int) -> bytes:
+        while len(self._buf) < size and not self._eof:
+            chunk = self._src.read(_BROTLI_STREAM_CHUNK)
+            if chunk:
+                self._buf += self._decompressor.process(chunk)
+            else:
+                self._eof = True
+                if not self._decompressor.is_finished():
+                    raise ValueError("brotli stream is truncated")
+        data = bytes(self._buf[:size])
+        del self._buf[:size]
+        return data
+
+
+def _stream_and_convert(
+    zip_path: Path, member: str, transfer_list: Path, output_img: Path
+) -> Tuple[str, Optional[str]]:
+    """Convert a .new.dat.br member straight from the ROM zip into a raw image.
+
+    The brotli data is decompressed while sdat2img consumes it, so neither
+    the .new.dat.br nor the .new.dat is ever written to disk. Same return
+    convention as _decompress_and_convert.
+    """
+    prefix = member.replace(".new.dat.br", "")
+    try:
+        with zipfile.ZipFile(zip_path, "r") as z, z.open(member) as src:
+            error = _convert_new_dat(prefix, transfer_list, _BrotliReader(src), output_img)
+    except Exception as e:
+        error = f"Brotli decompression failed for {prefix}: {e}"
+    if error:
+        output_img.unlink(missing_ok=True)
+        return prefix, error
+
+    transfer_list.unlink(missing_ok=True)
+    return prefix, None
+
+
 def extract_brotli(
     package: RomPackage,
     partitions: Optional[List[str]],
@@ -68,28 +195,60 @@ def extract_brotli(
         partitions: List of partitions to extract (None = all).
     """
     # 1. Extract zip content
+    part_filter = set(partitions or ())
+    wanted = set()
     with zipfile.ZipFile(package.path, "r") as z:
         for f in z.namelist():
             should_extract = False
+            # Plain string slicing: no Path object per central directory entry
+            name = f.rpartition("/")[2]
 
             # .img handling
             if f.endswith(".img"):
-                part_name = Path(f).stem
-                if not partitions or part_name in partitions:
+                part_name = name[:-4]
+                if not part_filter or part_name in part_filter:
                     should_extract = True
 
             # .br handling
             elif f.endswith(".new.dat.br") or f.endswith(".transfer.list"):
                 # Extract partition name from file name (e.g. system.new.dat.br -> system)
-                part_name = Path(f).name.split(".")[0]
-                if not partitions or part_name in partitions:
+                part_name = name.partition(".")[0]
+                if not part_filter or part_name in part_filter:
                     should_extract = True
 
             if should_extract:
-                package.logger.info(f"Extracting {f}...")
-                z.extract(f, package.images_dir)
+                wanted.add(f)
+
+    # With the brotli module, top-level .new.dat.br members are decompressed
+    # straight out of the zip instead of being extracted first
+    streamed = set()
+    if brotli is not None:
+        streamed = {
+            f
+            for f in wanted
+            if "/" not in f
+            and f.endswith(".new.dat.br")
+            and f.replace(".new.dat.br", ".transfer.list") in wanted
+        }
+    to_extract = wanted - streamed
+    for f in sorted(to_extract):
+        package.logger.info(f"Extracting {f}...")
+    extract_zip(package.path, package.images_dir, select=to_extract.__contains__)
+
+    # 2. Process .br files, one worker process per partition
+    tasks: List[Callable[[], Tuple[str, Optional[str]]]] = []
+    for member in sorted(streamed):
+        prefix = member.replace(".new.dat.br", "")
+        output_img = package.images_dir / f"{prefix}.img"
+        if output_img.exists():
+            package.logger.info(f"[{package.label}] Image {output_img.name} already exists.")
+            continue
+        package.logger.info(f"[{package.label}] Streaming and converting {member}...")
+        transfer_list = package.images_dir / f"{prefix}.transfer.list"
+        tasks.append(
+            functools.partial(_stream_and_convert, package.path, member, transfer_list, output_img)
+        )
 
-    # 2. Process .br files
     for br_file in package.images_dir.glob("*.new.dat.br"):
         prefix = br_file.name.replace(".new.dat.br", "")
 
@@ -105,35 +264,27 @@ def extract_brotli(
             package.logger.warning(f"Transfer list for {prefix} not found, skipping conversion.")
             continue
 
-        # 3. Brotli Decompress
-        package.logger.info(f"[{package.label}] Decompressing {br_file.name}...")
-        try:
-            cmd = ["brotli", "-d", "-f", str(br_file), "-o", str(new_dat)]
-            package.shell.run(cmd)
-        except Exception as e:
-            package.logger.error(f"Brotli decompression failed for {prefix}: {e}")
-            continue
-
-        # 4. sdat2img
-        package.logger.info(f"[{package.label}] Converting {prefix} to raw image...")
-        try:
-            from src.utils.sdat2img import run_sdat2img
+        package.logger.info(f"[{package.label}] Decompressing and converting {br_file.name}...")
+        tasks.append(
+            functools.partial(_decompress_and_convert, br_file, transfer_list, new_dat, output_img)
+        )
 
-            success = run_sdat2img(str(transfer_list), str(new_dat), str(output_img))
+    if not tasks:
+        return
 
-            if not success:
-                package.logger.error(f"sdat2img failed for {prefix}")
+    workers = min(len(tasks), os.cpu_count() or 1)
+    with logging_process_pool(workers) as pool:
+        futures = [pool.submit(task) for task in tasks]
+        for future in futures:
+            try:
+                prefix, error = future.result()
+            except Exception as e:
+                package.logger.error(f"[{package.label}] Brotli conversion failed: {e}")
+                continue
+            if error:
+                package.logger.error(error)
             else:
-                package.logger.info(f"[{package.label}] Generated {output_img.name}")
-                if new_dat.exists():
-                    os.remove(new_dat)
-                if br_file.exists():
-                    os.remove(br_file)
-                if transfer_list.exists():
-                    os.remove(transfer_list)
-
-        except Exception as e:
-            package.logger.error(f"sdat2img execution failed: {e}")
+                package.logger.info(f"[{package.label}] Generated {prefix}.img")
 
 
 def extract_fastboot(
@@ -147,8 +298,12 @@ def extract_fastboot(
         partitions: List of partitions to extract (None = all).
     """
     # Zip mode logic
+    part_filter = set(partitions or ())
     with zipfile.ZipFile(package.path, "r") as z:
-        for f in z.namelist():
+        # Keyed by target: members flattened onto the same name keep the last one
+        members = {}
+        for info in z.infolist():
+            f = info.filename
             is_super_img = False
             if f.endswith("super.img") or f.endswith("images/super.img"):
                 is_super_img = True
@@ -158,17 +313,17 @@ def extract_fastboot(
             elif not f.endswith(".img"):
                 continue
 
-            part_name = Path(f).stem
+            name = f.rpartition("/")[2]
             # Skip if partitions filter is active, but always extract super.img chunks
             # super.img chunks are needed for lpunpack to extract logical partitions
-            if partitions and not is_super_img and part_name not in partitions:
+            if part_filter and not is_super_img and name[:-4] not in part_filter:
                 continue
 
             package.logger.info(f"Extracting {f}...")
-            source = z.open(f)
-            target_file = open(package.images_dir / Path(f).name, "wb")
-            with source, target_file:
-                shutil.copyfileobj(source, target_file)
+            target = package.images_dir / name
+            members[target] = info
+
+        extract_members(package.path, ((info, target) for target, info in members.items()))
 
         from .utils import process_sparse_images
 
@@ -185,21 +340,25 @@ def extract_fastboot(
                     package.logger.info(
                         f"[{package.label}] Unpacking specific partitions: {partitions}"
                     )
-                    for part in partitions:
-                        part_a = f"{part}_a"
-                        try:
-                            cmd_py = [
-                                sys.executable,
-                                "src/utils/lpunpack.py",
-                                "-p",
-                                part_a,
-                                str(super_img),
-                                str(package.images_dir),
-                            ]
-                            package.shell.run(cmd_py)
-                        except Exception as e:
+                    # Each partition is an independent read of super.img into its own file
+                    parts_a = [f"{part}_a" for part in partitions]
+                    cmds = [
+                        [
+                            sys.executable,
+                            "src/utils/lpunpack.py",
+                            "-p",
+                            part_a,
+                            str(super_img),
+                            str(package.images_dir),
+                        ]
+                        for part_a in parts_a
+                    ]
+                    # Concurrent progress output would only interleave; keep stderr for errors
+                    results = package.shell.run_many(cmds, quiet=True)
+                    for part_a, result in zip(parts_a, results, strict=True):
+                        if isinstance(result, Exception):
                             package.logger.warning(
-                                f"[{package.label}] Failed to extract {part_a}: {e}"
+                                f"[{package.label}] Failed to extract {part_a}: {result}"
                             )
                 else:
                     package.logger.info(
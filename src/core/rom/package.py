@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import concurrent.futures
+import hashlib
+import itertools
+import json
 import logging
 import shutil
+import sys
 import zipfile
 from pathlib import Path
 from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
+from src.utils.fastio import iter_files
 from src.utils.payload_dumper import PayloadDumperOutput
-from src.utils.shell import ShellRunner
+from src.utils.shell import ShellRunner, default_runner
 
 from .constants import ANDROID_LOGICAL_PARTITIONS, RomType
 from .utils import compute_file_hash, load_single_prop_file, sort_prop_priority
@@ -16,6 +21,15 @@ from .utils import compute_file_hash, load_single_prop_file, sort_prop_priority
 if TYPE_CHECKING:
     from src.core.cache_manager import PortRomCacheManager
 
+# Per-work_dir record of the detected ROM type, keyed by source path/mtime/size
+ROM_TYPE_CACHE = ".rom_meta.json"
+# Bump when the ROM type cache layout or detection rules change
+ROM_TYPE_CACHE_VERSION = 1
+# Parsed build.prop snapshot, keyed by the (path, mtime, size) of every prop file
+PROPS_CACHE = ".props_cache.json"
+# Bump when the props cache layout or prop parsing rules change
+PROPS_CACHE_VERSION = 1
+
 
 class RomPackage:
     """Represents a ROM package and provides extraction/processing methods."""
@@ -37,11 +51,15 @@ class RomPackage:
         """
         self.props: Dict[str, str] = {}
         self.prop_history: Dict[str, List[Tuple[str, str]]] = {}
+        self._props_loaded: bool = False
         self.path: Path = Path(file_path).resolve()
         self.work_dir: Path = Path(work_dir).resolve()
+        # Tool-owned home for cache files; unlike work_dir it is never repointed
+        # at the user's source tree in LOCAL_DIR mode
+        self.cache_dir: Path = self.work_dir
         self.label: str = label
         self.logger: logging.Logger = logging.getLogger(label)
-        self.shell: ShellRunner = ShellRunner()
+        self.shell: ShellRunner = default_runner()
         self.cache_manager: Optional["PortRomCacheManager"] = cache_manager
 
         # Payload metadata extracted from --json output
@@ -70,23 +88,65 @@ class RomPackage:
                 self.images_dir = self.path  # Compatible if img is in root
             return
 
+        stat = self.path.stat()
+        cache_key = {"path": str(self.path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        cached_type = self._load_type_cache(cache_key)
+        if cached_type is not None:
+            self.rom_type = cached_type
+            self.logger.info(f"[{self.label}] Detected Type: {self.rom_type.name} (cached)")
+            return
+
         # Simple Zip detection logic
         if zipfile.is_zipfile(self.path):
             with zipfile.ZipFile(self.path, "r") as z:
-                namelist = z.namelist()
-                if "payload.bin" in namelist:
-                    self.rom_type = RomType.PAYLOAD
-                elif any(x.endswith("new.dat.br") for x in namelist):
-                    self.rom_type = RomType.BROTLI
-                elif "images/super.img" in namelist or "super.img" in namelist:
-                    self.rom_type = RomType.FASTBOOT
-                elif any(x.startswith("images/super.img.") for x in namelist):
-                    # xiaomi.eu ROMs with split sparse super images (e.g., super.img.0, super.img.1)
-                    self.rom_type = RomType.FASTBOOT
+                # One pass over the central directory; payload.bin wins outright
+                has_brotli = has_super = False
+                for name in z.namelist():
+                    if name == "payload.bin":
+                        self.rom_type = RomType.PAYLOAD
+                        break
+                    if not has_brotli and name.endswith("new.dat.br"):
+                        has_brotli = True
+                    elif not has_super and (
+                        name in ("images/super.img", "super.img")
+                        # xiaomi.eu ROMs ship split sparse super images (super.img.0, ...)
+                        or name.startswith("images/super.img.")
+                    ):
+                        has_super = True
+                else:
+                    if has_brotli:
+                        self.rom_type = RomType.BROTLI
+                    elif has_super:
+                        self.rom_type = RomType.FASTBOOT
         elif self.path.suffix == ".tgz":
             self.rom_type = RomType.FASTBOOT
 
         self.logger.info(f"[{self.label}] Detected Type: {self.rom_type.name}")
+        if self.rom_type != RomType.UNKNOWN:
+            self._save_type_cache(cache_key)
+
+    def _load_type_cache(self, cache_key: Dict[str, object]) -> Optional[RomType]:
+        """Return the ROM type recorded for this exact source file, if any."""
+        try:
+            with open(self.cache_dir / ROM_TYPE_CACHE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("version") != ROM_TYPE_CACHE_VERSION:
+                return None
+            if all(cached.get(k) == v for k, v in cache_key.items()):
+                return RomType[cached["rom_type"]]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return None
+
+    def _save_type_cache(self, cache_key: Dict[str, object]) -> None:
+        """Remember the detected type so later runs skip reading the zip directory."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_dir / ROM_TYPE_CACHE, "w", encoding="utf-8") as f:
+                payload = {"version": ROM_TYPE_CACHE_VERSION, **cache_key}
+                json.dump({**payload, "rom_type": self.rom_type.name}, f)
+        except OSError as e:
+            self.logger.debug(f"[{self.label}] Could not save ROM type cache: {e}")
 
     def extract_images(self, partitions: Optional[List[str]] = None) -> None:
         """
@@ -230,19 +290,27 @@ class RomPackage:
         """
         self.logger.info(f"[{self.label}] Processing file extraction for logical partitions...")
 
+        present = []
+        for part in candidates:
+            if (self.images_dir / f"{part}.img").exists() or (
+                self.images_dir / f"{part}_a.img"
+            ).exists():
+                present.append(part)
+            else:
+                self.logger.debug(
+                    f"[{self.label}] Partition image {part} not found, skipping extract."
+                )
+
+        # Create the output skeleton once so the workers don't race on the same parents
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        for part in present:
+            (self.extracted_dir / part).mkdir(parents=True, exist_ok=True)
+
         with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
-            for part in candidates:
-                img_path = self.images_dir / f"{part}.img"
-                if not img_path.exists():
-                    img_path = self.images_dir / f"{part}_a.img"
-
-                if img_path.exists():
-                    futures.append(executor.submit(self.extract_partition_to_file, part))
-                else:
-                    self.logger.debug(
-                        f"[{self.label}] Partition image {part} not found, skipping extract."
-                    )
+            futures = [
+                executor.submit(self.extract_partition_to_file, part, dirs_ready=True)
+                for part in present
+            ]
 
             for future in concurrent.futures.as_completed(futures):
                 try:
@@ -251,11 +319,13 @@ class RomPackage:
                     self.logger.error(f"Partition extraction failed: {e}")
                     raise
 
-    def extract_partition_to_file(self, part_name: str) -> Optional[Path]:
+    def extract_partition_to_file(self, part_name: str, dirs_ready: bool = False) -> Optional[Path]:
         """Level 2 Extraction: Extract Img to folder, preserving SELinux config.
 
         Args:
             part_name: Name of the partition to extract.
+            dirs_ready: The target and config directories were already created
+                by the caller (as _batch_extract_files does).
 
         Returns:
             Path to the extracted directory, or None if extraction failed.
@@ -277,8 +347,9 @@ class RomPackage:
                 return None
 
         self.logger.info(f"[{self.label}] Extracting {part_name}.img to filesystem...")
-        target_dir.mkdir(parents=True, exist_ok=True)
-        self.config_dir.mkdir(parents=True, exist_ok=True)
+        if not dirs_ready:
+            target_dir.mkdir(parents=True, exist_ok=True)
+            self.config_dir.mkdir(parents=True, exist_ok=True)
 
         try:
             cmd = [
@@ -310,25 +381,31 @@ class RomPackage:
         # Pattern search to handle both 'system_fs_config' and 'system_a_fs_config'
         search_pattern = img_path.stem
 
-        possible_contexts = (
-            list(self.extracted_dir.glob(f"config/{search_pattern}_file_contexts"))
-            + list(target_dir.parent.glob(f"{search_pattern}_file_contexts"))
-            + list(target_dir.glob("*_file_contexts"))
+        # First match wins; later directories are only scanned if earlier ones miss
+        contexts_src = next(
+            itertools.chain(
+                self.extracted_dir.glob(f"config/{search_pattern}_file_contexts"),
+                target_dir.parent.glob(f"{search_pattern}_file_contexts"),
+                target_dir.glob("*_file_contexts"),
+            ),
+            None,
         )
-
-        possible_fs_config = (
-            list(self.extracted_dir.glob(f"config/{search_pattern}_fs_config"))
-            + list(target_dir.parent.glob(f"{search_pattern}_fs_config"))
-            + list(target_dir.glob("*_fs_config"))
+        fs_config_src = next(
+            itertools.chain(
+                self.extracted_dir.glob(f"config/{search_pattern}_fs_config"),
+                target_dir.parent.glob(f"{search_pattern}_fs_config"),
+                target_dir.glob("*_fs_config"),
+            ),
+            None,
         )
 
-        if possible_contexts:
+        if contexts_src:
             target_context = self.config_dir / f"{part_name}_file_contexts"
-            shutil.move(possible_contexts[0], target_context)
+            shutil.move(contexts_src, target_context)
 
-        if possible_fs_config:
+        if fs_config_src:
             target_fs = self.config_dir / f"{part_name}_fs_config"
-            shutil.move(possible_fs_config[0], target_fs)
+            shutil.move(fs_config_src, target_fs)
 
         # Save partition to global cache (for Port ROM only)
         if self.label == "Port" and self.cache_manager:
@@ -372,21 +449,80 @@ class RomPackage:
         self.prop_history = {}
         self.logger.info(f"[{self.label}] Scanning and parsing all build.prop files...")
 
-        prop_files = list(self.extracted_dir.rglob("build.prop"))
+        prop_files = [Path(p) for p in iter_files(self.extracted_dir, "build.prop".__eq__)]
+        self._props_loaded = True
         if not prop_files:
             self.logger.warning(f"[{self.label}] No build.prop files found.")
             return
 
         prop_files.sort(key=sort_prop_priority)
-        for prop_file in prop_files:
-            load_single_prop_file(
-                prop_file, self.extracted_dir, self.props, self.prop_history, self.logger
+        cache_key = self._props_cache_key(prop_files)
+        if self._load_props_cache(cache_key):
+            self.logger.info(
+                f"[{self.label}] Loaded {len(self.props)} cached properties "
+                f"from {len(prop_files)} files."
             )
+            return
 
+        def parse(prop_file: Path) -> Tuple[Dict[str, str], Dict[str, List[Tuple[str, str]]]]:
+            props: Dict[str, str] = {}
+            history: Dict[str, List[Tuple[str, str]]] = {}
+            load_single_prop_file(prop_file, self.extracted_dir, props, history, self.logger)
+            return props, history
+
+        # Files are read concurrently, then merged in priority order (last wins)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(prop_files))) as pool:
+            for props, history in pool.map(parse, prop_files):
+                for key, entries in history.items():
+                    self.prop_history.setdefault(key, []).extend(entries)
+                self.props.update(props)
+
+        self._save_props_cache(cache_key)
         self.logger.info(
             f"[{self.label}] Loaded {len(self.props)} properties from {len(prop_files)} files."
         )
 
+    def _props_cache_key(self, prop_files: List[Path]) -> str:
+        """Digest of the (path, mtime, size) of every prop file, in parse order."""
+        digest = hashlib.blake2b(digest_size=16)
+        for prop_file in prop_files:
+            st = prop_file.stat()
+            digest.update(f"{prop_file}\0{st.st_mtime_ns}\0{st.st_size}\n".encode())
+        return digest.hexdigest()
+
+    def _load_props_cache(self, cache_key: str) -> bool:
+        """Restore props/prop_history from the snapshot if it matches cache_key."""
+        try:
+            with open(self.cache_dir / PROPS_CACHE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("version") != PROPS_CACHE_VERSION or cached.get("key") != cache_key:
+                return False
+            props = cached["props"]
+            # json gives every entry its own copy of the source path; share one per file
+            history = {
+                k: [(sys.intern(src), val) for src, val in v] for k, v in cached["history"].items()
+            }
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            return False
+        self.props, self.prop_history = props, history
+        return True
+
+    def _save_props_cache(self, cache_key: str) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_dir / PROPS_CACHE, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": PROPS_CACHE_VERSION,
+                        "key": cache_key,
+                        "props": self.props,
+                        "history": self.prop_history,
+                    },
+                    f,
+                )
+        except OSError as e:
+            self.logger.debug(f"[{self.label}] Could not save props cache: {e}")
+
     def export_props(self, output_path: Union[str, Path]) -> None:
         """Export all props to file, including Override debug info.
 
@@ -400,27 +536,27 @@ class RomPackage:
         if not self.props:
             self.parse_all_props()
 
-        content = [
-            f"# DEBUG DUMP for {self.label}",
-            "# Generated by HyperOS Porting Tool",
-            "# ==========================================\n",
-        ]
-        for key in sorted(self.props.keys()):
-            history = self.prop_history.get(key, [])
-            final_val = self.props[key]
-            if len(history) > 1:
-                content.append(f"# [OVERRIDE DETECTED]\n# {key}")
-                for source, val in history:
-                    content.append(f"#   - {source}: {val}")
-                content.append(f"#   -> Final: {final_val}")
-            content.append(f"{key}={final_val}")
-
+        history_of = self.prop_history.get
         with open(out_file, "w", encoding="utf-8") as f:
-            f.write("\n".join(content))
+            w = f.write
+            w(
+                f"# DEBUG DUMP for {self.label}\n"
+                "# Generated by HyperOS Porting Tool\n"
+                "# ==========================================\n"
+            )
+            for key in sorted(self.props):
+                history = history_of(key, ())
+                final_val = self.props[key]
+                if len(history) > 1:
+                    w(f"\n# [OVERRIDE DETECTED]\n# {key}")
+                    for source, val in history:
+                        w(f"\n#   - {source}: {val}")
+                    w(f"\n#   -> Final: {final_val}")
+                w(f"\n{key}={final_val}")
         self.logger.info(f"[{self.label}] Debug props saved.")
 
     def get_prop(self, key: str, default: Optional[str] = None) -> Optional[str]:
-        """Get property value. Triggers full load if cache is empty.
+        """Get property value. Triggers a full load on first lookup.
 
         Args:
             key: Property key to look up.
@@ -429,6 +565,6 @@ class RomPackage:
         Returns:
             Property value or default.
         """
-        if not self.props:
+        if not self._props_loaded:
             self.parse_all_props()
         return self.props.get(key, default)
@@ -5,9 +5,13 @@ import logging
 import os
 import re
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Union
 
+from src.utils.fastio import fast_concat
+
 
 def _natural_sort_key(path: Path) -> List[Union[int, str]]:
     """Generate a natural sort key for file paths.
@@ -42,6 +46,19 @@ def compute_file_hash(file_path: Path) -> str:
     return hash_sha256.hexdigest()[:16]
 
 
+# Android sparse image header magic (little-endian 0xED26FF3A)
+_SPARSE_MAGIC = b"\x3a\xff\x26\xed"
+
+
+def _is_sparse_image(path: Path) -> bool:
+    """Whether path starts with the Android sparse image magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == _SPARSE_MAGIC
+    except OSError:
+        return False
+
+
 def process_sparse_images(images_dir: Path, logger: logging.Logger, shell) -> None:
     """Merge/Convert sparse images (super.img.*, cust.img.*) using simg2img.
 
@@ -66,11 +83,28 @@ def process_sparse_images(images_dir: Path, logger: logging.Logger, shell) -> No
     else:
         logger.info("Using simg2img from system PATH")
 
-    # 1. Handle super.img
+    # super.img and cust.img touch disjoint files, so merge cust alongside super
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        cust_done = pool.submit(_merge_sparse_cust, images_dir, logger, shell, simg2img_bin)
+        _merge_sparse_super(images_dir, logger, shell, simg2img_bin)
+        cust_done.result()
+
+
+def _merge_sparse_super(
+    images_dir: Path, logger: logging.Logger, shell, simg2img_bin: Union[str, Path]
+) -> None:
+    """Merge super.img.* chunks, or unsparse a single super.img in place."""
     super_chunks = sorted(list(images_dir.glob("super.img.*")), key=_natural_sort_key)
     target_super = images_dir / "super.img"
 
-    if super_chunks:
+    if super_chunks and not any(map(_is_sparse_image, super_chunks)):
+        # Plain raw splits: concatenate in the kernel instead of running simg2img
+        logger.info(f"Joining raw super image chunks: {[c.name for c in super_chunks]}...")
+        fast_concat(super_chunks, target_super)
+        for c in super_chunks:
+            os.unlink(c)
+
+    elif super_chunks:
         logger.info(f"Merging sparse super images: {[c.name for c in super_chunks]}...")
         try:
             cmd = [str(simg2img_bin)] + [str(c) for c in super_chunks] + [str(target_super)]
@@ -81,7 +115,7 @@ def process_sparse_images(images_dir: Path, logger: logging.Logger, shell) -> No
             logger.error(f"Failed to merge super.img: {e}")
             raise
 
-    elif target_super.exists():
+    elif target_super.exists() and _is_sparse_image(target_super):
         logger.info("converting super.img to raw (if sparse)...")
         temp_raw = images_dir / "super.raw.img"
         try:
@@ -92,11 +126,24 @@ def process_sparse_images(images_dir: Path, logger: logging.Logger, shell) -> No
             if temp_raw.exists():
                 os.unlink(temp_raw)
 
-    # 2. Handle cust.img
+
+def _merge_sparse_cust(
+    images_dir: Path, logger: logging.Logger, shell, simg2img_bin: Union[str, Path]
+) -> None:
+    """Merge cust.img.* chunks; failures are logged, not raised."""
     cust_chunks = sorted(list(images_dir.glob("cust.img.*")), key=_natural_sort_key)
     target_cust = images_dir / "cust.img"
 
-    if cust_chunks:
+    if cust_chunks and not any(map(_is_sparse_image, cust_chunks)):
+        logger.info("Joining raw cust image chunks...")
+        try:
+            fast_concat(cust_chunks, target_cust)
+            for c in cust_chunks:
+                os.unlink(c)
+        except OSError as e:
+            logger.error(f"Failed to merge cust.img: {e}")
+
+    elif cust_chunks:
         logger.info("Merging sparse cust images...")
         try:
             cmd = [str(simg2img_bin)] + [str(c) for c in cust_chunks] + [str(target_cust)]
@@ -107,6 +154,10 @@ def process_sparse_images(images_dir: Path, logger: logging.Logger, shell) -> No
             logger.error(f"Failed to merge cust.img: {e}")
 
 
+# Prop values shorter than this are interned so repeats share one string
+_INTERN_MAX_LEN = 64
+
+
 def load_single_prop_file(
     file_path: Path,
     extracted_dir: Path,
@@ -127,20 +178,25 @@ def load_single_prop_file(
         rel_path = str(file_path.relative_to(extracted_dir))
     except ValueError:
         rel_path = file_path.name
+    rel_path = sys.intern(rel_path)
 
     logger.debug(f"Parsing: {rel_path}")
     try:
         with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                key, value = line.split("=", 1)
-                key, value = key.strip(), value.strip()
-                if key not in prop_history:
-                    prop_history[key] = []
-                prop_history[key].append((str(rel_path), value))
-                props[key] = value
+            content = f.read()
+        for line in content.split("\n"):
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            key, value = key.rstrip(), value.lstrip()
+            if len(value) < _INTERN_MAX_LEN:
+                # Short values ("true", "0", ...) repeat across keys and files
+                value = sys.intern(value)
+            prop_history.setdefault(key, []).append((rel_path, value))
+            props[key] = value
     except Exception as e:
         logger.error(f"Error reading {rel_path}: {e}")
 
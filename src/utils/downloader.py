@@ -7,13 +7,13 @@ import zipfile
 from pathlib import Path
 
 from src.utils.file_downloader import download_file
-from src.utils.shell import ShellRunner
+from src.utils.shell import default_runner
 
 
 class Aria2Manager:
     def __init__(self):
         self.logger = logging.getLogger("Aria2Mgr")
-        self.shell = ShellRunner()
+        self.shell = default_runner()
         self.system = platform.system().lower()
         self.arch = platform.machine().lower()
         
@@ -116,7 +116,7 @@ class RomDownloader:
     def __init__(self):
         self.logger = logging.getLogger("Downloader")
         self.aria2_mgr = Aria2Manager()
-        self.shell = ShellRunner()
+        self.shell = default_runner()
         
         # Project Root / roms
         self.rom_dir = Path("roms").resolve()
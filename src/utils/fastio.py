@@ -0,0 +1,303 @@
+"""Zero-copy file helpers for moving large images and archive members, plus tree scans."""
+
+from __future__ import annotations
+
+import errno
+import os
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Tuple, Union
+
+PathLike = Union[str, Path]
+
+# Bytes handed to the kernel per copy_file_range/sendfile call
+_KERNEL_CHUNK = 8 * 1024 * 1024
+# Userspace fallback buffer
+_COPY_BUF_SIZE = 1024 * 1024
+# Archive members up to this size are inflated whole instead of streamed
+_SMALL_MEMBER_SIZE = 4 * 1024 * 1024
+
+# errno values meaning "this syscall can't do this copy", not a real I/O failure
+_FALLBACK_ERRNOS = {
+    errno.ENOSYS,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.EBADF,
+    errno.EPERM,
+    errno.ENOTSOCK,
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+}
+
+
+def _copy_file_range_step(in_fd: int, out_fd: int, offset: int) -> int:
+    return os.copy_file_range(in_fd, out_fd, _KERNEL_CHUNK, offset, offset)
+
+
+def _sendfile_step(in_fd: int, out_fd: int, offset: int) -> int:
+    os.lseek(out_fd, offset, os.SEEK_SET)
+    return os.sendfile(out_fd, in_fd, offset, _KERNEL_CHUNK)
+
+
+# Recycled 1 MiB copy buffers shared by every streaming copy in the process
+_BUF_POOL: queue.SimpleQueue[bytearray] = queue.SimpleQueue()
+
+_KERNEL_STEPS = [
+    step
+    for step, available in (
+        (_copy_file_range_step, hasattr(os, "copy_file_range")),
+        (_sendfile_step, hasattr(os, "sendfile")),
+    )
+    if available
+]
+
+
+_FADV_SEQUENTIAL = getattr(os, "POSIX_FADV_SEQUENTIAL", None)
+_FADV_DONTNEED = getattr(os, "POSIX_FADV_DONTNEED", None)
+
+
+def _fadvise(fd: int, advice: int | None) -> None:
+    """Best-effort page cache hint; a no-op where posix_fadvise is unavailable."""
+    if advice is None:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+
+def _copy_fds(fsrc: BinaryIO, fdst: BinaryIO) -> None:
+    in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+    offset = 0
+
+    for step in _KERNEL_STEPS:
+        try:
+            while True:
+                copied = step(in_fd, out_fd, offset)
+                if copied == 0:
+                    return
+                offset += copied
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+
+    fsrc.seek(offset)
+    fdst.seek(offset)
+    copy_stream(fsrc, fdst)
+
+
+def fast_copy(src: PathLike, dst: PathLike, drop_cache: bool = False) -> None:
+    """Copy the contents of src to dst (data only, like shutil.copyfile).
+
+    Tries copy_file_range (reflink/server-side copy where supported), then
+    sendfile, and finally a 1 MiB readinto loop when neither syscall works
+    for this pair of files. With drop_cache=True both files are evicted from
+    the page cache afterwards, so a one-off multi-GB copy does not push out
+    the images the build is still working on.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        _fadvise(fsrc.fileno(), _FADV_SEQUENTIAL)
+        _copy_fds(fsrc, fdst)
+        if drop_cache:
+            fdst.flush()
+            # DONTNEED starts writeback of dirty pages and drops the clean ones
+            _fadvise(fsrc.fileno(), _FADV_DONTNEED)
+            _fadvise(fdst.fileno(), _FADV_DONTNEED)
+
+
+def fast_concat(srcs: Iterable[PathLike], dst: PathLike) -> None:
+    """Write the contents of srcs back to back into dst.
+
+    Each file is appended with copy_file_range where the kernel supports it,
+    falling back to the pooled userspace loop otherwise.
+    """
+    with open(dst, "wb") as fdst:
+        out_fd = fdst.fileno()
+        for src in srcs:
+            with open(src, "rb") as fsrc:
+                in_fd = fsrc.fileno()
+                try:
+                    if not hasattr(os, "copy_file_range"):
+                        raise OSError(errno.ENOSYS, "copy_file_range unavailable")
+                    while os.copy_file_range(in_fd, out_fd, _KERNEL_CHUNK):
+                        pass
+                except OSError as e:
+                    if e.errno not in _FALLBACK_ERRNOS:
+                        raise
+                    # Resume from wherever the kernel copy stopped
+                    fsrc.seek(os.lseek(in_fd, 0, os.SEEK_CUR))
+                    fdst.seek(os.lseek(out_fd, 0, os.SEEK_CUR))
+                    copy_stream(fsrc, fdst)
+                    fdst.flush()
+
+
+def parallel_copy(
+    pairs: Iterable[Tuple[PathLike, PathLike]],
+    max_workers: int | None = None,
+    drop_cache: bool = False,
+) -> None:
+    """fast_copy each (src, dst) pair on a small thread pool.
+
+    Keeps several large image copies in flight at once. The worker count
+    defaults to HYPEROS_COPY_WORKERS or 8. Destinations must be distinct;
+    drop_cache is passed on to fast_copy.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return
+    if max_workers is None:
+        max_workers = int(os.environ.get("HYPEROS_COPY_WORKERS", "8"))
+    workers = max(1, min(max_workers, len(pairs)))
+    if workers == 1:
+        for src, dst in pairs:
+            fast_copy(src, dst, drop_cache)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda pair: fast_copy(*pair, drop_cache), pairs))
+
+
+def fast_move(src: PathLike, dst: PathLike) -> None:
+    """Move src over dst with a single rename, copying only across filesystems."""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        fast_copy(src, dst)
+        os.unlink(src)
+
+
+def copy_stream(src: BinaryIO, dst: BinaryIO) -> int:
+    """Copy a file object into another through a pooled 1 MiB buffer."""
+    try:
+        buf = _BUF_POOL.get_nowait()
+    except queue.Empty:
+        buf = bytearray(_COPY_BUF_SIZE)
+
+    total = 0
+    try:
+        with memoryview(buf) as view:
+            while n := src.readinto(view):
+                dst.write(view[:n])
+                total += n
+    finally:
+        _BUF_POOL.put(buf)
+    return total
+
+
+def _member_target(dest: Path, filename: str) -> Path | None:
+    """Map an archive name below dest, dropping absolute/'..' parts like ZipFile.extract."""
+    parts = [p for p in filename.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return dest.joinpath(*parts) if parts else None
+
+
+def _extract_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, target: PathLike) -> None:
+    if info.file_size <= _SMALL_MEMBER_SIZE:
+        # Size is known up front: inflate in one go and issue a single write
+        data = zf.read(info)
+        with open(target, "wb") as out:
+            out.write(data)
+    else:
+        with zf.open(info) as src, open(target, "wb") as out:
+            copy_stream(src, out)
+
+    mode = (info.external_attr >> 16) & 0o7777
+    if mode:
+        os.chmod(target, mode)
+
+
+def extract_zip(
+    zip_path: PathLike,
+    dest: PathLike,
+    max_workers: int | None = None,
+    select: Callable[[str], bool] | None = None,
+) -> None:
+    """Extract every member of zip_path under dest, streaming through pooled buffers.
+
+    The directory skeleton is created up front, then file members are inflated
+    concurrently by extract_members. Unix permission bits stored in the archive
+    are applied to extracted files. select, if given, is called with each
+    member name and limits extraction to the names it accepts.
+    """
+    dest = Path(dest)
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        members = []
+        for info in zf.infolist():
+            if select is not None and not select(info.filename):
+                continue
+            target = _member_target(dest, info.filename)
+            if target is None:
+                continue
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                members.append((info, target))
+
+    extract_members(zip_path, members, max_workers)
+
+
+def extract_members(
+    zip_path: PathLike,
+    members: Iterable[Tuple[zipfile.ZipInfo, PathLike]],
+    max_workers: int | None = None,
+) -> None:
+    """Inflate the given (member, target file) pairs of zip_path concurrently.
+
+    zlib releases the GIL, so members are spread over up to max_workers
+    threads (default 8, capped at the CPU count); each worker reads through
+    its own ZipFile handle. Target parent directories must already exist.
+    """
+    members = list(members)
+    workers = min(max_workers or 8, os.cpu_count() or 1, len(members))
+    if workers <= 1:
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            for info, target in members:
+                _extract_member(zf, info, target)
+        return
+
+    local = threading.local()
+    handles: list[zipfile.ZipFile] = []
+    handles_lock = threading.Lock()
+
+    def extract_one(member: Tuple[zipfile.ZipInfo, PathLike]) -> None:
+        handle = getattr(local, "zf", None)
+        if handle is None:
+            handle = local.zf = zipfile.ZipFile(zip_path, "r")
+            with handles_lock:
+                handles.append(handle)
+        _extract_member(handle, *member)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(extract_one, members))
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def iter_files(root: PathLike, match: Callable[[str], bool]) -> Iterator[str]:
+    """Yield the paths of regular files under root whose name satisfies match.
+
+    Walks with os.scandir, so directory entries are classified from d_type
+    without a stat per file. Results come in the same order as Path.rglob
+    (a directory's files before its subdirectories); symlinked directories
+    are not descended into, symlinks to files are reported.
+    """
+    pending = [os.fspath(root)]
+    while pending:
+        subdirs = []
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif match(entry.name) and entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue
+        pending.extend(reversed(subdirs))
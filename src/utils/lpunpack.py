@@ -861,7 +861,7 @@ class LpUnpack(object):
                     self._extract(partition, metadata)
 
         except LpUnpackError as e:
-            print(e.message)
+            print(e.message, file=sys.stderr)
             sys.exit(1)
 
         finally:
@@ -3,6 +3,8 @@ import zipfile
 from pathlib import Path
 from typing import Optional
 
+from src.utils.shell import default_runner
+
 
 class OtaToolsManager:
     # Hardcoded URL for otatools download
@@ -76,6 +78,9 @@ class OtaToolsManager:
                         )  # Add execute permission for user, group, and others
                 self.logger.info("Set execute permissions on otatools binaries")
 
+            # The shared runner listed the bin dirs before these tools existed
+            default_runner().invalidate_binary_cache()
+
             # Remove the temporary zip file
             temp_file.unlink()
 
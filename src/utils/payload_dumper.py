@@ -264,7 +264,7 @@ class PayloadDumperRunner:
             arch_dir = machine
 
         # Try project bin directory first
-        project_root = Path(__file__).parent.parent.parent
+        project_root = Path(__file__).resolve().parents[2]
         project_bin = project_root / "bin" / platform_dir / arch_dir / "payload-dumper"
 
         # On Windows, add .exe extension
@@ -0,0 +1,52 @@
+"""Process pools whose workers log through the parent's handlers."""
+
+from __future__ import annotations
+
+import logging
+import logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+class _ParentDispatch(logging.Handler):
+    """Hand worker records to the parent logger of the same name."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+def _init_worker(log_queue: Any, level: int) -> None:
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+
+@contextmanager
+def logging_process_pool(max_workers: int) -> Iterator[ProcessPoolExecutor]:
+    """
+    ProcessPoolExecutor for CPU-bound work that must not lose its log output.
+
+    Workers are spawned, not forked, so they never inherit locks held by the
+    parent's threads, and their records are forwarded over a queue to the
+    parent's handlers (console and porting.log).
+    """
+    mp_context = multiprocessing.get_context("spawn")
+    log_queue = mp_context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, _ParentDispatch())
+    listener.start()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(log_queue, logging.getLogger().getEffectiveLevel()),
+        ) as pool:
+            yield pool
+    finally:
+        listener.stop()
+        log_queue.close()
+        log_queue.join_thread()
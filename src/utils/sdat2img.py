@@ -5,6 +5,7 @@
 #       AUTHORS: xpirt - luxi78 - howellzhu
 # ====================================================
 
+import contextlib
 import logging
 import sys
 
@@ -33,7 +34,13 @@ def run_sdat2img(transfer_list_file, new_dat_file, output_image_file):
         logging.error("sdat2img: invalid format")
         return False
 
-    with open(output_image_file, "wb") as output_img, open(new_dat_file, "rb") as new_dat:
+    # new_dat_file may also be a binary stream that is read sequentially
+    if hasattr(new_dat_file, "read"):
+        new_dat_ctx = contextlib.nullcontext(new_dat_file)
+    else:
+        new_dat_ctx = open(new_dat_file, "rb")
+
+    with open(output_image_file, "wb") as output_img, new_dat_ctx as new_dat:
         for line in trans_list:
             line = line.strip()
             if not line:
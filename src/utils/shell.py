@@ -1,32 +1,87 @@
 import logging
 import os
-import platform
+import shlex
+import shutil
 import subprocess
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, List, Optional, Union
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+
+def _detect_os_name() -> str:
+    if sys.platform == "darwin":
+        return "darwin" # macOS
+    if sys.platform.startswith("linux"):
+        return "linux"
+    return "windows"
+
+
+def _detect_arch() -> str:
+    # Same value platform.machine() reports, without importing the platform module
+    if hasattr(os, "uname"):
+        machine = os.uname().machine.lower()
+    else:
+        machine = os.environ.get("PROCESSOR_ARCHITECTURE", "").lower()
+    if machine in ["x86_64", "amd64"]:
+        return "x86_64"
+    if machine in ["aarch64", "arm64"]:
+        return "aarch64"
+    return "x86_64" # 默认 fallback
+
+
+# Tools the port pipeline invokes by bare name; default_runner() resolves them up front
+KNOWN_TOOLS: Tuple[str, ...] = (
+    "avbtool",
+    "brotli",
+    "e2fsdroid",
+    "extract.erofs",
+    "java",
+    "lpmake",
+    "lpunpack",
+    "mke2fs",
+    "mkfs.erofs",
+    "payload-dumper",
+    "resize2fs",
+    "simg2img",
+    "zstd",
+)
+
+# Constant for the life of the process, so resolved once at import
+_OS_NAME = _detect_os_name()
+_ARCH = _detect_arch()
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+# quiet=True keeps only this many trailing stderr lines for error reports
+_QUIET_STDERR_LINES = 100
+
+# Characters that only a real shell can interpret (pipes, redirects, globs, $vars, ...)
+_SHELL_META = frozenset("|&;<>()$`\\*?[]{}~#!\n")
+
+
+def _needs_shell(cmd: str) -> bool:
+    """Whether a command string relies on shell syntax beyond quoting and word splitting."""
+    words = cmd.split(None, 1)
+    # Empty commands and a leading VAR=value assignment are shell-only too
+    return not words or "=" in words[0] or any(c in _SHELL_META for c in cmd)
+
+
+def _format_cmd(cmd: Union[str, List[str]]) -> str:
+    """Shell-quoted command line for log messages."""
+    return shlex.join(cmd) if isinstance(cmd, list) else cmd
 
 
 class ShellRunner:
     def __init__(self):
         self.logger = logging.getLogger("Shell")
-        
-        system = platform.system().lower()
-        if system == "darwin":
-            self.os_name = "darwin" # macOS
-        elif system == "linux":
-            self.os_name = "linux"
-        else:
-            self.os_name = "windows" 
 
-        machine = platform.machine().lower()
-        if machine in ["x86_64", "amd64"]:
-            self.arch = "x86_64"
-        elif machine in ["aarch64", "arm64"]:
-            self.arch = "aarch64"
-        else:
-            self.arch = "x86_64" # 默认 fallback
+        self.os_name = _OS_NAME
+        self.arch = _ARCH
 
-        project_root = Path(__file__).resolve().parent.parent.parent
+        project_root = _PROJECT_ROOT
         self.bin_dir = project_root / "bin" / self.os_name / self.arch
 
         if not self.bin_dir.exists():
@@ -34,6 +89,20 @@ class ShellRunner:
             
         self.otatools_bin = project_root / "otatools" / "bin"
 
+        # tool name -> resolved absolute path, for every tool that was found
+        self._binary_cache: Dict[str, Path] = {}
+        # (bin dirs, one {name: path} listing per dir), replaced only as a whole
+        self._bin_index: Tuple[Tuple[Path, ...], List[Dict[str, str]]] = self._scan_bin_dirs()
+        # Resolved tools already confirmed executable (exists + X_OK or chmodded)
+        self._executable_paths: Set[Path] = set()
+
+    def invalidate_binary_cache(self) -> None:
+        """Forget resolved tool paths and rescan the bin directories (call after
+        changing bin_dir/otatools_bin or their contents, e.g. once otatools is installed)."""
+        self._binary_cache.clear()
+        self._executable_paths.clear()
+        self._bin_index = self._scan_bin_dirs()
+
     def get_binary_path(self, tool_name: str) -> Path:
         """
         Get the absolute path of the tool.
@@ -42,30 +111,91 @@ class ShellRunner:
         2. otatools/bin/ (Google OTA tools)
         3. bin/ (Common tools)
         4. System PATH
+
+        Every tool that was found is cached per runner, so the PATH search
+        also runs once per tool; tools not found anywhere are looked up again
+        (bin directories included) on the next call.
         """
-        # 1. Platform specific
-        bin_path = self.bin_dir / tool_name
-        if bin_path.exists():
-            return bin_path
-
-        # 2. OTATools
-        ota_path = self.otatools_bin / tool_name
-        if ota_path.exists():
-            return ota_path
-
-        # 3. Common bin
-        common_bin = self.bin_dir.parent.parent / tool_name
-        if common_bin.exists():
-            return common_bin
-
-        # 4. Fallback to command name (relies on PATH)
+        cached = self._binary_cache.get(tool_name)
+        if cached is not None:
+            return cached
+
+        resolved = self._resolve_binary(tool_name)
+        if resolved.is_absolute():
+            self._binary_cache[tool_name] = resolved
+        return resolved
+
+    def preload_tools(self, names: Iterable[str] = KNOWN_TOOLS) -> None:
+        """Resolve a batch of tools in one go (one listing per bin dir, then PATH)."""
+        for name in names:
+            self.get_binary_path(name)
+
+    def _bin_dirs(self) -> Tuple[Path, Path, Path]:
+        # 1. Platform specific, 2. OTATools, 3. Common bin
+        return (self.bin_dir, self.otatools_bin, self.bin_dir.parent.parent)
+
+    def _scan_bin_dirs(self) -> Tuple[Tuple[Path, ...], List[Dict[str, str]]]:
+        """List every bin directory once; the result is built locally and never mutated,
+        so runners shared across threads can publish it with a single assignment."""
+        dirs = self._bin_dirs()
+        listings = []
+        for base in dirs:
+            try:
+                with os.scandir(base) as it:
+                    listings.append({entry.name: entry.path for entry in it})
+            except OSError:
+                listings.append({})
+        return dirs, listings
+
+    def _lookup_bin_index(self, tool_name: str) -> Optional[str]:
+        """Find tool_name in the bin directory listings, rescanning once on a miss
+        so tools installed after the last scan (e.g. otatools) are picked up."""
+        index = self._bin_index
+        rescanned = index[0] != self._bin_dirs()
+        if rescanned:
+            # bin_dir/otatools_bin were repointed since the last scan
+            index = self._scan_bin_dirs()
+            self._bin_index = index
+
+        while True:
+            for entries in index[1]:
+                hit = entries.get(tool_name)
+                if hit is not None:
+                    return hit
+            if rescanned:
+                return None
+            index = self._scan_bin_dirs()
+            self._bin_index = index
+            rescanned = True
+
+    def _resolve_binary(self, tool_name: str) -> Path:
+        if self.os_name == "windows" or os.sep in tool_name or (
+            os.altsep and os.altsep in tool_name
+        ):
+            # Path-like names can't come from a directory listing, and Windows
+            # matches names case-insensitively; probe those directly
+            for base in self._bin_dirs():
+                candidate = os.path.join(base, tool_name)
+                if os.path.exists(candidate):
+                    return Path(candidate)
+        else:
+            hit = self._lookup_bin_index(tool_name)
+            if hit is not None:
+                return Path(hit)
+
+        # 4. System PATH, resolved here once instead of by every exec
+        on_path = shutil.which(tool_name)
+        if on_path:
+            return Path(on_path)
+
+        # Not found anywhere: hand the bare name to the OS and let it fail there
         return Path(tool_name)
 
     def run(self, cmd: Union[str, List[str]], cwd: Optional[Path] = None, 
             check: bool = True, capture_output: bool = False, 
             env: Optional[dict] = None, logger: Optional[logging.Logger] = None,
             on_line: Optional[Callable[[str], None]] = None,
-            shell: bool = False) -> subprocess.CompletedProcess:
+            shell: bool = False, quiet: bool = False) -> subprocess.CompletedProcess:
         """
         Core method to execute commands
         :param cmd: List of commands (recommended) or string. e.g. ["lpunpack", "super.img"]
@@ -76,23 +206,21 @@ class ShellRunner:
         :param logger: Optional logger to stream output to (forces capture_output=True)
         :param on_line: Optional callback function called for each line of output
         :param shell: If True, execute the command through the shell
+        :param quiet: Discard stdout and keep only the last lines of stderr for error
+                      reports; for chatty tools whose output nobody reads
         """
-        
-        # Binary search logic (skipped if shell=True and cmd is a string)
-        if not shell and isinstance(cmd, list):
-            tool = cmd[0]
-            tool_path = self.get_binary_path(tool)
-            if tool_path.is_absolute() and tool_path.exists():
-                cmd[0] = str(tool_path)
-                if not os.access(tool_path, os.X_OK):
-                    os.chmod(tool_path, 0o755)
-        
-        run_env = os.environ.copy()
-        if env:
-            run_env.update(env)
+        cmd = self._prepare_cmd(cmd, shell)
+
+        # Without overrides the child inherits our environment as-is (env=None),
+        # so the common path never copies os.environ
+        run_env = {**os.environ, **env} if env else None
             
-        cmd_str = " ".join(cmd) if isinstance(cmd, list) else cmd
-        self.logger.debug(f"Running: {cmd_str}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Running: %s", _format_cmd(cmd))
+
+        # Children are started without preexec_fn/user/group changes, which keeps
+        # CPython (3.10+) on its vfork() spawn path on Linux: no page table copy of
+        # this (large) interpreter per tool call. Keep it that way.
 
         # If a logger or on_line is provided, we must capture output
         should_capture = capture_output or (logger is not None) or (on_line is not None)
@@ -129,6 +257,25 @@ class ShellRunner:
                     raise subprocess.CalledProcessError(returncode, cmd, output=stdout)
                 
                 return subprocess.CompletedProcess(cmd, returncode, stdout, "")
+            elif quiet and not should_capture:
+                # Quiet mode: stdout goes nowhere, stderr is drained into a bounded tail
+                process = subprocess.Popen(
+                    cmd,
+                    cwd=cwd,
+                    shell=shell if shell else (isinstance(cmd, str)),
+                    text=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    env=run_env
+                )
+                with process.stderr:
+                    stderr = "".join(deque(process.stderr, maxlen=_QUIET_STDERR_LINES))
+                returncode = process.wait()
+
+                if check and returncode != 0:
+                    raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
+
+                return subprocess.CompletedProcess(cmd, returncode, None, stderr)
             else:
                 # Normal mode
                 result = subprocess.run(
@@ -137,22 +284,70 @@ class ShellRunner:
                     check=check,
                     shell=shell if shell else (isinstance(cmd, str)),
                     text=True,
-                    capture_output=should_capture,
-                    env=run_env
+                    env=run_env,
+                    capture_output=should_capture
                 )
                 return result
             
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Command failed with return code {e.returncode}")
-            self.logger.error(f"Command: {cmd_str}")
+            self.logger.error("Command: %s", _format_cmd(cmd))
             if hasattr(e, 'stderr') and e.stderr:
                 self.logger.error(f"Stderr: {e.stderr.strip()}")
             elif hasattr(e, 'output') and e.output:
                 self.logger.error(f"Output: {e.output.strip()}")
             raise e
 
+    def _prepare_cmd(self, cmd: Union[str, List[str]], shell: bool) -> Union[str, List[str]]:
+        """Split plain command strings and resolve cmd[0] to the bundled tool."""
+        # Plain command strings are split and exec'd directly instead of via /bin/sh
+        if not shell and isinstance(cmd, str) and self.os_name != "windows" \
+                and not _needs_shell(cmd):
+            cmd = shlex.split(cmd)
+
+        # Binary search logic (skipped if shell=True and cmd is a string)
+        if not shell and isinstance(cmd, list) and cmd:
+            tool = cmd[0]
+            tool_path = self.get_binary_path(tool)
+            if tool_path in self._executable_paths:
+                cmd[0] = str(tool_path)
+            elif tool_path.is_absolute() and tool_path.exists():
+                cmd[0] = str(tool_path)
+                if not os.access(tool_path, os.X_OK):
+                    os.chmod(tool_path, 0o755)
+                self._executable_paths.add(tool_path)
+        return cmd
+
+    def run_many(self, cmds: List[List[str]], *, max_concurrency: Optional[int] = None,
+                 **kwargs) -> List[Union[subprocess.CompletedProcess, Exception]]:
+        """
+        Run independent commands concurrently (the threads just wait on their children).
+        Returns one entry per command, in input order: the CompletedProcess, or the
+        exception that run() raised for it.
+        :param cmds: List of argv lists that do not depend on each other's output
+        :param max_concurrency: Maximum commands in flight (default: CPU count)
+        :param kwargs: Passed on to run() for every command (cwd, check, env, ...)
+        """
+        cmds = [[str(arg) for arg in cmd] for cmd in cmds]
+        workers = max(1, min(max_concurrency or os.cpu_count() or 1, len(cmds) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.run, cmd, **kwargs) for cmd in cmds]
+        results: List[Union[subprocess.CompletedProcess, Exception]] = []
+        for future in futures:
+            error = future.exception()
+            results.append(error if error is not None else future.result())
+        return results
+
     def run_java_jar(self, jar_path: Union[str, Path], args: List[str], **kwargs):
         """Helper method specifically for executing java -jar commands"""
         full_jar_path = self.get_binary_path(str(jar_path))
         cmd = ["java", "-jar", str(full_jar_path)] + args
         return self.run(cmd, **kwargs)
+
+
+@lru_cache(maxsize=1)
+def default_runner() -> ShellRunner:
+    """The process-wide ShellRunner, so tool lookups are resolved and cached once."""
+    runner = ShellRunner()
+    runner.preload_tools()
+    return runner
@@ -240,9 +240,10 @@ class SmaliKit:
         new_content, appended = self._apply_append_method(new_content)
         return new_content, file_modified or appended
 
-    def walk_and_patch(self, start_path):
+    def iter_smali_files(self, start_path):
+        """Yield the smali files a walk from start_path would patch."""
         if os.path.isfile(start_path):
-            self.patch_file(start_path)
+            yield start_path
             return
 
         if os.path.isdir(start_path):
@@ -251,19 +252,26 @@ class SmaliKit:
                     if file.endswith(".smali"):
                         if self.args.iname and self.args.iname not in file:
                             continue
-                        self.patch_file(os.path.join(root, file))
+                        yield os.path.join(root, file)
         else:
             self.log(f"[ERROR] Path not found: {start_path}", Colors.FAIL)
 
+    def walk_and_patch(self, start_path):
+        for file_path in self.iter_smali_files(start_path):
+            self.patch_file(file_path)
+
+    def patch_content(self, content, file_path):
+        """Patch smali source already held in memory: return (new_content, patched)."""
+        if self.target_method and self.target_method not in content and not self.seek_keyword:
+            return content, False
+        return self.process_content(content, file_path)
+
     def patch_file(self, file_path):
         try:
             with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
                 content = f.read()
 
-            if self.target_method and self.target_method not in content and not self.seek_keyword:
-                return False
-
-            new_content, patched = self.process_content(content, file_path)
+            new_content, patched = self.patch_content(content, file_path)
             if patched:
                 with open(file_path, "w", encoding="utf-8") as f:
                     f.write(new_content)
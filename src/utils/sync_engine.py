@@ -1,4 +1,6 @@
 import logging
+import os
+import selectors
 import shutil
 import subprocess
 import threading
@@ -7,6 +9,129 @@ from pathlib import Path
 from typing import Dict, List
 
 
+class _RelPath:
+    """Defers Path.relative_to until a debug record is actually formatted."""
+
+    __slots__ = ("path", "root")
+
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+
+    def __str__(self) -> str:
+        return str(self.path.relative_to(self.root))
+
+
+class _Aapt2Daemon:
+    """A single `aapt2 daemon` process answering `dump packagename` requests.
+
+    Each request is the argument list one per line followed by an empty line;
+    aapt2 answers on stdout and reports completion ("Error" then "Done" on
+    failure, just "Done" otherwise) on stderr. Saves one process start per APK.
+
+    Both pipes are drained through a selector with a deadline, so a stalled
+    daemon (or one blocked on a full pipe) raises TimeoutError instead of
+    hanging the sync; any OSError kills the daemon and callers fall back to
+    one-shot `aapt2 dump packagename` runs.
+    """
+
+    START_TIMEOUT = 10.0
+    REQUEST_TIMEOUT = 30.0
+
+    def __init__(self, aapt2: str):
+        self.proc = subprocess.Popen(
+            [aapt2, "daemon"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        self._out = self.proc.stdout.fileno()
+        self._err = self.proc.stderr.fileno()
+        self._bufs = {self._out: bytearray(), self._err: bytearray()}
+        self._selector = selectors.DefaultSelector()
+        self._released = False
+        self._selector.register(self._out, selectors.EVENT_READ)
+        self._selector.register(self._err, selectors.EVENT_READ)
+        try:
+            ready = self._next_line(self._out, time.monotonic() + self.START_TIMEOUT)
+        except OSError:
+            self.kill()
+            raise
+        if ready.strip() != "Ready":
+            self.kill()
+            raise OSError("aapt2 daemon did not start")
+
+    def dump_packagename(self, apk_path: Path) -> str:
+        if self.proc.returncode is not None:
+            raise OSError("aapt2 daemon is not running")
+        args = ["dump", "packagename", str(apk_path)]
+        try:
+            self.proc.stdin.write(("\n".join(args) + "\n\n").encode())
+            deadline = time.monotonic() + self.REQUEST_TIMEOUT
+
+            failed = False
+            messages = []
+            while (line := self._next_line(self._err, deadline)) != "Done\n":
+                if line == "Error\n":
+                    failed = True
+                else:
+                    messages.append(line)
+            if failed:
+                self._bufs[self._out].clear()
+                raise subprocess.CalledProcessError(1, args, stderr="".join(messages))
+            return self._next_line(self._out, deadline)
+        except OSError:
+            self.kill()
+            raise
+
+    def _next_line(self, fd: int, deadline: float) -> str:
+        """Next line from fd, reading both pipes as data arrives until deadline."""
+        buf = self._bufs[fd]
+        while (end := buf.find(b"\n")) < 0:
+            if fd not in self._selector.get_map():
+                raise OSError("aapt2 daemon exited unexpectedly")
+            remaining = deadline - time.monotonic()
+            events = self._selector.select(remaining) if remaining > 0 else []
+            if not events:
+                raise TimeoutError("aapt2 daemon did not answer in time")
+            for key, _ in events:
+                data = os.read(key.fd, 65536)
+                if data:
+                    self._bufs[key.fd] += data
+                else:
+                    self._selector.unregister(key.fd)
+        line = bytes(buf[: end + 1])
+        del buf[: end + 1]
+        return line.decode(errors="replace")
+
+    def kill(self) -> None:
+        if self.proc.returncode is None:
+            self.proc.kill()
+            self.proc.wait()
+        self._release()
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+            self.proc.wait()
+        self._release()
+
+    def _release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._selector.close()
+        for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
 class ROMSyncEngine:
     def __init__(self, context, logger: logging.Logger):
         self.ctx = context
@@ -67,11 +192,9 @@ class ROMSyncEngine:
         Execute all ROM porting and trimming rules
         Supported modes: file_to_dir, file_to_file, dir_to_dir, hexpatch, prop_append, delete
         """
-        # Lazy load global cache
-        if source_dir and not self._stock_rom_cache:
-            self._stock_rom_cache = self._build_cache(source_dir)
-        if target_dir and not self._target_rom_cache:
-            self._target_rom_cache = self._build_cache(target_dir)
+        # Index each tree once; every rule (and later overrides) resolves against it
+        stock_rom_cache = self._get_rom_cache(source_dir) if source_dir else {}
+        target_rom_cache = self._get_rom_cache(target_dir) if target_dir else {}
 
         self.logger.info(f"Executing {len(rules)} porting rules...")
 
@@ -84,8 +207,8 @@ class ROMSyncEngine:
 
             # 1. Process modes requiring source file copy
             if mode in ["file_to_dir", "file_to_file", "dir_to_dir"]:
-                src_matches = self._get_matches(self._stock_rom_cache, src_name)
-                tgt_matches = self._get_matches(self._target_rom_cache, tgt_name)
+                src_matches = self._get_matches(stock_rom_cache, src_name)
+                tgt_matches = self._get_matches(target_rom_cache, tgt_name)
 
                 if not src_matches:
                     self.logger.warning(f"     [!] Source '{src_name}' not found. Skipped.")
@@ -101,24 +224,24 @@ class ROMSyncEngine:
                         if tgt_match.is_dir():
                             shutil.copy2(src_match, tgt_match)
                             self.logger.debug(
-                                f"     [+] Copied to {tgt_match.relative_to(target_dir)}"
+                                "     [+] Copied to %s", _RelPath(tgt_match, target_dir)
                             )
                     elif mode == "file_to_file":
                         shutil.copy2(src_match, tgt_match)
-                        self.logger.debug(f"     [+] Replaced {tgt_match.relative_to(target_dir)}")
+                        self.logger.debug("     [+] Replaced %s", _RelPath(tgt_match, target_dir))
                     elif mode == "dir_to_dir":
                         if tgt_match.exists():
                             shutil.rmtree(tgt_match)
                         shutil.copytree(src_match, tgt_match)
                         self.logger.debug(
-                            f"     [+] Replaced dir {tgt_match.relative_to(target_dir)}"
+                            "     [+] Replaced dir %s", _RelPath(tgt_match, target_dir)
                         )
                 except Exception as e:
                     self.logger.error(f"     [X] Error syncing {src_name}: {e}")
 
             # 2. Process modes modifying target file (HexPatch)
             elif mode == "hexpatch":
-                tgt_matches = self._get_matches(self._target_rom_cache, tgt_name)
+                tgt_matches = self._get_matches(target_rom_cache, tgt_name)
                 if not tgt_matches:
                     self.logger.warning(f"     [!] Target '{tgt_name}' not found for hexpatch.")
                     continue
@@ -133,9 +256,7 @@ class ROMSyncEngine:
                             rule["hex_new"],
                         ]
                         subprocess.run(cmd, check=True, capture_output=True)
-                        self.logger.debug(
-                            f"     [+] HexPatched {tgt_match.relative_to(target_dir)}"
-                        )
+                        self.logger.debug("     [+] HexPatched %s", _RelPath(tgt_match, target_dir))
                     except subprocess.CalledProcessError as e:
                         self.logger.error(
                             f"     [X] Magiskboot failed on {tgt_match.name}: {e.stderr.decode('utf-8', errors='ignore')}"
@@ -143,7 +264,7 @@ class ROMSyncEngine:
 
             # 3. Process property append mode (Build.prop)
             elif mode == "prop_append":
-                tgt_matches = self._get_matches(self._target_rom_cache, tgt_name)
+                tgt_matches = self._get_matches(target_rom_cache, tgt_name)
                 if not tgt_matches:
                     self.logger.warning(f"     [!] Target '{tgt_name}' not found for prop append.")
                     continue
@@ -153,31 +274,34 @@ class ROMSyncEngine:
                     with open(tgt_match, "a", encoding="utf-8") as f:
                         f.write("\n" + "\n".join(rule["lines"]) + "\n")
                     self.logger.debug(
-                        f"     [+] Appended props to {tgt_match.relative_to(target_dir)}"
+                        "     [+] Appended props to %s", _RelPath(tgt_match, target_dir)
                     )
                 except Exception as e:
                     self.logger.error(f"     [X] Error writing props: {e}")
 
             # 4. Process delete mode (Trim bloatware)
             elif mode == "delete":
-                tgt_matches = self._get_matches(self._target_rom_cache, tgt_name)
+                tgt_matches = self._get_matches(target_rom_cache, tgt_name)
                 if not tgt_matches:
                     self.logger.debug(
-                        f"     [!] Target '{tgt_name}' already absent or not found. Skipped."
+                        "     [!] Target '%s' already absent or not found. Skipped.", tgt_name
                     )
                     continue
 
                 for tgt_match in tgt_matches:
+                    # An earlier rule may already have removed it or a parent directory
+                    if not tgt_match.exists():
+                        continue
                     try:
                         if tgt_match.is_dir():
                             shutil.rmtree(tgt_match)
                             self.logger.debug(
-                                f"     [-] Removed directory {tgt_match.relative_to(target_dir)}"
+                                "     [-] Removed directory %s", _RelPath(tgt_match, target_dir)
                             )
                         else:
                             tgt_match.unlink()
                             self.logger.debug(
-                                f"     [-] Removed file {tgt_match.relative_to(target_dir)}"
+                                "     [-] Removed file %s", _RelPath(tgt_match, target_dir)
                             )
                     except Exception as e:
                         self.logger.error(f"     [X] Error deleting {tgt_match.name}: {e}")
@@ -220,7 +344,7 @@ class ROMSyncEngine:
                     tgt_matches = package_cache.get(override_pkg_name, [])
                     if tgt_matches:
                         self.logger.debug(
-                            f"     [!] Found target by Package Name: {override_pkg_name}"
+                            "     [!] Found target by Package Name: %s", override_pkg_name
                         )
 
                 # [Fallback] If aapt2 fails or pkg name not found, fallback to filename search
@@ -270,7 +394,8 @@ class ROMSyncEngine:
                         # Only delete specific independent App folder, prevent accidental deletion of root dirs like system/app
                         if old_dir.name not in protected_dirs:
                             self.logger.debug(
-                                f"     [-] Erasing old APK directory: {old_dir.relative_to(target_dir)}"
+                                "     [-] Erasing old APK directory: %s",
+                                _RelPath(old_dir, target_dir),
                             )
                             try:
                                 shutil.rmtree(old_dir)
@@ -283,7 +408,8 @@ class ROMSyncEngine:
                                 old_file.unlink()
                 else:
                     self.logger.debug(
-                        f"     [!] New APK '{override_file.name}' not found in target. Will inject as new."
+                        "     [!] New APK '%s' not found in target. Will inject as new.",
+                        override_file.name,
                     )
             else:
                 tgt_matches = rom_cache.get(file_name_lower, [])
@@ -304,9 +430,12 @@ class ROMSyncEngine:
 
         self.logger.info(f"Successfully applied {override_count} overrides.")
 
-    def _get_apk_package_name(self, apk_path: Path) -> str | None:
+    def _get_apk_package_name(
+        self, apk_path: Path, daemon: _Aapt2Daemon | None = None
+    ) -> str | None:
         """
         Use aapt2 to parse APK package name (extremely fast)
+        A running aapt2 daemon is used when given, instead of one aapt2 process per APK.
         """
         # Safely get aapt2 path from context
         aapt2 = getattr(getattr(self.ctx, "tools", None), "aapt2", None)
@@ -316,8 +445,16 @@ class ROMSyncEngine:
 
         cmd = [str(aapt2), "dump", "packagename", str(apk_path)]
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            output = result.stdout.strip()
+            output = None
+            # The daemon protocol is line based, so odd paths take the one-shot route
+            if daemon is not None and "\n" not in str(apk_path):
+                try:
+                    output = daemon.dump_packagename(apk_path).strip()
+                except OSError:
+                    output = None
+            if output is None:
+                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+                output = result.stdout.strip()
 
             # Handle different aapt2 output formats
             if "package: name=" in output:
@@ -352,20 +489,37 @@ class ROMSyncEngine:
 
             package_cache = {}
             apk_count = 0
-            # Only scan .apk files, skip .odex, .vdex etc.
-            for apk_path in directory.rglob("*.apk"):
-                pkg_name = self._get_apk_package_name(apk_path)
-                if pkg_name:
-                    if pkg_name not in package_cache:
-                        package_cache[pkg_name] = []
-                    package_cache[pkg_name].append(apk_path)
-                    apk_count += 1
+            daemon = self._start_aapt2_daemon()
+            try:
+                # Only scan .apk files, skip .odex, .vdex etc.
+                for apk_path in directory.rglob("*.apk"):
+                    pkg_name = self._get_apk_package_name(apk_path, daemon)
+                    if pkg_name:
+                        if pkg_name not in package_cache:
+                            package_cache[pkg_name] = []
+                        package_cache[pkg_name].append(apk_path)
+                        apk_count += 1
+            finally:
+                if daemon is not None:
+                    daemon.close()
 
             self._package_caches[dir_key] = package_cache
 
             elapsed = time.time() - start_time
             self.logger.info(f"Package cache built in {elapsed:.2f}s. Indexed {apk_count} APKs.")
 
+    def _start_aapt2_daemon(self) -> _Aapt2Daemon | None:
+        """Start an aapt2 daemon for bulk lookups; None if aapt2 is unavailable."""
+        aapt2 = getattr(getattr(self.ctx, "tools", None), "aapt2", None)
+        # Selectors only watch pipes on POSIX
+        if not aapt2 or os.name == "nt":
+            return None
+        try:
+            return _Aapt2Daemon(str(aapt2))
+        except OSError as e:
+            self.logger.debug(f"aapt2 daemon unavailable, using one-shot calls: {e}")
+            return None
+
     def _get_rom_cache(self, directory: Path) -> Dict:
         """Get or build ROM cache for specific directory."""
         dir_key = str(directory.resolve())
@@ -0,0 +1,48 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.modifiers.plugins.apk.devices_overlay import DevicesOverlayModifier
+
+DOZE_SERVICE = "com.android.systemui/com.android.keyguard.doze.MiuiDozeService"
+
+
+@pytest.fixture
+def overlay_workdir(tmp_path: Path):
+    """Decoded overlay tree with one config.xml to patch and one unrelated strings.xml."""
+    values = tmp_path / "res" / "values"
+    values.mkdir(parents=True)
+    config = values / "config.xml"
+    config.write_text(
+        '<resources>\n    <string name="config_dozeComponent">com.old/Doze</string>\n'
+        '    <string name="other">x</string>\n</resources>\n',
+        encoding="utf-8",
+    )
+    strings = values / "strings.xml"
+    strings.write_text('<resources><string name="a">b</string></resources>', encoding="utf-8")
+    return tmp_path, config, strings
+
+
+def test_apply_patches_rewrites_only_doze_component(overlay_workdir):
+    work_dir, config, strings = overlay_workdir
+    mtime = strings.stat().st_mtime_ns
+
+    DevicesOverlayModifier(SimpleNamespace())._apply_patches(work_dir)
+
+    assert f'<string name="config_dozeComponent">{DOZE_SERVICE}</string>' in config.read_text(
+        encoding="utf-8"
+    )
+    assert '<string name="other">x</string>' in config.read_text(encoding="utf-8")
+    assert strings.stat().st_mtime_ns == mtime
+
+
+@pytest.mark.parametrize(
+    "version,should_patch",
+    [("15", True), ("15.0", True), ("16", False), ("17", False), ("Unknown", True)],
+)
+def test_check_prerequisites_gates_on_android_version(monkeypatch, version, should_patch):
+    modifier = DevicesOverlayModifier(SimpleNamespace(base_android_version=version))
+    monkeypatch.setattr(modifier, "_find_apk", lambda: Path("DevicesAndroidOverlay.apk"))
+
+    assert modifier.check_prerequisites() is should_patch
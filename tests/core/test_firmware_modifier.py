@@ -1,6 +1,9 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from types import SimpleNamespace
 
+from src.core.modifiers import firmware_modifier
 from src.core.modifiers.firmware_modifier import FirmwareModifier
 
 
@@ -32,3 +35,93 @@ def test_patch_vbmeta_sets_avb_flags_to_one(tmp_path: Path):
 
     patched = vbmeta_img.read_bytes()
     assert patched[123] == 0x01
+
+
+def test_patch_vbmeta_patches_every_vbmeta_image(tmp_path: Path):
+    ctx = _build_context(tmp_path)
+    repack_images = ctx.target_dir / "repack_images"
+
+    payload = bytearray(256)
+    payload[0:4] = b"AVB0"
+    for name in ("vbmeta.img", "vbmeta_system.img", "vbmeta_vendor.img"):
+        (repack_images / name).write_bytes(payload)
+    (repack_images / "vbmeta_bad.img").write_bytes(bytes(256))
+
+    FirmwareModifier(ctx)._patch_vbmeta()
+
+    for name in ("vbmeta.img", "vbmeta_system.img", "vbmeta_vendor.img"):
+        assert (repack_images / name).read_bytes()[123] == 0x01
+    assert (repack_images / "vbmeta_bad.img").read_bytes() == bytes(256)
+
+
+def test_patch_vbmeta_skips_non_avb_image_without_stopping_the_pool(
+    tmp_path: Path, monkeypatch, caplog
+):
+    ctx = _build_context(tmp_path)
+    repack_images = ctx.target_dir / "repack_images"
+    payload = bytearray(256)
+    payload[0:4] = b"AVB0"
+    for name in ("vbmeta.img", "vbmeta_system.img"):
+        (repack_images / name).write_bytes(payload)
+    # Sorts between the two valid images, so it is handed out mid-pool
+    (repack_images / "vbmeta_odm.img").write_bytes(b"ANDROID!" + bytes(248))
+
+    pools = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            pools.append(max_workers)
+            super().__init__(max_workers=max_workers)
+
+    monkeypatch.setattr(firmware_modifier, "ThreadPoolExecutor", RecordingPool)
+    with caplog.at_level(logging.INFO):
+        FirmwareModifier(ctx)._patch_vbmeta()
+
+    assert pools == [3]
+    assert (repack_images / "vbmeta_odm.img").read_bytes() == b"ANDROID!" + bytes(248)
+    for name in ("vbmeta.img", "vbmeta_system.img"):
+        assert (repack_images / name).read_bytes()[123] == 0x01
+    assert "Skipping vbmeta_odm.img: Invalid AVB Magic" in caplog.text
+
+
+def test_patch_vbmeta_warns_when_no_vbmeta_images(tmp_path: Path, caplog):
+    with caplog.at_level(logging.WARNING):
+        FirmwareModifier(_build_context(tmp_path))._patch_vbmeta()
+
+    assert "No vbmeta*.img found in repack_images directory." in caplog.text
+
+
+def test_apply_ksu_patch_batches_cpio_edits(tmp_path: Path):
+    ctx = _build_context(tmp_path)
+    boot_img = ctx.target_dir / "repack_images" / "init_boot.img"
+    boot_img.write_bytes(b"old")
+
+    modifier = FirmwareModifier(ctx)
+    modifier.assets_dir = tmp_path / "assets"
+    modifier.assets_dir.mkdir()
+    (modifier.assets_dir / "ksuinit").write_bytes(b"init")
+    (modifier.assets_dir / "android14-6.1_kernelsu.ko").write_bytes(b"ko")
+
+    calls = []
+
+    def fake_run(cmd, cwd=None):
+        calls.append(cmd[1:])
+        if cmd[1] == "unpack":
+            (cwd / "ramdisk.cpio").write_bytes(b"")
+        elif cmd[1] == "repack":
+            (cwd / "new-boot.img").write_bytes(b"new")
+
+    modifier.shell.run = fake_run
+    modifier._apply_ksu_patch(boot_img, "android14-6.1")
+
+    cpio_calls = [c for c in calls if c[0] == "cpio"]
+    assert cpio_calls == [
+        [
+            "cpio",
+            "ramdisk.cpio",
+            "mv init init.real",
+            "add 0755 init init",
+            "add 0755 kernelsu.ko kernelsu.ko",
+        ]
+    ]
+    assert boot_img.read_bytes() == b"new"
@@ -0,0 +1,200 @@
+"""Unit tests for FrameworkModifierBase smali helpers."""
+
+import os
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.modifiers.framework.base import FrameworkModifierBase
+from src.core.modifiers.framework.patches import PLATFORM_SIG_FIELD, PLATFORM_SIG_REF
+from src.core.modifiers.framework.tasks import FrameworkTasks
+
+SMALI = """.class public Lcom/example/Target;
+.super Ljava/lang/Object;
+
+.method public static check()Z
+    .locals 1
+    const/4 v0, 0x0
+    return v0
+.end method
+"""
+
+
+@pytest.fixture
+def modifier(tmp_path):
+    context = SimpleNamespace(target_dir=tmp_path / "target")
+    return FrameworkModifierBase(context)
+
+
+def test_run_smalikit_buffers_edits_until_flush(modifier, tmp_path):
+    smali = tmp_path / "work" / "com" / "example" / "Target.smali"
+    smali.parent.mkdir(parents=True)
+    smali.write_text(SMALI, encoding="utf-8")
+
+    modifier._run_smalikit(
+        path=str(tmp_path / "work"),
+        iname="Target.smali",
+        method="check",
+        remake=".locals 1\n    const/4 v0, 0x1\n    return v0",
+    )
+    modifier._replace_text_in_file(smali, ".locals 1", ".locals 2")
+
+    assert smali.read_text(encoding="utf-8") == SMALI
+    assert "const/4 v0, 0x1" in modifier._read_smali(smali)
+
+    modifier._flush_pending(tmp_path / "work")
+
+    content = smali.read_text(encoding="utf-8")
+    assert "const/4 v0, 0x1" in content
+    assert ".locals 2" in content
+    assert modifier._pending == {}
+
+
+def test_run_smalikit_skips_files_that_fail_and_reuses_the_listing(modifier, tmp_path, monkeypatch):
+    work_dir = tmp_path / "work"
+    for name in ("ATarget.smali", "BTarget.smali"):
+        (work_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (work_dir / name).write_text(SMALI, encoding="utf-8")
+    real_read = modifier._read_smali
+
+    def flaky_read(path):
+        if path.name == "ATarget.smali":
+            raise UnicodeError("broken")
+        return real_read(path)
+
+    monkeypatch.setattr(modifier, "_read_smali", flaky_read)
+    remake = ".locals 1\n    const/4 v0, 0x1\n    return v0"
+    modifier._run_smalikit(path=str(work_dir), iname="Target.smali", method="check", remake=remake)
+
+    assert "const/4 v0, 0x1" in real_read(work_dir / "BTarget.smali")
+    assert work_dir / "ATarget.smali" not in modifier._pending
+
+    walks = []
+    monkeypatch.setattr(os, "walk", lambda *a: walks.append(a) or iter(()))
+    modifier._run_smalikit(path=str(work_dir), iname="BTarget.smali", method="check", remake=remake)
+    assert walks == []
+
+
+def test_flush_pending_only_touches_given_root(modifier, tmp_path):
+    first = tmp_path / "a" / "A.smali"
+    second = tmp_path / "b" / "B.smali"
+    for path in (first, second):
+        path.parent.mkdir(parents=True)
+        path.write_text(SMALI, encoding="utf-8")
+        modifier._write_smali(path, "patched")
+
+    modifier._flush_pending(tmp_path / "a")
+
+    assert first.read_text(encoding="utf-8") == "patched"
+    assert second.read_text(encoding="utf-8") == SMALI
+    assert second in modifier._pending
+
+
+def test_flush_pending_skips_unmodified_reads(modifier, tmp_path):
+    smali = tmp_path / "Target.smali"
+    smali.write_text(SMALI, encoding="utf-8")
+    modifier._read_smali(smali)
+    mtime = smali.stat().st_mtime_ns
+
+    modifier._flush_pending()
+
+    assert smali.stat().st_mtime_ns == mtime
+    assert modifier._pending == {}
+
+
+EPM_SMALI = """.class public Lmiui/content/pm/ExtraPackageManager;
+.super Ljava/lang/Object;
+
+.method public static isTrustedPlatformSignature([Landroid/content/pm/Signature;)Z
+    .locals 1
+    const/4 v0, 0x0
+    return v0
+.end method
+"""
+
+
+@pytest.mark.parametrize(
+    "clinit",
+    [
+        "",
+        "\n.method static constructor <clinit>()V\n    .locals 0\n    return-void\n.end method\n",
+    ],
+)
+def test_custom_platform_key_builds_signature_once(modifier, tmp_path, clinit):
+    tasks = FrameworkTasks(modifier.ctx)
+    smali = tmp_path / "work" / "ExtraPackageManager.smali"
+    smali.parent.mkdir(parents=True)
+    smali.write_text(EPM_SMALI + clinit, encoding="utf-8")
+
+    tasks._integrate_custom_platform_key(tmp_path / "work")
+    content = tasks._read_smali(smali)
+
+    assert content.count(PLATFORM_SIG_FIELD) == 1
+    assert content.count("constructor <clinit>()V") == 1
+    assert content.count(f"sput-object v0, {PLATFORM_SIG_REF}") == 1
+    assert f"sget-object v3, {PLATFORM_SIG_REF}" in content
+    assert content.count("const-string") == 1
+    clinit_body = content.split("constructor <clinit>()V", 1)[1]
+    assert ".locals 2" in clinit_body.split(".end method", 1)[0]
+
+
+def test_find_cached_reuses_index_until_classes_are_added(modifier, tmp_path):
+    work_dir = tmp_path / "work"
+    (work_dir / "smali" / "classes" / "android").mkdir(parents=True)
+    first = work_dir / "smali" / "classes" / "android" / "Instrumentation.smali"
+    first.write_text(SMALI, encoding="utf-8")
+
+    assert modifier._find_cached(work_dir, "Instrumentation.smali") == first
+    assert modifier._find_cached(work_dir, "HookHelper.smali") is None
+
+    extra = tmp_path / "extra" / "com"
+    extra.mkdir(parents=True)
+    (extra / "HookHelper.smali").write_text(SMALI, encoding="utf-8")
+    modifier._copy_to_next_classes(work_dir, tmp_path / "extra")
+
+    assert modifier._find_cached(work_dir, "HookHelper.smali") == (
+        work_dir / "smali" / "classes2" / "com" / "HookHelper.smali"
+    )
+
+
+INVOKE_SMALI = """.method public newApplication(Ljava/lang/Class;Landroid/content/Context;)Landroid/app/Application;
+    .locals 1
+    invoke-virtual {v0, p2}, Landroid/app/Application;->attach(Landroid/content/Context;)V
+    return-object v0
+.end method
+"""
+
+
+@pytest.mark.parametrize("arg_index,expected", [(0, "v0"), (1, "p2"), (2, None)])
+def test_extract_register_from_invoke(modifier, arg_index, expected):
+    reg = modifier._extract_register_from_invoke(
+        INVOKE_SMALI,
+        "newApplication(Ljava/lang/Class;Landroid/content/Context;)Landroid/app/Application;",
+        "Landroid/app/Application;->attach(Landroid/content/Context;)V",
+        arg_index=arg_index,
+    )
+
+    assert reg == expected
+
+
+def test_apply_pif_patch_streams_non_class_entries_into_target(modifier, tmp_path):
+    tasks = FrameworkTasks(modifier.ctx)
+    target_dir = modifier.ctx.target_dir
+    (target_dir / "vendor" / "app").mkdir(parents=True)
+    (target_dir / "vendor" / "app" / "PIF.apk").write_bytes(b"old")
+    work_dir = tmp_path / "work"
+    (work_dir / "smali" / "classes").mkdir(parents=True)
+
+    pif_zip = tmp_path / "pif.zip"
+    with zipfile.ZipFile(pif_zip, "w") as z:
+        z.writestr("classes/com/Utils.smali", SMALI)
+        z.writestr("system/system/bin/pif-updater", b"bin")
+        z.writestr("vendor/app/PIF.apk", b"new")
+
+    tasks._apply_pif_patch(work_dir, pif_zip)
+
+    assert (target_dir / "system/system/bin/pif-updater").read_bytes() == b"bin"
+    assert (target_dir / "vendor/app/PIF.apk").read_bytes() == b"new"
+    assert not (tasks.temp_dir / "pif_classes" / "system").exists()
+    assert (work_dir / "smali" / "classes2" / "com" / "Utils.smali").exists()
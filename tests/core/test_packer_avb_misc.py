@@ -88,6 +88,24 @@ def test_sync_partition_info_from_stock_avb(monkeypatch, tmp_path: Path) -> None
     assert '"avb_strict_partitions": [' in content
 
 
+def test_generate_meta_info_uses_given_partition_list(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.chdir(tmp_path)
+    ctx = SimpleNamespace(
+        stock_rom_code="pudding",
+        device_config={"pack": {"super_size": 13411287040}},
+    )
+    repacker = Repacker(ctx)
+    monkeypatch.setattr(repacker, "_build_avb_misc_lines_from_stock", lambda _parts: [])
+
+    repacker._generate_meta_info(["vendor", "boot", "system"])
+
+    meta = tmp_path / "out/target/product/pudding/META"
+    assert (meta / "ab_partitions.txt").read_text(encoding="utf-8") == "boot\nsystem\nvendor\n"
+    assert "partition_list=vendor system\n" in (meta / "dynamic_partitions_info.txt").read_text(
+        encoding="utf-8"
+    )
+
+
 def test_generate_meta_info_includes_avb_lines(monkeypatch, tmp_path: Path) -> None:
     monkeypatch.chdir(tmp_path)
     images_out = tmp_path / "out/target/product/pudding/IMAGES"
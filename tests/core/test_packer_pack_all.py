@@ -0,0 +1,262 @@
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.packer import Repacker, _file_md5
+
+
+def test_pack_all_patches_then_builds_every_partition(tmp_path: Path, monkeypatch, caplog) -> None:
+    target_dir = tmp_path / "target"
+    config_dir = target_dir / "config"
+    for part in ("system", "vendor"):
+        (target_dir / part / "etc").mkdir(parents=True)
+    config_dir.mkdir()
+    (config_dir / "system_fs_config").write_text("/ 0 0 0755\n", encoding="utf-8")
+
+    ctx = SimpleNamespace(
+        stock_rom_code="pudding", target_dir=target_dir, target_config_dir=config_dir
+    )
+    repacker = Repacker(ctx)
+
+    built = []
+    monkeypatch.setattr(
+        repacker, "_build_image", lambda part, pack_type, is_rw, **kw: built.append(part)
+    )
+    with caplog.at_level(logging.WARNING, logger="Packer"):
+        repacker.pack_all("EROFS")
+
+    assert sorted(built) == ["system", "vendor"]
+    assert "system/etc" in (config_dir / "system_fs_config").read_text(encoding="utf-8")
+    # Logged inside a patch worker process
+    assert "fs_config not found for vendor, skipping fspatch." in caplog.messages
+
+
+def test_get_dir_size_matches_du(tmp_path: Path) -> None:
+    root = tmp_path / "vendor"
+    (root / "lib" / "modules").mkdir(parents=True)
+    (root / "lib" / "modules" / "a.ko").write_bytes(b"x" * 5000)
+    (root / "build.prop").write_bytes(b"y" * 123)
+    os.link(root / "build.prop", root / "build.prop.link")
+    (root / "etc").symlink_to("lib")
+
+    repacker = Repacker(SimpleNamespace(stock_rom_code="pudding"))
+    expected = int(subprocess.check_output(["du", "-sb", str(root)], text=True).split()[0])
+
+    assert repacker._get_dir_size(root) == expected
+
+
+def _ext4_repacker(tmp_path: Path, monkeypatch, free_blocks: int):
+    repacker = Repacker(SimpleNamespace(stock_rom_code="pudding"))
+    repacker.out_dir = tmp_path / "out"
+    calls = []
+
+    def fake_run(cmd, check=True, capture_output=False):
+        calls.append(cmd[0])
+        if cmd[0] == "mke2fs":
+            Path(cmd[-2]).write_bytes(b"\0" * 4096 * 8)
+        return SimpleNamespace(returncode=0)
+
+    monkeypatch.setattr(repacker.shell, "run", fake_run)
+    monkeypatch.setattr(repacker, "_get_dir_size", lambda _path: 4096 * 4)
+    monkeypatch.setattr(repacker, "_get_free_blocks", lambda _img: free_blocks)
+    return repacker, calls
+
+
+def test_pack_ext4_reuses_learned_size_for_single_pass(tmp_path: Path, monkeypatch) -> None:
+    src_dir = tmp_path / "vendor"
+    src_dir.mkdir()
+    img = tmp_path / "vendor.img"
+    fs_config, file_contexts = tmp_path / "fs_config", tmp_path / "file_contexts"
+
+    repacker, calls = _ext4_repacker(tmp_path, monkeypatch, free_blocks=3)
+    repacker._pack_ext4("vendor", src_dir, img, fs_config, file_contexts, False)
+    assert calls.count("mke2fs") == 2
+
+    repacker, calls = _ext4_repacker(tmp_path, monkeypatch, free_blocks=3)
+    assert repacker._predict_ext4_size("vendor", 4096 * 4) == 4096 * 9
+    repacker._pack_ext4("vendor", src_dir, img, fs_config, file_contexts, False)
+    assert calls.count("mke2fs") == 1
+
+
+@pytest.mark.skipif(shutil.which("mke2fs") is None, reason="mke2fs not available")
+@pytest.mark.parametrize("features", [[], ["-O", "64bit"]])
+def test_get_free_blocks_matches_tune2fs(tmp_path: Path, features) -> None:
+    img = tmp_path / "vendor.img"
+    subprocess.run(
+        ["mke2fs", "-q", "-F", "-t", "ext4", "-b", "4096", *features, str(img), "2048"],
+        check=True,
+    )
+    output = subprocess.check_output(["tune2fs", "-l", str(img)], text=True)
+    expected = next(
+        int(line.split(":")[1]) for line in output.splitlines() if "Free blocks:" in line
+    )
+
+    repacker = Repacker(SimpleNamespace(stock_rom_code="pudding"))
+
+    assert repacker._get_free_blocks(img) == expected
+    assert repacker._get_free_blocks(tmp_path / "missing.img") == 0
+
+
+def test_file_md5_streams_large_files(tmp_path: Path) -> None:
+    payload = os.urandom(3 * 1024 * 1024 + 5)
+    path = tmp_path / "ota.zip"
+    path.write_bytes(payload)
+
+    assert _file_md5(path) == hashlib.md5(payload).hexdigest()
+
+
+def test_patch_script_for_a_only_strips_slot_suffixes(tmp_path: Path) -> None:
+    script = tmp_path / "flash.sh"
+    script.write_text(
+        "fastboot flash boot_a boot.img\nfastboot flash dtbo_b dtbo.img\nfastboot reboot\n",
+        encoding="utf-8",
+    )
+
+    Repacker(SimpleNamespace(stock_rom_code="pudding"))._patch_script_for_a_only(script)
+
+    assert script.read_text(encoding="utf-8") == (
+        "fastboot flash boot boot.img\nfastboot flash dtbo dtbo.img\nfastboot reboot"
+    )
+
+
+def test_get_super_size_uses_builtin_map_once(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.chdir(tmp_path)
+    repacker = Repacker(SimpleNamespace(stock_rom_code="yudi"))
+
+    assert repacker._get_super_size() == 11811160064
+    repacker.ctx.stock_rom_code = "unknown"
+    assert repacker._get_super_size() == 11811160064
+
+
+def test_firmware_partitions_maps_names_and_skips_images(tmp_path: Path) -> None:
+    fw_dir = tmp_path / "firmware-update"
+    fw_dir.mkdir()
+    for name in ("NON-HLOS.bin", "xbl.elf", "dtbo.img", "boot.img"):
+        (fw_dir / name).write_bytes(b"")
+    repacker = Repacker(SimpleNamespace(stock_rom_code="pudding", is_ab_device=False))
+
+    parts = repacker._firmware_partitions(fw_dir)
+    assert sorted(parts) == [("NON-HLOS.bin", "modem"), ("xbl.elf", "xbl")]
+    assert repacker._firmware_partitions(tmp_path / "missing") is None
+
+    script = tmp_path / "flash.sh"
+    script.write_text("# firmware\nfastboot reboot\n", encoding="utf-8")
+    repacker._patch_script_for_firmware(script, fw_dir, parts)
+    assert "fastboot flash modem firmware-update/NON-HLOS.bin" in script.read_text(encoding="utf-8")
+
+
+def test_compress_super_uses_zstandard_when_available(tmp_path: Path, monkeypatch) -> None:
+    import src.core.packer as packer
+
+    class FakeCompressor:
+        def __init__(self, threads):
+            assert threads == -1
+
+        def copy_stream(self, fin, fout, read_size, write_size):
+            fout.write(b"zst:" + fin.read())
+
+    monkeypatch.setattr(packer, "zstandard", SimpleNamespace(ZstdCompressor=FakeCompressor))
+    super_img = tmp_path / "super.img"
+    super_img.write_bytes(b"super")
+    zst_path = tmp_path / "super.zst"
+
+    Repacker(SimpleNamespace(stock_rom_code="pudding"))._compress_super(super_img, zst_path)
+
+    assert zst_path.read_bytes() == b"zst:super"
+    assert not super_img.exists()
+
+
+def test_compress_super_reports_zstandard_errors_as_oserror(tmp_path: Path, monkeypatch) -> None:
+    import src.core.packer as packer
+
+    class ZstdError(Exception):
+        pass
+
+    class FailingCompressor:
+        def __init__(self, threads):
+            pass
+
+        def copy_stream(self, fin, fout, read_size, write_size):
+            fout.write(b"partial")
+            raise ZstdError("out of memory")
+
+    monkeypatch.setattr(
+        packer, "zstandard", SimpleNamespace(ZstdCompressor=FailingCompressor, ZstdError=ZstdError)
+    )
+    super_img = tmp_path / "super.img"
+    super_img.write_bytes(b"super")
+    zst_path = tmp_path / "super.zst"
+
+    with pytest.raises(OSError, match="out of memory"):
+        Repacker(SimpleNamespace(stock_rom_code="pudding"))._compress_super(super_img, zst_path)
+
+    assert not zst_path.exists()
+    assert super_img.exists()
+
+
+@pytest.mark.parametrize("help_text,expected", [("--workers=#", "--workers=3"), ("usage", None)])
+def test_pack_erofs_passes_compression_and_workers(tmp_path: Path, help_text, expected) -> None:
+    repacker = Repacker(SimpleNamespace(stock_rom_code="pudding"))
+    calls = []
+
+    def fake_run(cmd, check=True, capture_output=False):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, help_text, "")
+
+    repacker.shell.run = fake_run
+    for _ in range(2):
+        repacker._pack_erofs(
+            "system",
+            tmp_path,
+            tmp_path / "system.img",
+            tmp_path / "fs",
+            tmp_path / "fc",
+            "zstd,19",
+            3,
+        )
+
+    builds = [cmd for cmd in calls if "--help" not in cmd]
+    assert len(calls) - len(builds) == 1
+    assert builds[0][:2] == ["mkfs.erofs", "-zzstd,19"]
+    assert (expected in builds[0]) if expected else not any("--workers" in a for a in builds[0])
+
+
+@pytest.mark.parametrize("free_blocks,resized", [(0, False), (5, True)])
+def test_shrink_ext4_skips_full_images(tmp_path: Path, free_blocks, resized) -> None:
+    img = tmp_path / "vendor.img"
+    sb = bytearray(1024)
+    sb[0x0C:0x10] = free_blocks.to_bytes(4, "little")
+    sb[0x38:0x3A] = (0xEF53).to_bytes(2, "little")
+    img.write_bytes(bytes(1024) + sb)
+    repacker = Repacker(SimpleNamespace(stock_rom_code="pudding"))
+    calls = []
+    repacker.shell.run = lambda cmd, **kw: calls.append(cmd[0])
+
+    repacker._shrink_ext4(img)
+    repacker._shrink_ext4(tmp_path / "not-ext4.img")
+
+    assert calls == ["resize2fs"] * (2 if resized else 1)
+
+
+def test_repack_images_listed_once(tmp_path: Path) -> None:
+    repack_dir = tmp_path / "repack_images"
+    repack_dir.mkdir()
+    (repack_dir / "vbmeta.img").write_bytes(b"")
+    (repack_dir / "boot.img").write_bytes(b"")
+    repacker = Repacker(SimpleNamespace(stock_rom_code="pudding", repack_images_dir=repack_dir))
+
+    assert [p.name for p in repacker._repack_images()] == ["boot.img", "vbmeta.img"]
+    (repack_dir / "dtbo.img").write_bytes(b"")
+    assert len(repacker._repack_images()) == 2
+    assert (
+        Repacker(
+            SimpleNamespace(stock_rom_code="pudding", repack_images_dir=tmp_path / "x")
+        )._repack_images()
+        == []
+    )
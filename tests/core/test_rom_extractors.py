@@ -0,0 +1,182 @@
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.core.rom import extractors
+
+
+class FakeDecompressor:
+    def process(self, chunk: bytes) -> bytes:
+        return chunk
+
+    def is_finished(self) -> bool:
+        return True
+
+
+def test_extract_brotli_converts_every_partition(tmp_path: Path, monkeypatch) -> None:
+    block = bytes(range(256)) * 16
+    rom = tmp_path / "rom.zip"
+    with zipfile.ZipFile(rom, "w") as z:
+        for part in ("system", "vendor"):
+            z.writestr(f"{part}.new.dat.br", block)
+            z.writestr(f"{part}.transfer.list", "4\n1\n0\n0\nnew 2,0,1\n")
+        z.writestr("odm.new.dat.br", block)
+
+    monkeypatch.setattr(extractors, "brotli", SimpleNamespace(Decompressor=FakeDecompressor))
+    monkeypatch.setattr(extractors, "logging_process_pool", ThreadPoolExecutor)
+    images_dir = tmp_path / "images"
+    package = SimpleNamespace(
+        path=rom, images_dir=images_dir, label="Port", logger=logging.getLogger("test")
+    )
+
+    extractors.extract_brotli(package, None)
+
+    for part in ("system", "vendor"):
+        assert (images_dir / f"{part}.img").read_bytes() == block
+        assert not (images_dir / f"{part}.new.dat.br").exists()
+        assert not (images_dir / f"{part}.new.dat").exists()
+        assert not (images_dir / f"{part}.transfer.list").exists()
+    assert not (images_dir / "odm.img").exists()
+    assert (images_dir / "odm.new.dat.br").exists()
+
+
+def test_extract_brotli_keeps_converting_after_a_worker_failure(
+    tmp_path: Path, monkeypatch, caplog
+) -> None:
+    block = bytes(range(256)) * 16
+    rom = tmp_path / "rom.zip"
+    with zipfile.ZipFile(rom, "w") as z:
+        for part in ("system", "vendor"):
+            z.writestr(f"{part}.new.dat.br", block)
+            z.writestr(f"{part}.transfer.list", "4\n1\n0\n0\nnew 2,0,1\n")
+
+    convert = extractors._stream_and_convert
+
+    def flaky_convert(rom_path, member, transfer_list, output_img):
+        if member.startswith("system"):
+            raise RuntimeError("worker died")
+        return convert(rom_path, member, transfer_list, output_img)
+
+    monkeypatch.setattr(extractors, "brotli", SimpleNamespace(Decompressor=FakeDecompressor))
+    monkeypatch.setattr(extractors, "logging_process_pool", ThreadPoolExecutor)
+    monkeypatch.setattr(extractors, "_stream_and_convert", flaky_convert)
+    images_dir = tmp_path / "images"
+    package = SimpleNamespace(
+        path=rom, images_dir=images_dir, label="Port", logger=logging.getLogger("test")
+    )
+
+    with caplog.at_level(logging.ERROR, logger="test"):
+        extractors.extract_brotli(package, None)
+
+    assert "[Port] Brotli conversion failed: worker died" in caplog.messages
+    assert not (images_dir / "system.img").exists()
+    assert (images_dir / "vendor.img").read_bytes() == block
+
+
+def test_brotli_reader_returns_exact_sizes(monkeypatch) -> None:
+    import io
+
+    class ChunkyDecompressor(FakeDecompressor):
+        def process(self, chunk: bytes) -> bytes:
+            return chunk * 2
+
+    monkeypatch.setattr(extractors, "brotli", SimpleNamespace(Decompressor=ChunkyDecompressor))
+    monkeypatch.setattr(extractors, "_BROTLI_STREAM_CHUNK", 3)
+    reader = extractors._BrotliReader(io.BytesIO(b"abcdefg"))
+
+    assert reader.read(4) == b"abca"
+    assert reader.read(8) == b"bcdefdef"
+    assert reader.read(8) == b"gg"
+    assert reader.read(8) == b""
+
+
+def test_extract_fastboot_flattens_selected_images(tmp_path: Path, monkeypatch) -> None:
+    rom = tmp_path / "rom.zip"
+    with zipfile.ZipFile(rom, "w") as z:
+        z.writestr("images/boot.img", b"boot")
+        z.writestr("images/vendor_boot.img", b"vendor_boot")
+        z.writestr("images/dtbo.img", b"dtbo")
+        z.writestr("flash_all.sh", b"#!/bin/sh")
+
+    from src.core.rom import utils
+
+    monkeypatch.setattr(utils, "process_sparse_images", lambda *args: None)
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    package = SimpleNamespace(
+        path=rom,
+        images_dir=images_dir,
+        label="Port",
+        logger=logging.getLogger("test"),
+        shell=None,
+    )
+
+    extractors.extract_fastboot(package, ["boot", "vendor_boot"])
+
+    assert sorted(p.name for p in images_dir.iterdir()) == ["boot.img", "vendor_boot.img"]
+    assert (images_dir / "vendor_boot.img").read_bytes() == b"vendor_boot"
+
+
+def test_process_sparse_images_merges_super_and_cust(tmp_path: Path) -> None:
+    from src.core.rom.utils import process_sparse_images
+
+    for name in ("super.img.0", "super.img.1", "super.img.10", "cust.img.0"):
+        (tmp_path / name).write_bytes(b"\x3a\xff\x26\xed" + b"\0" * 24)
+    merged = []
+
+    def fake_run(cmd):
+        merged.append([Path(arg).name for arg in cmd[1:]])
+        Path(cmd[-1]).write_bytes(b"raw")
+
+    process_sparse_images(tmp_path, logging.getLogger("test"), SimpleNamespace(run=fake_run))
+
+    assert sorted(merged) == [
+        ["cust.img.0", "cust.img"],
+        ["super.img.0", "super.img.1", "super.img.10", "super.img"],
+    ]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cust.img", "super.img"]
+
+
+def test_process_sparse_images_joins_raw_chunks_without_simg2img(tmp_path: Path) -> None:
+    from src.core.rom.utils import process_sparse_images
+
+    for i, name in enumerate(("super.img.0", "super.img.1", "super.img.10")):
+        (tmp_path / name).write_bytes(bytes([i]) * 3)
+    (tmp_path / "cust.img").write_bytes(b"raw")
+
+    def fail_run(cmd):
+        raise AssertionError(f"unexpected simg2img call: {cmd}")
+
+    process_sparse_images(tmp_path, logging.getLogger("test"), SimpleNamespace(run=fail_run))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cust.img", "super.img"]
+    assert (tmp_path / "super.img").read_bytes() == b"\0\0\0\1\1\1\2\2\2"
+
+
+def test_extract_payload_queries_metadata_alongside_dump(tmp_path: Path, monkeypatch) -> None:
+    events = []
+    info = SimpleNamespace(device_code="fuxi", partition_names=["system"])
+
+    class FakeRunner:
+        def __init__(self, path):
+            events.append(("runner", path))
+
+        def get_full_info(self):
+            return info
+
+    monkeypatch.setattr(extractors, "PayloadDumperRunner", FakeRunner)
+    package = SimpleNamespace(
+        path=tmp_path / "rom.zip",
+        images_dir=tmp_path / "images",
+        label="Stock",
+        logger=logging.getLogger("test"),
+        shell=SimpleNamespace(run=lambda cmd: events.append(("dump", cmd))),
+    )
+
+    assert extractors.extract_payload(package, ["system"], extract_metadata=True) is info
+
+    dump_cmd = next(cmd for kind, cmd in events if kind == "dump")
+    assert dump_cmd[dump_cmd.index("--partitions") + 1] == "system"
+    assert dump_cmd[-1] == str(package.path)
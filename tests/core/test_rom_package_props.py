@@ -0,0 +1,168 @@
+from pathlib import Path
+
+from src.core.rom.package import RomPackage
+
+
+def test_get_prop_parses_build_props_once(tmp_path: Path, monkeypatch):
+    rom_dir = tmp_path / "rom"
+    rom_dir.mkdir()
+    package = RomPackage(rom_dir, tmp_path / "work", label="Port")
+    prop_dir = package.extracted_dir / "system" / "system"
+    prop_dir.mkdir(parents=True)
+    (prop_dir / "build.prop").write_text("ro.mi.os.version.name=OS3.0\n", encoding="utf-8")
+
+    calls = []
+    original = package.parse_all_props
+    monkeypatch.setattr(package, "parse_all_props", lambda: calls.append(1) or original())
+
+    assert package.get_prop("ro.mi.os.version.name", "") == "OS3.0"
+    assert package.get_prop("ro.missing", "") == ""
+    assert package.get_prop("ro.mi.os.version.name", "") == "OS3.0"
+    assert len(calls) == 1
+
+
+def test_get_prop_does_not_rescan_when_no_props_found(tmp_path: Path, monkeypatch):
+    rom_dir = tmp_path / "rom"
+    rom_dir.mkdir()
+    package = RomPackage(rom_dir, tmp_path / "work", label="Port")
+    package.extracted_dir.mkdir(parents=True)
+
+    calls = []
+    original = package.parse_all_props
+    monkeypatch.setattr(package, "parse_all_props", lambda: calls.append(1) or original())
+
+    assert package.get_prop("ro.build.host", "") == ""
+    assert package.get_prop("ro.build.host", "") == ""
+    assert len(calls) == 1
+
+
+def test_load_single_prop_file_parses_like_line_split(tmp_path: Path):
+    import logging
+
+    from src.core.rom.utils import load_single_prop_file
+
+    prop = tmp_path / "system" / "build.prop"
+    prop.parent.mkdir()
+    prop.write_text(
+        "# comment=ignored\n\n  ro.a = 1 \r\nro.b=x=y\nno_equals\n=empty\nro.a=2\n",
+        encoding="utf-8",
+    )
+    props, history = {}, {}
+
+    load_single_prop_file(prop, tmp_path, props, history, logging.getLogger("test"))
+
+    assert props == {"ro.a": "2", "ro.b": "x=y", "": "empty"}
+    assert history["ro.a"] == [("system/build.prop", "1"), ("system/build.prop", "2")]
+
+
+def test_load_single_prop_file_shares_repeated_short_values(tmp_path: Path):
+    import logging
+
+    from src.core.rom.utils import load_single_prop_file
+
+    prop = tmp_path / "build.prop"
+    prop.write_text("ro.x=enabled\nro.y=enabled\n", encoding="utf-8")
+    props, history = {}, {}
+
+    load_single_prop_file(prop, tmp_path, props, history, logging.getLogger("test"))
+
+    assert props["ro.x"] is props["ro.y"]
+    assert history["ro.x"][0][0] is history["ro.y"][0][0]
+
+
+def test_parse_all_props_merges_in_priority_order(tmp_path: Path):
+    rom_dir = tmp_path / "rom"
+    rom_dir.mkdir()
+    package = RomPackage(rom_dir, tmp_path / "work", label="Port")
+    for part, value in (("vendor", "v"), ("system", "s"), ("product", "p")):
+        prop = package.extracted_dir / part / "build.prop"
+        prop.parent.mkdir(parents=True)
+        prop.write_text(f"ro.x={value}\nro.{part}=1\n", encoding="utf-8")
+
+    package.parse_all_props()
+
+    assert package.props["ro.x"] == "p"
+    assert [v for _, v in package.prop_history["ro.x"]] == ["s", "v", "p"]
+    assert list(package.props) == ["ro.x", "ro.system", "ro.vendor", "ro.product"]
+
+
+def test_parse_all_props_reuses_snapshot_until_a_prop_file_changes(tmp_path: Path, monkeypatch):
+    from src.core.rom import package as package_mod
+
+    rom_dir = tmp_path / "rom"
+    rom_dir.mkdir()
+    first = RomPackage(rom_dir, tmp_path / "work", label="Port")
+    prop = first.extracted_dir / "system" / "build.prop"
+    prop.parent.mkdir(parents=True)
+    prop.write_text("ro.a=1\n", encoding="utf-8")
+    first.parse_all_props()
+
+    parsed = []
+    real_load = package_mod.load_single_prop_file
+    monkeypatch.setattr(
+        package_mod, "load_single_prop_file", lambda *a: parsed.append(a[0]) or real_load(*a)
+    )
+
+    second = RomPackage(rom_dir, tmp_path / "work", label="Port")
+    second.parse_all_props()
+    assert parsed == []
+    assert second.props == {"ro.a": "1"}
+    assert second.prop_history == first.prop_history
+
+    prop.write_text("ro.a=22\n", encoding="utf-8")
+    second.parse_all_props()
+    assert parsed == [prop]
+    assert second.props == {"ro.a": "22"}
+
+
+def test_parse_all_props_keeps_snapshot_out_of_local_source_dir(tmp_path: Path, monkeypatch):
+    import json
+
+    from src.core.rom import package as package_mod
+
+    rom_dir = tmp_path / "rom"
+    (rom_dir / "images").mkdir(parents=True)
+    prop = tmp_path / "work" / "extracted" / "system" / "build.prop"
+    prop.parent.mkdir(parents=True)
+    prop.write_text("ro.a=1\n", encoding="utf-8")
+    RomPackage(rom_dir, tmp_path / "work", label="Port").parse_all_props()
+
+    assert [p.name for p in rom_dir.iterdir()] == ["images"]
+    cache_file = tmp_path / "work" / package_mod.PROPS_CACHE
+    cached = json.loads(cache_file.read_text(encoding="utf-8"))
+    assert cached["version"] == package_mod.PROPS_CACHE_VERSION
+
+    # A snapshot from another cache version is reparsed, not trusted
+    cache_file.write_text(json.dumps({**cached, "version": -1, "props": {"ro.a": "stale"}}))
+    parsed = []
+    real_load = package_mod.load_single_prop_file
+    monkeypatch.setattr(
+        package_mod, "load_single_prop_file", lambda *a: parsed.append(a[0]) or real_load(*a)
+    )
+    package = RomPackage(rom_dir, tmp_path / "work", label="Port")
+    package.parse_all_props()
+    assert parsed == [prop]
+    assert package.props == {"ro.a": "1"}
+
+
+def test_export_props_writes_override_history(tmp_path: Path):
+    rom_dir = tmp_path / "rom"
+    rom_dir.mkdir()
+    package = RomPackage(rom_dir, tmp_path / "work", label="Port")
+    package.props = {"b": "2", "a": "1"}
+    package.prop_history = {"a": [("system/build.prop", "0"), ("vendor/build.prop", "1")]}
+
+    out = tmp_path / "out" / "props.txt"
+    package.export_props(out)
+
+    assert out.read_text(encoding="utf-8") == (
+        "# DEBUG DUMP for Port\n"
+        "# Generated by HyperOS Porting Tool\n"
+        "# ==========================================\n\n"
+        "# [OVERRIDE DETECTED]\n# a\n"
+        "#   - system/build.prop: 0\n"
+        "#   - vendor/build.prop: 1\n"
+        "#   -> Final: 1\n"
+        "a=1\n"
+        "b=2"
+    )
@@ -0,0 +1,110 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.core.rom import package as package_mod
+from src.core.rom.constants import RomType
+from src.core.rom.package import RomPackage
+
+
+def test_detect_type_reuses_cache_until_source_changes(tmp_path: Path, monkeypatch):
+    rom = tmp_path / "rom.zip"
+    with zipfile.ZipFile(rom, "w") as z:
+        z.writestr("payload.bin", b"")
+    work = tmp_path / "work"
+
+    assert RomPackage(rom, work).rom_type == RomType.PAYLOAD
+
+    opened = []
+    real_zipfile = package_mod.zipfile.ZipFile
+    monkeypatch.setattr(
+        package_mod.zipfile, "ZipFile", lambda *a, **kw: opened.append(a) or real_zipfile(*a, **kw)
+    )
+    assert RomPackage(rom, work).rom_type == RomType.PAYLOAD
+    assert opened == []
+
+    with zipfile.ZipFile(rom, "w") as z:
+        z.writestr("images/super.img", b"")
+    os.utime(rom, ns=(1, 1))
+    opened.clear()
+    assert RomPackage(rom, work).rom_type == RomType.FASTBOOT
+    assert len(opened) == 1
+
+
+def test_detect_type_ignores_cache_from_another_version(tmp_path: Path, monkeypatch):
+    rom = tmp_path / "rom.zip"
+    with zipfile.ZipFile(rom, "w") as z:
+        z.writestr("payload.bin", b"")
+    work = tmp_path / "work"
+    RomPackage(rom, work)
+
+    cache_file = work / package_mod.ROM_TYPE_CACHE
+    cached = json.loads(cache_file.read_text(encoding="utf-8"))
+    assert cached["version"] == package_mod.ROM_TYPE_CACHE_VERSION
+    cache_file.write_text(json.dumps({**cached, "version": -1, "rom_type": "BROTLI"}))
+
+    assert RomPackage(rom, work).rom_type == RomType.PAYLOAD
+
+
+def test_batch_extract_precreates_output_dirs(tmp_path: Path, monkeypatch):
+    rom = tmp_path / "rom.zip"
+    with zipfile.ZipFile(rom, "w") as z:
+        z.writestr("payload.bin", b"")
+    pkg = RomPackage(rom, tmp_path / "work")
+    pkg.images_dir.mkdir(parents=True)
+    (pkg.images_dir / "system.img").write_bytes(b"")
+    (pkg.images_dir / "vendor_a.img").write_bytes(b"")
+
+    calls = []
+
+    def fake_extract(part, dirs_ready=False):
+        assert dirs_ready and (pkg.extracted_dir / part).is_dir() and pkg.config_dir.is_dir()
+        calls.append(part)
+
+    monkeypatch.setattr(pkg, "extract_partition_to_file", fake_extract)
+    pkg._batch_extract_files(["system", "vendor", "odm"])
+
+    assert sorted(calls) == ["system", "vendor"]
+    assert not (pkg.extracted_dir / "odm").exists()
+
+
+def test_detect_type_from_zip_members(tmp_path: Path):
+    cases = {
+        RomType.PAYLOAD: ["system.new.dat.br", "payload.bin"],
+        RomType.BROTLI: ["images/super.img", "system.new.dat.br"],
+        RomType.FASTBOOT: ["images/boot.img", "images/super.img.1"],
+        RomType.UNKNOWN: ["images/boot.img"],
+    }
+    for expected, names in cases.items():
+        rom = tmp_path / f"{expected.name}.zip"
+        with zipfile.ZipFile(rom, "w") as z:
+            for name in names:
+                z.writestr(name, b"")
+        assert RomPackage(rom, tmp_path / expected.name).rom_type == expected
+
+
+def test_extract_partition_moves_first_config_match(tmp_path: Path):
+    rom = tmp_path / "rom.zip"
+    with zipfile.ZipFile(rom, "w") as z:
+        z.writestr("payload.bin", b"")
+    pkg = RomPackage(rom, tmp_path / "work")
+    pkg.images_dir.mkdir(parents=True)
+    (pkg.images_dir / "vendor_a.img").write_bytes(b"")
+
+    def fake_extract_erofs(cmd, capture_output=False):
+        out = pkg.extracted_dir
+        (out / "vendor_a").mkdir(parents=True)
+        (out / "vendor_a" / "bin").write_text("x")
+        (out / "config").mkdir(exist_ok=True)
+        (out / "config" / "vendor_a_file_contexts").write_text("config")
+        (out / "vendor_a_file_contexts").write_text("parent")
+        (out / "vendor_a_fs_config").write_text("fs")
+
+    pkg.shell = SimpleNamespace(run=fake_extract_erofs)
+    assert pkg.extract_partition_to_file("vendor") == pkg.extracted_dir / "vendor"
+
+    assert (pkg.config_dir / "vendor_file_contexts").read_text() == "config"
+    assert (pkg.config_dir / "vendor_fs_config").read_text() == "fs"
+    assert (pkg.extracted_dir / "vendor_a_file_contexts").exists()
@@ -1,5 +1,7 @@
 """Unit tests for ShellRunner class."""
 
+import os
+import shutil
 import subprocess
 from pathlib import Path
 from unittest.mock import Mock, patch
@@ -160,3 +162,191 @@ class TestShellRunner:
             assert call_args[0] == "java"
             assert call_args[1] == "-jar"
             assert "arg1" in call_args
+
+
+def test_run_inherits_environment_unless_overridden(monkeypatch):
+    seen = []
+    monkeypatch.setattr(
+        subprocess,
+        "run",
+        lambda cmd, **kw: seen.append(kw["env"]) or subprocess.CompletedProcess(cmd, 0),
+    )
+    monkeypatch.setenv("HYPEROS_TEST_VAR", "base")
+    shell = ShellRunner()
+
+    shell.run(["true"])
+    shell.run(["true"], env={"HYPEROS_TEST_VAR": "override"})
+
+    assert seen[0] is None
+    assert seen[1]["HYPEROS_TEST_VAR"] == "override"
+    assert seen[1]["PATH"] == os.environ["PATH"]
+
+
+def test_get_binary_path_caches_bundled_tools_only(tmp_path):
+    shell = ShellRunner()
+    shell.bin_dir = tmp_path / "bin" / "linux" / "x86_64"
+    shell.otatools_bin = tmp_path / "otatools" / "bin"
+    shell.bin_dir.mkdir(parents=True)
+    (shell.bin_dir / "lpunpack").write_text("")
+
+    assert shell.get_binary_path("lpunpack") == shell.bin_dir / "lpunpack"
+    assert shell.get_binary_path("lpmake").name == "lpmake"
+
+    # Cached hit survives the file going away; a miss rescans and finds new tools
+    (shell.bin_dir / "lpunpack").unlink()
+    shell.otatools_bin.mkdir(parents=True)
+    (shell.otatools_bin / "lpmake").write_text("")
+    assert shell.get_binary_path("lpunpack") == shell.bin_dir / "lpunpack"
+    assert shell.get_binary_path("lpmake") == shell.otatools_bin / "lpmake"
+
+    shell.invalidate_binary_cache()
+    assert shell.get_binary_path("lpunpack") == Path("lpunpack")
+    assert shell.get_binary_path("lpmake") == shell.otatools_bin / "lpmake"
+
+
+def test_run_checks_tool_permissions_once(tmp_path, monkeypatch):
+    shell = ShellRunner()
+    shell.bin_dir = tmp_path
+    tool = tmp_path / "mytool"
+    tool.write_text("")
+    tool.chmod(0o644)
+    monkeypatch.setattr(subprocess, "run", lambda cmd, **kw: subprocess.CompletedProcess(cmd, 0))
+    access_calls = []
+    real_access = os.access
+    monkeypatch.setattr(os, "access", lambda p, m: access_calls.append(p) or real_access(p, m))
+
+    for _ in range(3):
+        cmd = ["mytool"]
+        shell.run(cmd)
+        assert cmd[0] == str(tool)
+
+    assert access_calls == [tool]
+    assert os.access(tool, os.X_OK)
+
+
+def test_run_many_keeps_input_order_and_collects_errors(tmp_path):
+    shell = ShellRunner()
+    cmds = [["sh", "-c", f"sleep 0.{3 - i}; echo {i}"] for i in range(3)]
+    cmds.insert(1, ["false"])
+
+    results = shell.run_many(cmds, capture_output=True)
+
+    assert [r.stdout.strip() for r in results if not isinstance(r, Exception)] == ["0", "1", "2"]
+    assert isinstance(results[1], subprocess.CalledProcessError)
+
+
+def test_run_execs_plain_command_strings_without_a_shell(monkeypatch):
+    seen = []
+    monkeypatch.setattr(
+        subprocess,
+        "run",
+        lambda cmd, **kw: seen.append((cmd, kw["shell"])) or subprocess.CompletedProcess(cmd, 0),
+    )
+    shell = ShellRunner()
+
+    shell.run("hyperos-no-such-tool 'a b' c")
+    shell.run("ls *.img | wc -l")
+    shell.run("FOO=1 make")
+
+    assert seen == [
+        (["hyperos-no-such-tool", "a b", "c"], False),
+        ("ls *.img | wc -l", True),
+        ("FOO=1 make", True),
+    ]
+
+
+def test_get_binary_path_resolves_path_tools_once(tmp_path, monkeypatch):
+    shell = ShellRunner()
+    shell.bin_dir = tmp_path / "bin" / "linux" / "x86_64"
+    shell.otatools_bin = tmp_path / "otatools" / "bin"
+    lookups = []
+    monkeypatch.setattr(shutil, "which", lambda name: lookups.append(name) or f"/usr/bin/{name}")
+
+    assert shell.get_binary_path("java") == Path("/usr/bin/java")
+    assert shell.get_binary_path("java") == Path("/usr/bin/java")
+    assert lookups == ["java"]
+
+
+def test_get_binary_path_serves_bundled_tools_from_one_listing(tmp_path, monkeypatch):
+    shell = ShellRunner()
+    shell.bin_dir = tmp_path / "bin" / "linux" / "x86_64"
+    shell.otatools_bin = tmp_path / "otatools" / "bin"
+    shell.bin_dir.mkdir(parents=True)
+    for name in ("lpunpack", "mke2fs", "simg2img"):
+        (shell.bin_dir / name).write_text("")
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda p: scans.append(p) or real_scandir(p))
+
+    for name in ("lpunpack", "mke2fs", "simg2img"):
+        assert shell.get_binary_path(name) == shell.bin_dir / name
+
+    assert len(scans) == 3  # one listing per bin directory
+
+
+def test_get_binary_path_rescans_bin_dirs_once_per_miss(tmp_path, monkeypatch):
+    shell = ShellRunner()
+    shell.bin_dir = tmp_path / "bin" / "linux" / "x86_64"
+    shell.otatools_bin = tmp_path / "otatools" / "bin"
+    shell.get_binary_path("lpunpack")  # takes the listing of the repointed dirs
+    scans = []
+    real_scan = shell._scan_bin_dirs
+    monkeypatch.setattr(shell, "_scan_bin_dirs", lambda: scans.append(1) or real_scan())
+    monkeypatch.setattr(shutil, "which", lambda name: "/usr/bin/" + name if name == "sh" else None)
+
+    for _ in range(3):
+        assert shell.get_binary_path("hyperos-no-such-tool") == Path("hyperos-no-such-tool")
+    assert len(scans) == 3
+
+    # A PATH hit is cached, so it costs one rescan in total
+    for _ in range(3):
+        assert shell.get_binary_path("sh") == Path("/usr/bin/sh")
+    assert len(scans) == 4
+
+
+def test_default_runner_is_shared():
+    from src.utils.shell import default_runner
+
+    assert default_runner() is default_runner()
+    assert isinstance(default_runner(), ShellRunner)
+
+
+def test_run_quiet_discards_stdout_but_reports_stderr():
+    shell = ShellRunner()
+
+    result = shell.run(["sh", "-c", "echo noise; echo detail >&2"], quiet=True)
+    assert result.stdout is None
+    assert result.stderr == "detail\n"
+
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        shell.run(["sh", "-c", "echo noise; echo boom >&2; exit 2"], quiet=True)
+    assert excinfo.value.stderr == "boom\n"
+
+
+def test_run_quiet_keeps_only_a_bounded_stderr_tail(monkeypatch):
+    from src.utils import shell as shell_mod
+
+    monkeypatch.setattr(shell_mod, "_QUIET_STDERR_LINES", 3)
+    shell = ShellRunner()
+
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        shell.run(
+            ["sh", "-c", "for i in 1 2 3 4 5 6; do echo line$i >&2; done; exit 1"], quiet=True
+        )
+    assert excinfo.value.stderr == "line4\nline5\nline6\n"
+
+
+def test_preload_tools_fills_the_path_cache(tmp_path, monkeypatch):
+    shell = ShellRunner()
+    shell.bin_dir = tmp_path / "bin" / "linux" / "x86_64"
+    shell.otatools_bin = tmp_path / "otatools" / "bin"
+    shell.bin_dir.mkdir(parents=True)
+    (shell.bin_dir / "lpunpack").write_text("")
+    monkeypatch.setattr(shutil, "which", lambda name: "/usr/bin/java" if name == "java" else None)
+
+    shell.preload_tools(["lpunpack", "java", "missing-tool"])
+
+    monkeypatch.setattr(os, "scandir", None)  # any further probing would blow up
+    monkeypatch.setattr(shutil, "which", None)
+    assert shell.get_binary_path("lpunpack") == shell.bin_dir / "lpunpack"
+    assert shell.get_binary_path("java") == Path("/usr/bin/java")
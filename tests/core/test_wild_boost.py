@@ -0,0 +1,46 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.core.modifiers.plugins.wild_boost import WildBoostPlugin
+
+
+def test_libmigui_hexpatch_spoofs_product_props(tmp_path: Path):
+    lib = tmp_path / "target" / "system_ext" / "lib64" / "libmigui.so"
+    lib.parent.mkdir(parents=True)
+    lib.write_bytes(b"\x00ro.product.product.name\x00ro.product.device\x00")
+
+    plugin = WildBoostPlugin(SimpleNamespace(target_dir=tmp_path / "target"))
+
+    assert plugin._apply_libmigui_hexpatch() is True
+    assert lib.read_bytes() == b"\x00ro.product.spoofed.name\x00ro.spoofed.device\x00"
+
+
+def test_install_vendor_dlkm_appends_missing_modules(tmp_path: Path):
+    modules_dir = tmp_path / "target" / "vendor_dlkm" / "lib" / "modules"
+    modules_dir.mkdir(parents=True)
+    (modules_dir / "modules.load").write_text("metis.ko\nperfmgr.ko", encoding="utf-8")
+    ko_dir = tmp_path / "ko"
+    ko_dir.mkdir()
+    ko_files = [ko_dir / "perfmgr.ko", ko_dir / "wild_boost.ko"]
+    for ko in ko_files:
+        ko.write_bytes(b"ko")
+
+    plugin = WildBoostPlugin(SimpleNamespace(target_dir=tmp_path / "target"))
+
+    assert plugin._install_vendor_dlkm(ko_files) is True
+    assert (modules_dir / "modules.load").read_text(encoding="utf-8") == (
+        "metis.ko\nperfmgr.ko\nwild_boost.ko\n"
+    )
+    assert (modules_dir / "wild_boost.ko").read_bytes() == b"ko"
+
+
+def test_add_feas_property_appends_once(tmp_path: Path):
+    prop = tmp_path / "target" / "mi_ext" / "etc" / "build.prop"
+    prop.parent.mkdir(parents=True)
+    prop.write_text("ro.mi.foo=1", encoding="utf-8")
+
+    plugin = WildBoostPlugin(SimpleNamespace(target_dir=tmp_path / "target"))
+    plugin._add_feas_property()
+    plugin._add_feas_property()
+
+    assert prop.read_text(encoding="utf-8") == "ro.mi.foo=1\npersist.sys.feas.enable=true\n"
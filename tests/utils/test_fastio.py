@@ -0,0 +1,178 @@
+"""Tests for fastio module."""
+
+import errno
+import os
+import zipfile
+
+from src.utils import fastio
+from src.utils.fastio import extract_zip, fast_copy
+
+
+def test_fast_copy_copies_contents(tmp_path):
+    src = tmp_path / "src.img"
+    dst = tmp_path / "dst.img"
+    payload = os.urandom(3 * 1024 * 1024 + 17)
+    src.write_bytes(payload)
+
+    fast_copy(src, dst)
+
+    assert dst.read_bytes() == payload
+
+
+def test_fast_copy_truncates_existing_destination(tmp_path):
+    src = tmp_path / "src.img"
+    dst = tmp_path / "dst.img"
+    src.write_bytes(b"short")
+    dst.write_bytes(b"much longer previous content")
+
+    fast_copy(src, dst)
+
+    assert dst.read_bytes() == b"short"
+
+
+def test_fast_copy_falls_back_to_userspace_loop(tmp_path, monkeypatch):
+    def unsupported(in_fd, out_fd, offset):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(fastio, "_KERNEL_STEPS", [unsupported])
+    src = tmp_path / "src.img"
+    dst = tmp_path / "dst.img"
+    payload = os.urandom(2 * 1024 * 1024 + 5)
+    src.write_bytes(payload)
+
+    fast_copy(src, dst)
+
+    assert dst.read_bytes() == payload
+
+
+def test_extract_zip_restores_tree_and_permissions(tmp_path):
+    archive = tmp_path / "bundle.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("modules/", "")
+        info = zipfile.ZipInfo("modules/perfmgr.ko")
+        info.external_attr = 0o100755 << 16
+        zf.writestr(info, b"\x7fELF" + os.urandom(2 * 1024 * 1024))
+        zf.writestr("../escape.txt", b"nope")
+
+    out = tmp_path / "out"
+    extract_zip(archive, out)
+
+    ko = out / "modules" / "perfmgr.ko"
+    assert ko.read_bytes()[:4] == b"\x7fELF"
+    assert ko.stat().st_mode & 0o777 == 0o755
+    assert (out / "escape.txt").exists()
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def test_extract_zip_parallel_matches_archive(tmp_path):
+    archive = tmp_path / "many.zip"
+    payloads = {f"lib/modules/m{i}.ko": os.urandom(4096 + i) for i in range(32)}
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in payloads.items():
+            zf.writestr(name, data)
+
+    extract_zip(archive, tmp_path / "out", max_workers=4)
+
+    for name, data in payloads.items():
+        assert (tmp_path / "out" / name).read_bytes() == data
+
+
+def test_fast_move_falls_back_to_copy_across_filesystems(tmp_path, monkeypatch):
+    src = tmp_path / "new-boot.img"
+    dst = tmp_path / "boot.img"
+    src.write_bytes(b"new")
+    dst.write_bytes(b"old")
+
+    def cross_device(*_):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(fastio.os, "replace", cross_device)
+    fastio.fast_move(src, dst)
+
+    assert dst.read_bytes() == b"new"
+    assert not src.exists()
+
+
+def test_extract_zip_handles_small_and_streamed_members(tmp_path, monkeypatch):
+    monkeypatch.setattr(fastio, "_SMALL_MEMBER_SIZE", 1024)
+    archive = tmp_path / "mixed.zip"
+    small, large = os.urandom(100), os.urandom(64 * 1024)
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("small.ko", small)
+        zf.writestr("large.ko", large)
+
+    extract_zip(archive, tmp_path / "out", max_workers=1)
+
+    assert (tmp_path / "out" / "small.ko").read_bytes() == small
+    assert (tmp_path / "out" / "large.ko").read_bytes() == large
+
+
+def test_parallel_copy_copies_every_pair(tmp_path, monkeypatch):
+    monkeypatch.setenv("HYPEROS_COPY_WORKERS", "3")
+    pairs = []
+    for i in range(5):
+        src = tmp_path / f"part{i}.img"
+        src.write_bytes(os.urandom(1024 + i))
+        pairs.append((src, tmp_path / "out" / src.name))
+    (tmp_path / "out").mkdir()
+
+    fastio.parallel_copy(pairs)
+
+    for src, dst in pairs:
+        assert dst.read_bytes() == src.read_bytes()
+
+
+def test_fast_copy_drop_cache_evicts_both_files(tmp_path, monkeypatch):
+    src = tmp_path / "src.img"
+    dst = tmp_path / "dst.img"
+    src.write_bytes(b"payload")
+    advice = []
+    monkeypatch.setattr(fastio, "_fadvise", lambda fd, adv: advice.append(adv))
+
+    fast_copy(src, dst, drop_cache=True)
+
+    assert dst.read_bytes() == b"payload"
+    assert advice == [fastio._FADV_SEQUENTIAL, fastio._FADV_DONTNEED, fastio._FADV_DONTNEED]
+
+
+def test_extract_zip_select_limits_members(tmp_path):
+    archive = tmp_path / "rom.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("system.new.dat.br", b"br")
+        zf.writestr("system.transfer.list", b"4\n")
+        zf.writestr("META-INF/com/google/android/updater-script", b"")
+
+    extract_zip(archive, tmp_path / "out", select=lambda name: name.startswith("system."))
+
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == [
+        "system.new.dat.br",
+        "system.transfer.list",
+    ]
+
+
+def test_iter_files_matches_rglob_order(tmp_path):
+    for rel in ("a.xml", "b/c.xml", "b/d.txt", "b/e/f.xml", "g/h.xml", "g.xml/i.txt"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    os.symlink(tmp_path / "b", tmp_path / "link")
+
+    found = list(fastio.iter_files(tmp_path, lambda name: name.endswith(".xml")))
+
+    assert found == [str(p) for p in tmp_path.rglob("*.xml") if p.is_file()]
+
+
+def test_fast_concat_falls_back_when_kernel_copy_unsupported(tmp_path, monkeypatch):
+    srcs = []
+    for i in range(3):
+        src = tmp_path / f"part{i}"
+        src.write_bytes(bytes([i]) * 1000)
+        srcs.append(src)
+
+    def no_copy_file_range(*args, **kwargs):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(fastio.os, "copy_file_range", no_copy_file_range, raising=False)
+    fastio.fast_concat(srcs, tmp_path / "joined")
+
+    assert (tmp_path / "joined").read_bytes() == b"".join(s.read_bytes() for s in srcs)
@@ -0,0 +1,157 @@
+"""Tests for ROMSyncEngine rule execution."""
+
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.sync_engine import ROMSyncEngine
+
+
+def test_execute_rules_deletes_through_a_single_target_index(tmp_path, monkeypatch):
+    target = tmp_path / "target"
+    (target / "product" / "app" / "MSA").mkdir(parents=True)
+    (target / "product" / "app" / "MSA" / "MSA.apk").write_bytes(b"apk")
+    (target / "system" / "lib64").mkdir(parents=True)
+    (target / "system" / "lib64" / "libbugreport.so").write_bytes(b"so")
+    (target / "system" / "lib64" / "libkeep.so").write_bytes(b"so")
+
+    engine = ROMSyncEngine(SimpleNamespace(), logging.getLogger("test.sync"))
+    builds = []
+    original = engine._build_cache
+    monkeypatch.setattr(engine, "_build_cache", lambda d: builds.append(d) or original(d))
+
+    rules = [
+        {"mode": "delete", "target": "MSA"},
+        {"mode": "delete", "target": "MSA.apk"},
+        {"mode": "delete", "target": "libbugreport.so"},
+    ]
+    engine.execute_rules(None, target, rules)
+    engine.execute_rules(None, target, [{"mode": "delete", "target": "Missing"}])
+
+    assert builds == [target]
+    assert not (target / "product" / "app" / "MSA").exists()
+    assert not (target / "system" / "lib64" / "libbugreport.so").exists()
+    assert (target / "system" / "lib64" / "libkeep.so").exists()
+
+
+FAKE_AAPT2 = """#!{python}
+import sys
+
+assert sys.argv[1] == "daemon"
+print("Ready", flush=True)
+args = []
+for line in sys.stdin:
+    line = line.rstrip("\\n")
+    if line:
+        args.append(line)
+        continue
+    apk = args[-1]
+    if apk.endswith("bad.apk"):
+        print("bad.apk: error: failed opening zip", file=sys.stderr)
+        print("Error", file=sys.stderr)
+    else:
+        print("com.example." + apk.rsplit("/", 1)[-1][:-4], flush=True)
+    print("Done", file=sys.stderr, flush=True)
+    args = []
+"""
+
+
+def test_package_cache_uses_one_aapt2_daemon(tmp_path, monkeypatch):
+    aapt2 = tmp_path / "aapt2"
+    aapt2.write_text(FAKE_AAPT2.format(python=sys.executable))
+    aapt2.chmod(0o755)
+    apps = tmp_path / "target" / "app"
+    apps.mkdir(parents=True)
+    for name in ("One", "Two", "bad"):
+        (apps / f"{name}.apk").write_bytes(b"apk")
+
+    def no_one_shot(*args, **kwargs):
+        raise AssertionError("unexpected one-shot aapt2 call")
+
+    monkeypatch.setattr(subprocess, "run", no_one_shot)
+    engine = ROMSyncEngine(
+        SimpleNamespace(tools=SimpleNamespace(aapt2=aapt2)), logging.getLogger("test.sync")
+    )
+
+    cache = engine._get_package_cache(tmp_path / "target")
+
+    assert cache == {"com.example.One": [apps / "One.apk"], "com.example.Two": [apps / "Two.apk"]}
+
+
+STALLED_AAPT2 = """#!{python}
+import sys, time
+
+print("Ready", flush=True)
+sys.stdin.readline()
+time.sleep(30)
+"""
+
+
+def test_stalled_aapt2_daemon_falls_back_to_one_shot_calls(tmp_path, monkeypatch):
+    from src.utils import sync_engine
+
+    aapt2 = tmp_path / "aapt2"
+    aapt2.write_text(STALLED_AAPT2.format(python=sys.executable))
+    aapt2.chmod(0o755)
+    apps = tmp_path / "target" / "app"
+    apps.mkdir(parents=True)
+    for name in ("One", "Two"):
+        (apps / f"{name}.apk").write_bytes(b"apk")
+
+    one_shot = []
+
+    def fake_run(cmd, **kwargs):
+        one_shot.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, "com.example." + Path(cmd[-1]).stem, "")
+
+    monkeypatch.setattr(sync_engine._Aapt2Daemon, "REQUEST_TIMEOUT", 0.5)
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    engine = ROMSyncEngine(
+        SimpleNamespace(tools=SimpleNamespace(aapt2=aapt2)), logging.getLogger("test.sync")
+    )
+
+    cache = engine._get_package_cache(tmp_path / "target")
+
+    assert cache == {"com.example.One": [apps / "One.apk"], "com.example.Two": [apps / "Two.apk"]}
+    assert len(one_shot) == 2
+
+
+BUNDLED_AAPT2 = Path(__file__).resolve().parents[2] / "bin" / "linux" / "x86_64" / "aapt2"
+OVERLAY_DIR = (
+    Path(__file__).resolve().parents[2] / "devices" / "fuxi" / "override" / "16" / "product"
+)
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not os.access(BUNDLED_AAPT2, os.X_OK),
+    reason="needs the bundled linux aapt2",
+)
+def test_bundled_aapt2_daemon_answers_each_request(tmp_path):
+    from src.utils.sync_engine import _Aapt2Daemon
+
+    overlays = sorted((OVERLAY_DIR / "overlay").glob("*.apk"))
+    assert overlays
+    expected = [
+        subprocess.run(
+            [str(BUNDLED_AAPT2), "dump", "packagename", str(apk)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for apk in overlays
+    ]
+
+    daemon = _Aapt2Daemon(str(BUNDLED_AAPT2))
+    try:
+        assert [daemon.dump_packagename(apk) for apk in overlays] == expected
+        with pytest.raises(subprocess.CalledProcessError):
+            daemon.dump_packagename(tmp_path / "missing.apk")
+        # A failed request leaves the daemon usable
+        assert daemon.dump_packagename(overlays[0]) == expected[0]
+    finally:
+        daemon.close()